@@ -10,6 +10,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 from src.database.operations import db, Position
 from src.api.binance_api import BinanceConnector
 from src.collectors.market_collector import MarketDataCollector
+from src.utils.logger import setup_logger
 from src.collectors.news_collector import NewsCollector
 from src.collectors.onchain_collector import OnChainCollector
 
@@ -73,4 +74,5 @@ def main():
     logger.info("Integration Test Completed.")
 
 if __name__ == "__main__":
+    setup_logger()
     main()
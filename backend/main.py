@@ -2,7 +2,6 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from loguru import logger
 import sys
 import os
 from dotenv import load_dotenv
@@ -13,6 +12,8 @@ load_dotenv()
 # 确保 src 目录在 python path 中
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
+from src.utils.logger import logger, setup_logger
+
 import logging
 
 # Filter out /status logs (Health checks)
@@ -28,26 +29,53 @@ from src.api.trading import router as trading_router
 from src.api.ai import router as ai_router
 
 import asyncio
-from src.service_coordinator import start_coordinator_service
+import importlib
+from src.database.async_operations import async_db
+from src.database.operations import db
+from src.database.engine import load_database_config
+from src.database.retention import RetentionEngine
+from src.database.equity import EquitySnapshotter
+from src.memory.memory_system import memory_manager
+
+async def start_coordinator():
+    module = await asyncio.to_thread(importlib.import_module, "src.service_coordinator")
+    await module.start_coordinator_service()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # 日志文件 sink 在服务启动时配置 (导入 main 不写日志文件)
+    setup_logger()
     logger.info("System Starting Up...")
     
     # Initialize DB (Optional check)
+    db.create_tables()
+    if load_database_config().get('write_behind', {}).get('enabled', False):
+        db.enable_write_behind()
     
     # 🚀 Start Coordinator Background Service
     # This runs the Watchdog loop in parallel with the API
-    coordinator_task = asyncio.create_task(start_coordinator_service())
+    # 协调服务依赖交易所 SDK 与各 LLM 客户端 (导入较慢)，在后台线程中导入，不阻塞 API 就绪
+    coordinator_task = asyncio.create_task(start_coordinator())
+    # 数据保留 (降采样 / 归档 / 增量 VACUUM)
+    retention_task = asyncio.create_task(RetentionEngine().run_forever())
+    # 账户权益快照 (资产曲线)
+    snapshot_task = asyncio.create_task(EquitySnapshotter().run_forever())
     
     yield
     
     logger.info("System Shutting Down...")
-    coordinator_task.cancel()
-    try:
-        await coordinator_task
-    except asyncio.CancelledError:
-        pass
+    for task in (coordinator_task, retention_task, snapshot_task):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    async_db.close()
+    # 记忆库 (协调器首次使用时创建): 停止后台线程、保存嵌入缓存
+    if memory_manager.initialized:
+        memory_manager.close()
+    # 写出缓冲中的剩余数据
+    db.disable_write_behind()
 
 app = FastAPI(
     title="Crypto Trading AI System",
@@ -63,6 +91,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # 游标分页
 )
 
 # 注册路由
@@ -4,18 +4,12 @@ import asyncio
 import json
 import os
 from datetime import datetime
-from anthropic import AsyncAnthropic
-# Google GenAI Import
-try:
-    from google import genai
-    from google.genai import types
-    HAS_GENAI = True
-except ImportError:
-    HAS_GENAI = False
 
 from src.ai_agents.communication import CommunicationChannel, AgentMessage, MessageType
 from src.database.operations import db
 from src.utils.logger import logger
+# LLM SDK 体积较大 (anthropic ~0.3s, google-genai ~0.4s)，只在创建对应客户端时导入
+from src.utils.lazy import optional_import
 from src.database.models import DecisionLayer
 
 class BaseAgent(ABC):
@@ -52,7 +46,9 @@ class BaseAgent(ABC):
         self.anthropic_key = os.getenv("ANTHROPIC_API_KEY") 
         self.claude_client = None
         if self.anthropic_key:
-             self.claude_client = AsyncAnthropic(api_key=self.anthropic_key)
+             anthropic = optional_import("anthropic", "Claude provider")
+             if anthropic is not None:
+                 self.claude_client = anthropic.AsyncAnthropic(api_key=self.anthropic_key)
         
         self.claude_model = "claude-3-5-sonnet-20240620"
 
@@ -74,7 +70,8 @@ class BaseAgent(ABC):
                 
             logger.info(f"Agent {self.agent_id} ({self.layer}) initialized with Gemini Model: {self.gemini_model}")
 
-        if self.gemini_key and HAS_GENAI:
+        genai = optional_import("google.genai", "Gemini provider") if self.gemini_key else None
+        if genai is not None:
             self.gemini_client = genai.Client(api_key=self.gemini_key)
         elif self.provider == "gemini" and not self.gemini_key:
             logger.warning("Provider set to Gemini but GEMINI_API_KEY not found.")
@@ -124,6 +121,7 @@ class BaseAgent(ABC):
             
         try:
             # 构建配置
+            types = optional_import("google.genai.types")
             config = types.GenerateContentConfig(
                 system_instruction=system_prompt,
                 temperature=temperature,
@@ -8,6 +8,7 @@ from src.ai_agents.base_agent import BaseAgent, DecisionLayer
 from src.ai_agents.communication import MessageType
 from src.database.models import CoordinatorTrigger, TriggerType, TriggerStatus, AIDecision
 from src.database.operations import db
+from src.memory.memory_system import memory_manager
 from src.utils.logger import logger
 from src.api.binance_api import BinanceConnector
 from src.api.paper_connector import PaperTradingConnector
@@ -165,6 +166,7 @@ class CoordinatorAgent(BaseAgent):
             
             await self._handle_action(result.get("action"))
             await self._set_triggers(result.get("next_triggers", []))
+            await self._remember(input_event, result)
             
             return result
             
@@ -199,6 +201,28 @@ class CoordinatorAgent(BaseAgent):
                 raise
         raise ValueError("Invalid JSON: No JSON object found")
 
+    @staticmethod
+    def _describe_event(event: Dict) -> str:
+        """触发事件的文本描述 (语义检索的查询)"""
+        return event.get("reason") or event.get("description") or json.dumps(event, ensure_ascii=False, default=str)
+
+    async def _remember(self, event: Dict, result: Dict):
+        """把本次决策写入记忆库: 交易为情景记忆 (永久保留)，其余为短期记忆"""
+        action = result.get("action") or {}
+        action_type = action.get("type", "WAIT")
+        params = action.get("params") or {}
+        content = f"[{action_type}] {self._describe_event(event)} -> {result.get('thought_process', '')}"
+        metadata = {"action": action_type, "tags": [action_type.lower()]}
+        symbol = params.get("symbol") or event.get("symbol")
+        if symbol:
+            metadata["symbol"] = symbol
+        try:
+            await asyncio.to_thread(memory_manager.add_memory, content,
+                                    "episodic" if action_type == "TRADE" else "short_term", 50 if action_type == "TRADE" else 0,
+                                    metadata)
+        except Exception as e:
+            logger.error(f"Failed to store decision memory: {e}")
+
     async def _build_context(self, event: Dict) -> Dict:
         """构建包含市场数据、持仓、记忆的完整上下文"""
         # 1. 获取基础数据 (Real Data)
@@ -220,8 +244,11 @@ class CoordinatorAgent(BaseAgent):
         if market_price == 0:
             market_price = event.get('current_price', 43000)
 
-        # 2. 获取记忆与触发器状态
-        memories = [m.content for m in db.get_recent_memories(limit=5)]
+        # 2. 获取记忆与触发器状态 (统一记忆库: 最近的记忆 + 与本次触发事件语义相关的记忆)
+        #    检索可能需要加载嵌入模型 / 等待后台嵌入，放到线程中执行
+        recent = await asyncio.to_thread(memory_manager.retrieve_recent, 5)
+        related = await asyncio.to_thread(memory_manager.retrieve_similar, self._describe_event(event), 5)
+        recent_ids = {m['id'] for m in recent}
         active_triggers = [
             f"{t.description} ({t.condition_data})" 
             for t in db.get_active_triggers()
@@ -232,7 +259,8 @@ class CoordinatorAgent(BaseAgent):
             "trigger_event": event,
             "market_snapshot": {"BTC": market_price},
             "active_triggers": active_triggers,
-            "recent_memories": memories,
+            "recent_memories": [m['content'] for m in recent],
+            "related_memories": [m['content'] for m in related if m['id'] not in recent_ids],
             "positions": positions
         }
         return context
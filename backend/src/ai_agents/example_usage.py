@@ -3,7 +3,7 @@ import os
 from src.ai_agents.base_agent import BaseAgent
 from src.ai_agents.communication import MessageType
 from src.database.models import DecisionLayer
-from src.utils.logger import logger
+from src.utils.logger import logger, setup_logger
 
 # 简单的Mock实现用于演示
 class MockMacroPlanner(BaseAgent):
@@ -64,4 +64,5 @@ async def main():
 
 if __name__ == "__main__":
     # 确保有API KEY或 mock
+    setup_logger()
     asyncio.run(main())
@@ -16,7 +16,7 @@ from src.ai_agents.sentiment_analyst import SentimentAnalystAgent
 from src.ai_agents.risk_assessor import RiskAssessorAgent
 from src.ai_agents.decision_maker import DecisionMakerAgent
 from src.ai_agents.agent_manager import agent_manager
-from src.utils.logger import logger
+from src.utils.logger import logger, setup_logger
 
 class WorkflowEngine:
     """
@@ -147,6 +147,7 @@ class WorkflowEngine:
 # 简单的测试运行
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    setup_logger()
     engine = WorkflowEngine()
     
     # Mock Data
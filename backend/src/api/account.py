@@ -1,10 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict
-from src.database.operations import db
+from typing import List, Dict, Optional
+import time
+from datetime import datetime
+from src.database.async_operations import async_db
+from src.database.equity import EquitySnapshotter
 from src.database.models import Position as TIMPosition
+from src.utils.lazy import LazyObject
 from pydantic import BaseModel
 
 router = APIRouter()
+snapshotter = LazyObject(EquitySnapshotter)
 
 # --- Response Models ---
 class PositionResponse(BaseModel):
@@ -29,6 +34,7 @@ class PerformanceResponse(BaseModel):
 class EquityPoint(BaseModel):
     date: str
     value: float
+    timestamp: Optional[int] = None  # 秒级时间戳
 
 class MarketTicker(BaseModel):
     symbol: str
@@ -41,38 +47,27 @@ class MarketTicker(BaseModel):
 
 @router.get("/balance", response_model=BalanceResponse)
 async def get_balance():
-    """从 DB 计算模拟账户余额"""
-    # 1. 获取所有持仓
-    positions = db.get_all_positions()
+    """从持仓 (内存镜像) 计算模拟账户余额"""
+    # 权益 = 初始资金 + 已实现盈亏 + 未实现盈亏 (首次访问 / 多进程模式下会读库，放到线程池)
+    state = await async_db.run(snapshotter.compute)
+    total_pnl = state["realized_pnl"] + state["unrealized_pnl"]
     
-    # 2. 计算当前 PnL 总和
-    total_pnl = sum([p.pnl for p in positions])
-    
-    # 3. 初始资金 (Paper Trading Default)
-    initial_balance = 10000.0
-    
-    # 4. 估算当前总资产 (注意：这只是一个近似值，更严格的做法是 Coordinator 将 Cash 写入 DB)
-    # 假设所有未持仓的钱都在 Cash 里
-    # Total Balance = Initial + Realized PnL (DB还没存) + Unrealized PnL
-    # 暂时简化: Total = Initial + Unrealized PnL
-    total_balance = initial_balance + total_pnl
-    
-    # 计算占用保证金 (简单假设全额现货)
-    used_margin = sum([p.amount * p.avg_price for p in positions])
-    available = total_balance - used_margin
+    # 今日盈亏: 对比当日第一条权益快照
+    day_open = await async_db.run(snapshotter.get_day_open_equity)
+    today_pnl = state["equity"] - day_open if day_open is not None else total_pnl
 
     return BalanceResponse(
-        total_balance=round(total_balance, 2),
-        available_balance=round(available, 2),
+        total_balance=round(state["equity"], 2),
+        available_balance=round(state["cash"], 2),
         currency="USDT",
-        today_pnl=round(total_pnl, 2), # 暂用 Total PnL 代替 Today
+        today_pnl=round(today_pnl, 2),
         total_pnl=round(total_pnl, 2)
     )
 
 @router.get("/positions", response_model=List[PositionResponse])
 async def get_positions():
     """从 DB 获取真实持仓"""
-    db_positions = db.get_all_positions()
+    db_positions = await async_db.get_all_positions()
     res = []
     for p in db_positions:
         # 过滤掉数量极小的尘埃
@@ -88,30 +83,34 @@ async def get_positions():
 
 @router.get("/performance", response_model=PerformanceResponse)
 async def get_performance():
-    """获取账户表现 (Placeholder)"""
+    """获取账户表现 (总盈亏 / 收益率 / 胜率)"""
+    perf = await async_db.run(snapshotter.get_performance)
     return PerformanceResponse(
-        total_pnl=1245.50,
-        pnl_percentage=12.45,
-        win_rate=68.5
+        total_pnl=round(perf["total_pnl"], 2),
+        pnl_percentage=round(perf["pnl_percentage"], 2),
+        win_rate=round(perf["win_rate"], 1)
     )
 
 @router.get("/equity-history", response_model=List[EquityPoint])
-async def get_equity_history():
+async def get_equity_history(days: int = 30, points: int = 200, start: Optional[int] = None, end: Optional[int] = None):
     """
-    返回资产历史曲线。
-    如果没有历史数据 (BalanceSnapshot 表不存在)，则返回当前余额作为一个点。
+    返回资产历史曲线 (来自 equity_snapshots 表，服务端降采样到 points 个点)
+    :param start/end: 秒级时间戳，未指定时取最近 days 天
     """
-    from datetime import datetime
-    
-    # 获取当前真实余额
-    balance_data = await get_balance()
-    current_equity = balance_data.total_balance
-    
-    # 暂时只返回一个当前点 (Real Data Start)
-    # 真正的历史需要定时任务每天快照写入 DB
-    return [
-        EquityPoint(date=datetime.now().strftime("%m-%d"), value=current_equity)
+    now = int(time.time())
+    if start is None:
+        start = now - days * 86400
+    curve = await async_db.run(snapshotter.get_curve, start, end, max(points, 3))
+
+    history = [
+        EquityPoint(date=datetime.fromtimestamp(int(ts)).strftime("%m-%d %H:%M"), value=round(float(v), 2), timestamp=int(ts))
+        for ts, v in zip(curve["ts"], curve["equity"])
     ]
+    if not history:
+        # 还没有快照时返回当前权益作为一个点
+        state = await async_db.run(snapshotter.compute)
+        history.append(EquityPoint(date=datetime.now().strftime("%m-%d %H:%M"), value=round(state["equity"], 2), timestamp=now))
+    return history
 
 @router.get("/market-summary", response_model=List[MarketTicker])
 async def get_market_summary():
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
 import json
-from src.database.operations import db
+from src.database.async_operations import async_db
 from src.database.models import DecisionLayer, TriggerStatus
+from src.database.retention import RetentionEngine
+from src.utils.lazy import LazyObject
 
 router = APIRouter()
+retention_engine = LazyObject(RetentionEngine)
 
 # --- Models ---
 class NodePosition(BaseModel):
@@ -46,6 +49,25 @@ class DecisionResponse(BaseModel):
     timestamp: datetime
     details: Dict[str, Any]
 
+class DecisionHistoryItem(BaseModel):
+    id: int
+    decision_type: str
+    layer: Optional[str] = None
+    confidence: Optional[float] = None
+    timestamp: datetime
+    archived: bool
+    input_data: Optional[Any] = None
+    output_recommendation: Optional[Any] = None
+
+class DecisionSearchResult(BaseModel):
+    id: int
+    decision_type: str
+    layer: Optional[str] = None
+    confidence: Optional[float] = None
+    timestamp: datetime
+    score: float  # 越小越相关
+    snippet: Optional[str] = None
+
 class ActiveTrigger(BaseModel):
     id: int
     description: str
@@ -113,11 +135,11 @@ async def get_node_statuses():
     2. Consultants: 默认为 Idle (被动调用)，除非最近 log 显示正在被咨询
     """
     # 获取最近一次决策
-    decisions = db.get_decisions(limit=1)
+    decisions = await async_db.get_decisions(limit=1)
     last_decision = decisions[0] if decisions else None
     
     # 获取活跃 Triggers
-    active_triggers = db.get_active_triggers()
+    active_triggers = await async_db.get_active_triggers()
     
     # Coordinator Status
     coord_status = "idle"
@@ -146,40 +168,122 @@ async def get_node_statuses():
     return statuses
 
 @router.get("/decisions", response_model=List[DecisionResponse])
-async def get_ai_decisions(limit: int = 20):
-    """获取真实 AI 决策历史 (From DB)"""
-    db_decisions = db.get_decisions(limit=limit)
-    response = []
-    
-    for d in db_decisions:
+async def get_ai_decisions(
+    response: Response,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    decision_type: Optional[str] = None,
+    include_details: bool = False,
+):
+    """
+    获取真实 AI 决策历史 (From DB)
+    - 游标分页: 下一页游标通过响应头 X-Next-Cursor 返回，作为 cursor 参数传回即可
+    - 默认只返回摘要 (details 仅含 technical_summary)，完整内容见 /decisions/{id} 或 include_details=true
+    """
+    try:
+        rows, next_cursor = await async_db.get_decisions_page(
+            limit=limit, cursor=cursor, decision_type=decision_type, include_details=include_details
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    result = []
+    for d in rows:
         # Parse JSON fields safely
         try:
-            output = d.output_recommendation
-            if isinstance(output, str):
-                output = json.loads(output)
+            if include_details:
+                output = d.output_recommendation
+                if isinstance(output, str):
+                    output = json.loads(output)
+                output = output or {}
+                action = (output.get('action') or {}).get('type', "UNKNOWN")
+                reason = output.get('reasoning', "No reasoning provided")
+                details = output
+            else:
+                action = d.action or "UNKNOWN"
+                reason = d.reasoning or "No reasoning provided"
+                details = {"technical_summary": d.technical_summary} if d.technical_summary else {}
             
-            action_data = output.get('action', {})
-            decision_type = d.decision_type
-            action = action_data.get('type', "UNKNOWN")
-            reason = output.get('reasoning', "No reasoning provided")
-            
-            # Extract confidence if available
-            confidence = d.confidence
-            
-            response.append(DecisionResponse(
+            result.append(DecisionResponse(
                 id=d.id,
-                decision_type=decision_type,
+                decision_type=d.decision_type,
                 symbol="BTCUSDT", # TODO: store per row
                 action=action,
                 reason=reason,
-                confidence=confidence,
+                confidence=d.confidence,
                 timestamp=d.timestamp,
-                details=output
+                details=details
             ))
         except Exception as e:
             print(f"Error parsing decision {d.id}: {e}")
             
-    return response
+    return result
+
+@router.get("/decisions/history", response_model=List[DecisionHistoryItem])
+async def get_decision_history(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    decision_type: Optional[str] = None,
+    limit: int = 100,
+):
+    """历史决策查询 (合并数据库热数据与归档文件)"""
+    rows = await async_db.run(
+        retention_engine.query_decisions, start=start, end=end, decision_type=decision_type, limit=limit
+    )
+    return [DecisionHistoryItem(**row) for row in rows]
+
+@router.get("/decisions/{decision_id}", response_model=DecisionHistoryItem)
+async def get_ai_decision(decision_id: int):
+    """获取单条决策的完整内容 (input_data / output_recommendation)"""
+    d = await async_db.get_decision(decision_id)
+    if d is None:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    return DecisionHistoryItem(
+        id=d.id,
+        decision_type=d.decision_type,
+        layer=d.layer.value if hasattr(d.layer, "value") else d.layer,
+        confidence=d.confidence,
+        timestamp=d.timestamp,
+        archived=False,
+        input_data=d.input_data,
+        output_recommendation=d.output_recommendation,
+    )
+
+@router.get("/search", response_model=List[DecisionSearchResult])
+async def search_ai_decisions(
+    response: Response,
+    q: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    decision_type: Optional[str] = None,
+):
+    """
+    全文检索 AI 决策 (推理 / 思考过程 / 新闻标题)，按相关度排序
+    - 多个词之间为 AND，例如 q=ETF approval
+    - 游标分页: 下一页游标通过响应头 X-Next-Cursor 返回
+    """
+    try:
+        rows, next_cursor = await async_db.search_decisions(
+            q, limit=limit, cursor=cursor, decision_type=decision_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [
+        DecisionSearchResult(
+            id=r.id,
+            decision_type=r.decision_type,
+            layer=r.layer,
+            confidence=r.confidence,
+            timestamp=r.timestamp,
+            score=r.score,
+            snippet=r.snippet,
+        )
+        for r in rows
+    ]
 
 @router.post("/analyze")
 async def trigger_manual_analysis():
@@ -194,7 +298,7 @@ async def trigger_manual_analysis():
         "trigger_type": "MANUAL",
         "condition_data": {"operator": "IMMEDIATE", "value": 0}
     }
-    trigger_id = db.add_trigger(trigger_data)
+    trigger_id = await async_db.add_trigger(trigger_data)
     
     if trigger_id == -1:
          # Handle error case (logs usually capture it)
@@ -205,7 +309,7 @@ async def trigger_manual_analysis():
 @router.get("/triggers", response_model=List[ActiveTrigger])
 async def get_active_triggers():
     """获取当前所有活跃的 Watchdog 触发器"""
-    triggers = db.get_active_triggers()
+    triggers = await async_db.get_active_triggers()
     res = []
     for t in triggers:
         try:
@@ -1,6 +1,3 @@
-from binance.client import Client
-from binance.exceptions import BinanceAPIException, BinanceOrderException
-import pandas as pd
 import time
 import os
 import yaml
@@ -8,6 +5,12 @@ from functools import wraps
 from typing import Dict, List, Optional, Any
 
 from src.utils.logger import logger
+from src.utils.lazy import lazy_import
+
+# python-binance (dateparser) 与 pandas 导入较慢，首次使用时才加载
+binance_client = lazy_import("binance.client")
+binance_exceptions = lazy_import("binance.exceptions")
+pd = lazy_import("pandas")
 
 # 加载配置
 CONFIG_PATH = os.path.join(os.getcwd(), "config", "config.yaml")
@@ -27,7 +30,7 @@ def retry(max_retries=3, delay=1):
             while retries < max_retries:
                 try:
                     return func(*args, **kwargs)
-                except (BinanceAPIException, BinanceOrderException) as e:
+                except (binance_exceptions.BinanceAPIException, binance_exceptions.BinanceOrderException) as e:
                     logger.warning(f"Binance API error in {func.__name__}: {e}. Retrying {retries + 1}/{max_retries}...")
                     retries += 1
                     time.sleep(delay)
@@ -77,7 +80,7 @@ class BinanceConnector:
 
         try:
             # 传递 requests_params 以支持代理
-            self.client = Client(
+            self.client = binance_client.Client(
                 self.api_key, 
                 self.api_secret, 
                 testnet=self.use_testnet,
@@ -116,7 +119,7 @@ class BinanceConnector:
         return positions
 
     @retry()
-    def get_kline_data(self, symbol: str, interval: str, limit: int = 100) -> pd.DataFrame:
+    def get_kline_data(self, symbol: str, interval: str, limit: int = 100) -> "pd.DataFrame":
         """获取K线数据"""
         klines = self.client.get_klines(symbol=symbol, interval=interval, limit=limit)
         df = pd.DataFrame(klines, columns=[
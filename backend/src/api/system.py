@@ -5,7 +5,7 @@ from datetime import datetime
 
 router = APIRouter()
 
-from src.database.operations import db
+from src.database.async_operations import async_db
 
 # --- Models ---
 class SystemStatus(BaseModel):
@@ -20,8 +20,8 @@ class SystemStatus(BaseModel):
 @router.get("/status", response_model=SystemStatus)
 async def get_system_status():
     """获取系统当前运行状态 (From DB)"""
-    status = db.get_config("system_status", "STOPPED")
-    last_heartbeat = db.get_config("system_heartbeat", "")
+    status = await async_db.get_config("system_status", "STOPPED")
+    last_heartbeat = await async_db.get_config("system_heartbeat", "")
     
     # Calculate crude uptime or liveliness
     msg = "System is offline"
@@ -39,17 +39,17 @@ async def get_system_status():
 @router.post("/start")
 async def start_system():
     """启动自动交易系统"""
-    db.set_config("system_status", "RUNNING")
+    await async_db.set_config("system_status", "RUNNING")
     return {"message": "System start command sent.", "status": "RUNNING"}
 
 @router.post("/stop")
 async def stop_system():
     """停止自动交易系统"""
-    db.set_config("system_status", "STOPPED")
+    await async_db.set_config("system_status", "STOPPED")
     return {"message": "System stop command sent.", "status": "STOPPED"}
 
 @router.get("/config")
 async def get_config():
     """获取当前系统配置"""
-    mode = db.get_config("trading_mode", "PAPER")
+    mode = await async_db.get_config("trading_mode", "PAPER")
     return {"mode": mode}
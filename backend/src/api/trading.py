@@ -1,8 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
-from src.database.operations import db
+from src.database.async_operations import async_db
 
 router = APIRouter()
 
@@ -31,10 +31,18 @@ class OrderResponse(BaseModel):
 # --- Routes ---
 
 @router.get("/history", response_model=List[TradeResponse])
-async def get_trade_history(limit: int = 50):
-    """获取历史成交记录"""
+async def get_trade_history(response: Response, limit: int = 50, cursor: Optional[str] = None, symbol: Optional[str] = None):
+    """
+    获取历史成交记录
+    游标分页: 下一页游标通过响应头 X-Next-Cursor 返回，作为 cursor 参数传回即可
+    """
     try:
-        trades = db.get_trades(limit=limit)
+        trades, next_cursor = await async_db.get_trades_page(limit=limit, cursor=cursor, symbol=symbol)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return [
             TradeResponse(
                 id=t.id,
@@ -43,7 +51,7 @@ async def get_trade_history(limit: int = 50):
                 amount=t.quantity,
                 price=t.price,
                 timestamp=t.timestamp,
-                pnl=getattr(t, 'pnl', None)
+                pnl=t.realized_pnl
             ) for t in trades
         ]
     except Exception as e:
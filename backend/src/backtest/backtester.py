@@ -36,6 +36,27 @@ class Backtester:
         """
         self.data_feed = data
 
+    def load_from_klines(self, symbol: str, interval: str = "1h", start: int = None, end: int = None):
+        """
+        从本地 klines 表加载回测数据 (无需重新从交易所下载)
+        :param start/end: 开盘时间范围 (毫秒)
+        """
+        from src.database.operations import db
+        klines = db.get_klines(symbol, interval, start=start, end=end)
+        self.data_feed = [
+            {
+                "timestamp": datetime.utcfromtimestamp(ot / 1000),
+                "symbol": symbol,
+                "price": close,
+                "ohlcv": {"open": o, "high": h, "low": l, "close": close, "volume": v},
+            }
+            for ot, o, h, l, close, v in zip(
+                klines["open_time"].tolist(), klines["open"].tolist(), klines["high"].tolist(),
+                klines["low"].tolist(), klines["close"].tolist(), klines["volume"].tolist()
+            )
+        ]
+        logger.info(f"Loaded {len(self.data_feed)} {interval} klines for {symbol} from local history.")
+
     async def run(self):
         logger.info(f"Starting Backtest with {len(self.data_feed)} data points...")
         
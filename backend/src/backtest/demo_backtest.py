@@ -4,6 +4,7 @@ import pandas as pd
 import os
 from datetime import datetime, timedelta
 from src.backtest.backtester import Backtester
+from src.utils.logger import setup_logger
 
 # Mock Strategy: Buy if price < 45000, Sell if price > 55000
 async def simple_mean_reversion_strategy(market_data, positions):
@@ -73,4 +74,5 @@ async def run_demo():
 
 if __name__ == "__main__":
     os.makedirs("data/logs", exist_ok=True)
+    setup_logger()
     asyncio.run(run_demo())
@@ -1,11 +1,19 @@
-from .market_collector import MarketDataCollector
-from .news_collector import NewsCollector
-from .onchain_collector import OnChainCollector
-from .indicators import TechnicalIndicators
-
-__all__ = [
-    "MarketDataCollector",
-    "NewsCollector",
-    "OnChainCollector",
-    "TechnicalIndicators"
-]
+import importlib
+
+# 按需导入 (PEP 562): 运行单个采集器时不加载其他采集器的依赖 (pandas / python-binance)
+_EXPORTS = {
+    "MarketDataCollector": ".market_collector",
+    "NewsCollector": ".news_collector",
+    "OnChainCollector": ".onchain_collector",
+    "TechnicalIndicators": ".indicators",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
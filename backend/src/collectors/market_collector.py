@@ -5,7 +5,14 @@ from datetime import datetime, timezone
 from src.api.binance_api import BinanceConnector
 from src.database.operations import db, DatabaseManager
 from src.collectors.indicators import TechnicalIndicators
-from src.utils.logger import logger
+from src.utils.logger import logger, setup_logger
+
+# K线周期对应的毫秒数 (用于判断本地K线是否过期)
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
 
 class MarketDataCollector:
     """市场数据采集器"""
@@ -35,13 +42,14 @@ class MarketDataCollector:
                 logger.error(f"Error fetching price for {symbol}: {e}")
 
     def fetch_and_process_klines(self, interval: str = "1h"):
-        """获取K线数据并计算指标，然后更新数据库或缓存"""
-        # 注意: 实际项目中可能需要更复杂的存储策略 (如存储到时序数据库或 CSV)
-        # 这里仅演示获取并计算流程
+        """获取K线数据并计算指标，K线写入本地 klines 表"""
         for symbol in self.symbols:
             try:
                 # 获取数据
                 df = self.api.get_kline_data(symbol, interval, limit=100)
+
+                # 写入本地K线历史 (幂等，重复K线会被覆盖)
+                self.db.upsert_klines(symbol, interval, self.klines_to_rows(df))
                 
                 # 计算指标
                 df = TechnicalIndicators.get_all_indicators(df)
@@ -52,12 +60,54 @@ class MarketDataCollector:
                 # 记录主要指标状态 (假设这里我们只关心最新的)
                 logger.info(f"Analysis for {symbol} ({interval}): Price={latest['close']}, RSI={latest['RSI']}, MACD={latest['MACD']}")
                 
-                # 这里可以扩展将完整的 K 线数据存入数据库的逻辑
-                # 但考虑到 SQL 性能，通常只存最新的分析结果或使用专门的时序库
-                
             except Exception as e:
                 logger.error(f"Error processing klines for {symbol}: {e}")
 
+    def load_klines(self, symbol: str, interval: str = "1h", limit: int = 100) -> dict:
+        """
+        优先从本地 klines 表读取最近 N 根K线 (NumPy 数组)，
+        仅当本地数据不足或已过期时，向交易所补齐缺失部分。
+        """
+        local = self.db.get_klines(symbol, interval, limit=limit)
+        count = len(local["open_time"])
+        step = INTERVAL_MS.get(interval)
+        now_ms = int(time.time() * 1000)
+
+        if count < limit or step is None:
+            missing = limit
+        else:
+            missing = min(limit, int((now_ms - local["open_time"][-1]) // step))
+
+        if missing > 0:
+            # 多取一根以覆盖本地未收盘的最后一根K线
+            df = self.api.get_kline_data(symbol, interval, limit=min(limit, missing + 1))
+            self.db.upsert_klines(symbol, interval, self.klines_to_rows(df))
+            local = self.db.get_klines(symbol, interval, limit=limit)
+        return local
+
+    @staticmethod
+    def klines_to_rows(df: pd.DataFrame) -> list:
+        """将 BinanceConnector.get_kline_data 的 DataFrame 转为 klines 表记录"""
+        if df is None or df.empty:
+            return []
+        open_time = df['timestamp']
+        if pd.api.types.is_datetime64_any_dtype(open_time):
+            open_time = open_time.astype('int64') // 1_000_000  # ns -> ms
+        return [
+            {
+                "open_time": int(ot),
+                "open": float(o), "high": float(h), "low": float(l), "close": float(c),
+                "volume": float(v),
+                "close_time": int(ct),
+                "quote_volume": float(qv),
+                "trades": int(n),
+            }
+            for ot, o, h, l, c, v, ct, qv, n in zip(
+                open_time, df['open'], df['high'], df['low'], df['close'], df['volume'],
+                df['close_time'], df['quote_asset_volume'], df['number_of_trades']
+            )
+        ]
+
     def start(self, interval_seconds: int = 60):
         """启动定时采集任务"""
         logger.info("Starting market data collection loop...")
@@ -73,5 +123,6 @@ class MarketDataCollector:
             time.sleep(1)
 
 if __name__ == "__main__":
+    setup_logger()
     collector = MarketDataCollector()
     collector.fetch_current_price() # 单次运行测试
@@ -1,12 +1,11 @@
 import feedparser
 import time
 from datetime import datetime
-import pandas as pd
 from typing import List, Dict
 import re
 
 from src.database.operations import db, DatabaseManager
-from src.utils.logger import logger
+from src.utils.logger import logger, setup_logger
 
 class NewsCollector:
     """新闻情绪采集器"""
@@ -48,6 +47,7 @@ class NewsCollector:
             try:
                 feed = feedparser.parse(url)
                 logger.info(f"Fetched {len(feed.entries)} entries from {source}")
+                news_events = []
                 
                 for entry in feed.entries[:limit]:
                     title = entry.title
@@ -69,8 +69,8 @@ class NewsCollector:
                     }
                     
                     # 存入 memory 表作为短期信息? 或者单独的 News 表
-                    # 这里演示存入 Memory
-                    self.db.log_decision({ # 借用 decision 表记录一下重要新闻，或者直接存 Memory
+                    # 借用 decision 表记录一下重要新闻，整个 feed 汇总后一次批量写入
+                    news_events.append({
                         'decision_type': 'NEWS_EVENT',
                         'layer': 'ANALYSIS',
                         'input_data': {'source': source, 'title': title}, 
@@ -79,6 +79,8 @@ class NewsCollector:
                     })
                     
                     all_news.append(news_item)
+
+                self.db.log_decisions(news_events)
                     
             except Exception as e:
                 logger.error(f"Error fetching news from {source}: {e}")
@@ -86,6 +88,7 @@ class NewsCollector:
         return all_news
 
 if __name__ == "__main__":
+    setup_logger()
     collector = NewsCollector()
     news = collector.fetch_latest_news()
     for n in news:
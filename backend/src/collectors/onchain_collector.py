@@ -2,7 +2,7 @@ import requests
 from datetime import datetime
 from typing import Dict, Any
 
-from src.utils.logger import logger
+from src.utils.logger import logger, setup_logger
 
 class OnChainCollector:
     """链上数据采集器"""
@@ -40,5 +40,6 @@ class OnChainCollector:
         }
 
 if __name__ == "__main__":
+    setup_logger()
     collector = OnChainCollector()
     print(collector.get_exchange_flows())
@@ -1,6 +1,6 @@
 import os
 from src.config.strategy_config import StrategyConfig
-from src.utils.logger import logger
+from src.utils.logger import logger, setup_logger
 
 def run_demo():
     print("=== Strategy Configuration Demo ===")
@@ -41,4 +41,5 @@ def run_demo():
 
 if __name__ == "__main__":
     os.makedirs("data/logs", exist_ok=True)
+    setup_logger()
     run_demo()
@@ -3,7 +3,10 @@ from .models import (
     Position, 
     Trade, 
     MarketData, 
+    Kline, 
+    EquitySnapshot, 
     AIDecision, 
+    DecisionBlob, 
     AICommunication, 
     Memory, 
     Config,
@@ -13,13 +16,17 @@ from .models import (
     MemoryType
 )
 from .operations import DatabaseManager, db
+from .async_operations import AsyncDatabaseManager, async_db
 
 __all__ = [
     "Base", 
     "Position", 
     "Trade", 
     "MarketData", 
+    "Kline", 
+    "EquitySnapshot", 
     "AIDecision", 
+    "DecisionBlob", 
     "AICommunication", 
     "Memory", 
     "Config",
@@ -28,5 +35,7 @@ __all__ = [
     "DecisionLayer", 
     "MemoryType",
     "DatabaseManager", 
-    "db"
+    "db",
+    "AsyncDatabaseManager",
+    "async_db"
 ]
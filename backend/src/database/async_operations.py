@@ -0,0 +1,67 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.database.operations import DatabaseManager, db
+from src.database.engine import load_database_config
+from src.utils.logger import logger
+
+
+class AsyncDatabaseManager:
+    """
+    DatabaseManager 的异步版本
+
+    所有 db.* 方法都是同步的 (SQLAlchemy + sqlite3)，直接在 async handler 里调用会阻塞事件循环。
+    这里将调用转发到专用线程池执行，线程数即最大并发查询数，
+    慢查询只会占用 DB 线程，不影响 API 响应和 Watchdog tick 处理。
+
+    用法与同步版一致，只需 await:
+        positions = await async_db.get_all_positions()
+    """
+
+    def __init__(self, manager: Optional[DatabaseManager] = None, max_workers: Optional[int] = None):
+        self.manager = manager if manager is not None else db
+        if max_workers is None:
+            max_workers = load_database_config().get('async', {}).get('max_workers', 4)
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db-worker")
+            logger.info(f"Async database executor started with {self.max_workers} workers.")
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """在 DB 线程池中执行任意同步函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def get_config(self, key: str, default: Any = None) -> Any:
+        """配置读取: 缓存在检查间隔内时直接返回 (纯内存)，否则到线程池做版本检查"""
+        cache = self.manager.config_cache
+        if cache.fresh():
+            return cache.get(key, default)
+        return await self.run(self.manager.get_config, key, default)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.manager, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        return wrapper
+
+    def close(self):
+        """关闭线程池 (等待进行中的查询完成)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# 全局异步数据库实例
+async_db = AsyncDatabaseManager()
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Container, Dict, Any, Iterable, Optional, Sequence, Set, Tuple, Union
+
+from sqlalchemy import select, delete
+
+from src.database.models import DecisionBlob
+from src.utils.logger import logger
+
+try:  # zstd 可选: 安装 zstandard 后自动启用，否则使用 zlib
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BLOB_KEY = "$blob"
+MIN_CHUNK_BYTES = 256   # 小于该大小的值保留在行内
+MAX_DEPTH = 3           # 向下拆分的最大嵌套层数
+CACHE_SIZE = 1024       # 已解压分块的 LRU 缓存条数
+
+
+def _dumps(value: Any) -> bytes:
+    # sort_keys 保证相同内容得到相同的哈希
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _is_ref(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and BLOB_KEY in value
+
+
+class BlobStore:
+    """
+    内容寻址的分块存储 (决策上下文去重 + 压缩)
+
+    写入时递归拆分 JSON: 字典逐层展开 (最多 MAX_DEPTH 层)，序列化后不小于 MIN_CHUNK_BYTES 的
+    叶子值 (列表 / 长字符串 / 最深层字典) 以 sha256 为键压缩存入 decision_blobs 表，
+    原位置替换为 {"$blob": hash}。相邻两次决策中未变化的部分 (持仓、记忆、触发器…) 只存一份。
+    读取时按占位符还原，结果与写入前完全一致。
+
+    分块不会嵌套引用其他分块，因此回收 (sweep) 只需知道决策行引用了哪些分块 (见 BlobReferences)。
+    """
+
+    def __init__(self, manager, protected_keys: Iterable[Union[str, Sequence[str]]] = ()):
+        self.manager = manager
+        # 这些键 (顶层键名或嵌套路径元组) 始终保留在行内 (列表接口直接在 SQL 中用 JSON_EXTRACT 读取)
+        self.protected_paths = {(key,) if isinstance(key, str) else tuple(key) for key in protected_keys}
+        self._protected_prefixes = {path[:i] for path in self.protected_paths for i in range(1, len(path))}
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self._lock = threading.Lock()
+        self._known: Set[str] = set()   # 本进程已确认写入的分块，跳过重复 upsert
+        # 缓存解压后的 JSON 字节而不是对象: 每次读取重新解析，调用方修改返回的载荷不会影响缓存
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+
+    # --- Codec ---
+    def _compress(self, raw: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(raw)
+        return zlib.compress(raw, 6)
+
+    @staticmethod
+    def _decompress(codec: str, data: bytes) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Blob was stored with zstd but the zstandard package is not installed")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    # --- Split ---
+    def split(self, payload: Any) -> Tuple[Any, Dict[str, bytes]]:
+        """
+        拆分载荷
+        :return: (带占位符的骨架, {hash: 原始 JSON 字节})
+        """
+        chunks: Dict[str, bytes] = {}
+        if not isinstance(payload, dict):
+            return payload, chunks
+        skeleton = {key: self._split_value(value, (key,), chunks) for key, value in payload.items()}
+        return skeleton, chunks
+
+    def _split_value(self, value: Any, path: Tuple[str, ...], chunks: Dict[str, bytes]) -> Any:
+        if path in self.protected_paths:
+            return value
+        if isinstance(value, dict) and (len(path) < MAX_DEPTH or path in self._protected_prefixes):
+            return {k: self._split_value(v, path + (k,), chunks) for k, v in value.items()}
+        if not isinstance(value, (dict, list, str)):
+            return value
+        raw = _dumps(value)
+        if len(raw) < MIN_CHUNK_BYTES:
+            return value
+        digest = hashlib.sha256(raw).hexdigest()
+        chunks[digest] = raw
+        return {BLOB_KEY: digest}
+
+    def put(self, chunks: Dict[str, bytes]):
+        """写入新分块 (已存在的只刷新 last_seen，供回收判断)"""
+        with self._lock:
+            new = {h: raw for h, raw in chunks.items() if h not in self._known}
+        if not new:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {"hash": h, "codec": self.codec, "size": len(raw), "data": self._compress(raw), "last_seen": now}
+            for h, raw in new.items()
+        ]
+        stmt = self.manager._upsert_stmt(DecisionBlob, ["hash"], ["last_seen"])
+        with self.manager.get_session() as session:
+            session.execute(stmt, rows)
+        with self._lock:
+            self._known.update(new)
+
+    def pack(self, payload: Any) -> Any:
+        """拆分并写入分块，返回可直接入库的骨架"""
+        skeleton, chunks = self.split(payload)
+        if chunks:
+            self.put(chunks)
+        return skeleton
+
+    # --- Join ---
+    def unpack(self, skeleton: Any) -> Any:
+        """按占位符还原完整载荷"""
+        refs = set(self._collect_refs(skeleton))
+        if not refs:
+            return skeleton
+        values = self._load(refs)
+        return self._join(skeleton, values)
+
+    def _join(self, value: Any, values: Dict[str, bytes]) -> Any:
+        if _is_ref(value):
+            return json.loads(values[value[BLOB_KEY]])
+        if isinstance(value, dict):
+            return {k: self._join(v, values) for k, v in value.items()}
+        return value
+
+    def refs(self, *skeletons: Any) -> Tuple[str, ...]:
+        """骨架中引用的分块 (去重)"""
+        return tuple({h for skeleton in skeletons for h in self._collect_refs(skeleton)})
+
+    def _collect_refs(self, value: Any):
+        if _is_ref(value):
+            yield value[BLOB_KEY]
+        elif isinstance(value, dict):
+            for v in value.values():
+                yield from self._collect_refs(v)
+
+    def _load(self, refs: Set[str]) -> Dict[str, bytes]:
+        """分块的原始 JSON 字节 (先查 LRU 缓存)"""
+        values: Dict[str, bytes] = {}
+        with self._lock:
+            for h in refs:
+                if h in self._cache:
+                    self._cache.move_to_end(h)
+                    values[h] = self._cache[h]
+        missing = refs - values.keys()
+        if missing:
+            query = select(DecisionBlob.hash, DecisionBlob.codec, DecisionBlob.data).where(DecisionBlob.hash.in_(missing))
+            with self.manager.get_session() as session:
+                rows = session.execute(query).all()
+            with self._lock:
+                for h, codec, data in rows:
+                    values[h] = self._decompress(codec, data)
+                    # 不加入 _known: 只读到的分块仍需在下次引用时刷新 last_seen
+                    self._cache[h] = values[h]
+                while len(self._cache) > CACHE_SIZE:
+                    self._cache.popitem(last=False)
+            lost = missing - values.keys()
+            if lost:
+                raise KeyError(f"Missing decision blobs: {sorted(lost)}")
+        return values
+
+    # --- GC ---
+    def sweep(self, live: Container[str], started_at: datetime, suspects: Optional[Iterable[str]] = None) -> int:
+        """
+        删除不再被引用的分块
+        :param live: 当前库内决策引用的分块 (调用方在 started_at 之后统计，如 BlobReferences)
+        :param started_at: 回收开始时间；此后被写入/引用的分块 (last_seen 更新) 一律保留
+        :param suspects: 只检查这些分块 (如上次回收后引用归零的分块)；None 时检查全部
+        """
+        query = select(DecisionBlob.hash).where(DecisionBlob.last_seen < started_at)
+        with self.manager.get_session() as session:
+            if suspects is None:
+                candidates = [h for h in session.execute(query).scalars() if h not in live]
+            else:
+                suspects = [h for h in suspects if h not in live]
+                candidates = [h for i in range(0, len(suspects), 500) for h in session.execute(
+                    query.where(DecisionBlob.hash.in_(suspects[i:i + 500]))).scalars()]
+            for i in range(0, len(candidates), 500):
+                session.execute(delete(DecisionBlob).where(
+                    DecisionBlob.hash.in_(candidates[i:i + 500]),
+                    DecisionBlob.last_seen < started_at,
+                ))
+        with self._lock:
+            self._known.difference_update(candidates)
+            for h in candidates:
+                self._cache.pop(h, None)
+        if candidates:
+            logger.info(f"Blob store: removed {len(candidates)} unreferenced chunks.")
+        return len(candidates)
+
+    def reset_known(self):
+        """回收开始前调用: 之后的写入都会重新 upsert，刷新 last_seen"""
+        with self._lock:
+            self._known.clear()
+
+
+class BlobReferences:
+    """
+    按行 ID 增量维护的分块引用计数
+
+    回收时只需读取上次之后新增行的骨架 (ID 大于 max_id)，被删除的行通过对比现存 ID 扣减，
+    不必每轮重新解析全部骨架。行写入后骨架不再修改。引用归零的分块记入 released，
+    作为下一轮回收的候选；full_scan 为 True 时 (首次回收) 检查全部分块，清理此前遗留的孤立分块。
+    """
+
+    def __init__(self):
+        self.max_id = 0
+        self.full_scan = True
+        self._rows: Dict[int, Tuple[str, ...]] = {}
+        self._counts: Counter = Counter()
+        self._released: Set[str] = set()
+
+    def __contains__(self, digest: str) -> bool:
+        return self._counts.get(digest, 0) > 0
+
+    def add(self, row_id: int, refs: Tuple[str, ...]):
+        if refs:
+            self._rows[row_id] = refs
+            self._counts.update(refs)
+        self.max_id = max(self.max_id, row_id)
+
+    def retain(self, live_ids: Set[int]):
+        """扣减已删除行的引用"""
+        for row_id in [i for i in self._rows if i not in live_ids]:
+            refs = self._rows.pop(row_id)
+            self._counts.subtract(refs)
+            self._released.update(h for h in refs if self._counts[h] <= 0)
+        self._counts = +self._counts
+
+    def take_released(self) -> Set[str]:
+        released, self._released = self._released, set()
+        return released
+
+    def reset(self):
+        self.max_id = 0
+        self.full_scan = True
+        self._rows.clear()
+        self._counts.clear()
+        self._released.clear()
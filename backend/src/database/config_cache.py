@@ -0,0 +1,96 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, func
+
+from src.database.models import Config
+from src.database.engine import load_database_config
+from src.utils.logger import logger
+
+# 版本检查的最小间隔 (毫秒)，间隔内的读取直接返回内存中的值
+DEFAULT_CHECK_INTERVAL_MS = 1000
+
+
+class ConfigCache:
+    """
+    config 表的读穿透缓存
+
+    - 读取: 全表 (通常几十行) 常驻内存，读取即字典查找；距上次检查超过 check_interval 时
+      先用 (行数, 最大 update_time) 做一次版本比对，其他进程修改过才重新加载
+    - 写入: 直接写库 (upsert)，提交成功后在同一事务中重新加载，缓存与数据库保持一致；
+      值未变化时跳过写入 (心跳等高频写)
+    """
+
+    def __init__(self, manager, check_interval_ms: Optional[int] = None):
+        self.manager = manager
+        if check_interval_ms is None:
+            cfg = load_database_config().get('config_cache', {}) or {}
+            check_interval_ms = cfg.get('check_interval_ms', DEFAULT_CHECK_INTERVAL_MS)
+        self.check_interval = check_interval_ms / 1000.0
+        self._lock = threading.Lock()
+        self._values: Optional[Dict[str, str]] = None
+        self._version = None
+        self._checked_at = 0.0
+
+    # --- Loading ---
+    @staticmethod
+    def _read_version(session):
+        return tuple(session.execute(select(func.count(Config.id), func.max(Config.update_time))).one())
+
+    @staticmethod
+    def _read_all(session) -> Dict[str, str]:
+        return dict(session.execute(select(Config.config_key, Config.config_value)).all())
+
+    def _sync(self, force: bool = False):
+        """按需做版本检查 (调用方持有锁)"""
+        now = time.monotonic()
+        if not force and self._values is not None and now - self._checked_at < self.check_interval:
+            return
+        with self.manager.get_session() as session:
+            version = self._read_version(session)
+            if self._values is None or version != self._version:
+                self._values, self._version = self._read_all(session), version
+                logger.debug(f"Config cache loaded ({len(self._values)} keys)")
+        self._checked_at = now
+
+    def fresh(self) -> bool:
+        """缓存在检查间隔内 (读取不会访问数据库)"""
+        return self._values is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    def invalidate(self):
+        with self._lock:
+            self._values = None
+
+    # --- Reads ---
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            self._sync()
+            return self._values.get(key, default)
+
+    def get_all(self) -> Dict[str, str]:
+        with self._lock:
+            self._sync()
+            return dict(self._values)
+
+    # --- Writes ---
+    def set(self, key: str, value: str) -> bool:
+        """
+        写入配置 (持久化后再更新缓存)
+        :return: 是否实际写库 (值未变化时为 False)
+        """
+        value = str(value)
+        with self._lock:
+            # 强制版本检查: 其他进程可能刚改过该键，不能只凭本地缓存判断是否未变
+            self._sync(force=True)
+            if self._values.get(key) == value:
+                return False
+            stmt = self.manager._upsert_stmt(Config, ["config_key"], ["config_value", "update_time"])
+            with self.manager.get_session() as session:
+                session.execute(stmt, [{"config_key": key, "config_value": value, "update_time": datetime.utcnow()}])
+                values, version = self._read_all(session), self._read_version(session)
+            # 提交成功后才更新缓存
+            self._values, self._version = values, version
+            self._checked_at = time.monotonic()
+            return True
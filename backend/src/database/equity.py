@@ -0,0 +1,149 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from src.database.operations import DatabaseManager, db
+from src.database.engine import load_database_config, load_config_section
+from src.utils.logger import logger
+
+DEFAULT_SNAPSHOT_INTERVAL = 60  # 秒
+# 除基础周期外额外维护的粗粒度分辨率 (1h / 1d)
+ROLLUP_RESOLUTIONS = (3600, 86400)
+# 单次曲线查询最多读取的行数 (超过则改用更粗的分辨率)，读出后由 LTTB 精选
+MAX_CURVE_ROWS = 5000
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样
+    保留曲线的视觉形状 (尖峰 / 回撤)，返回被选中点的下标
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # 首尾固定，中间 n - 2 个点均分为 n_out - 2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # 下一个桶的平均点 (最后一个桶用终点)
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # 三角形面积 (省略常数 1/2)
+        area = np.abs(
+            (x[prev] - avg_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y - y[prev])
+        )
+        prev = lo + int(area.argmax())
+        selected[i + 1] = prev
+    return selected
+
+
+class EquitySnapshotter:
+    """
+    账户权益快照器
+
+    按固定周期将 权益 / 现金 / 持仓市值 / 未实现与已实现盈亏 写入 equity_snapshots 表。
+    每条快照同时写入基础周期与 1h / 1d 分辨率 (桶内保留最后一条)，查询时选择行数不超过
+    MAX_CURVE_ROWS 的最细分辨率做主键范围读取，再用 LTTB 降到图表需要的点数。
+    """
+
+    def __init__(self, manager: Optional[DatabaseManager] = None, interval_seconds: Optional[int] = None,
+                 initial_balance: Optional[float] = None):
+        self.manager = manager if manager is not None else db
+        cfg = load_database_config().get('equity_snapshots', {}) or {}
+        self.interval = int(interval_seconds or cfg.get('interval_seconds', DEFAULT_SNAPSHOT_INTERVAL))
+        if initial_balance is None:
+            initial_balance = load_config_section('trading').get('initial_balance', 10000.0)
+        self.initial_balance = float(initial_balance)
+        self.resolutions = [self.interval] + [r for r in ROLLUP_RESOLUTIONS if r > self.interval]
+
+    # --- Snapshot ---
+    def compute(self) -> Dict[str, float]:
+        """
+        根据当前持仓 (内存镜像) 计算账户状态
+        镜像首次访问时从数据库加载，多进程共享数据库 (shared_writers) 时每次都会刷新，
+        因此可能阻塞: 异步代码中请通过 async_db.run 调用
+        """
+        positions = self.manager.get_all_positions()
+        realized = sum(p.realized_pnl or 0.0 for p in positions)
+        cost_basis = sum(p.amount * p.avg_price for p in positions)
+        position_value = sum(p.amount * p.current_price for p in positions)
+        # 均价法下: 现金 = 初始资金 + 已实现盈亏 - 持仓成本
+        cash = self.initial_balance + realized - cost_basis
+        return {
+            "equity": cash + position_value,
+            "cash": cash,
+            "position_value": position_value,
+            "unrealized_pnl": position_value - cost_basis,
+            "realized_pnl": realized,
+        }
+
+    def take_snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """写入一条快照 (时间对齐到快照周期)"""
+        now = time.time() if now is None else now
+        snapshot = self.compute()
+        snapshot["ts"] = int(now) // self.interval * self.interval
+        self.manager.save_equity_snapshot(snapshot, self.resolutions)
+        return snapshot
+
+    async def run_forever(self):
+        """后台定时快照任务"""
+        logger.info(f"Equity snapshotter started (every {self.interval}s)")
+        while True:
+            try:
+                await asyncio.to_thread(self.take_snapshot)
+            except Exception as e:
+                logger.error(f"Equity snapshot failed: {e}")
+            await asyncio.sleep(self.interval - time.time() % self.interval)
+
+    # --- Queries ---
+    def pick_resolution(self, start: Optional[int], end: Optional[int], points: int) -> int:
+        """行数不超过 max(points, MAX_CURVE_ROWS) 的最细分辨率，都超过时取最粗的"""
+        end = int(time.time()) if end is None else end
+        if start is None:
+            start = self.manager.get_first_equity_time(self.resolutions[-1])
+            if start is None:
+                return self.resolutions[0]
+        span = max(0, end - start)
+        for res in self.resolutions:
+            if span / res <= max(points, MAX_CURVE_ROWS):
+                return res
+        return self.resolutions[-1]
+
+    def get_curve(self, start: Optional[int] = None, end: Optional[int] = None, points: int = 200) -> Dict[str, np.ndarray]:
+        """资产曲线 (最多 points 个点)"""
+        resolution = self.pick_resolution(start, end, points)
+        data = self.manager.get_equity_snapshots(resolution, start, end)
+        idx = lttb(data["ts"].astype(np.float64), data["equity"], points)
+        return {k: v[idx] for k, v in data.items()}
+
+    def get_performance(self) -> Dict[str, float]:
+        state = self.compute()
+        stats = self.manager.get_closed_trade_stats()
+        total_pnl = state["equity"] - self.initial_balance
+        return {
+            "total_pnl": total_pnl,
+            "pnl_percentage": total_pnl / self.initial_balance * 100 if self.initial_balance else 0.0,
+            "win_rate": stats["wins"] / stats["closed"] * 100 if stats["closed"] else 0.0,
+        }
+
+    def get_day_open_equity(self, now: Optional[datetime] = None) -> Optional[float]:
+        """当日 (UTC) 第一条快照的权益"""
+        now = now or datetime.utcnow()
+        day_start = int((now.replace(hour=0, minute=0, second=0, microsecond=0) - datetime(1970, 1, 1)).total_seconds())
+        data = self.manager.get_equity_snapshots(self.interval, start=day_start, limit=1)
+        if len(data["equity"]):
+            return float(data["equity"][0])
+        return None
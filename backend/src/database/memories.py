@@ -0,0 +1,128 @@
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, delete, select, update
+
+from src.database.models import Memory, MemoryType
+from src.utils.logger import logger
+
+DELETE_CHUNK = 500  # 单条 DELETE ... IN (...) 的参数个数 (低于 SQLite 变量上限)
+
+
+def _to_datetime(ts: Optional[float]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(ts) if ts is not None else None
+
+
+def _to_epoch(value: datetime) -> float:
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+class MemoryRepository:
+    """
+    记忆表读写 (MemoryManager 的持久化后端)
+
+    每条记忆一行: 类型 / 重要性 / 时间 / 过期时间 / 交易对为带索引的列，向量以 float32 BLOB
+    存在同一行 (embedding_model 记录生成它的模型)。MemoryManager 启动时一次性加载全部行，
+    在内存中建立向量矩阵与元数据索引；按时间倒序的查询可直接走 (memory_type, timestamp) 索引。
+    插入经由 manager._insert (开启写缓冲时批量写入)，更新向量 / 删除前先写出缓冲中的记忆行。
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    @staticmethod
+    def _row(memory: Dict[str, Any], memory_type: str, expires_at: Optional[float],
+             embedding: Optional[np.ndarray], model_tag: Optional[str]) -> Dict[str, Any]:
+        metadata = memory.get('metadata') or {}
+        symbol = metadata.get('symbol')
+        return {
+            "memory_uid": memory['id'],
+            "memory_type": MemoryType(memory_type.upper()),
+            "content": memory['content'],
+            "meta": metadata,
+            "symbol": str(symbol).upper() if symbol else None,
+            "importance_score": float(memory.get('importance', 0)),
+            "timestamp": _to_datetime(memory['timestamp']),
+            "expiry_date": _to_datetime(expires_at),
+            "embedding": np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None,
+            "embedding_model": model_tag if embedding is not None else None,
+        }
+
+    # --- Write ---
+    def put(self, memory: Dict[str, Any], memory_type: str, expires_at: Optional[float] = None,
+            embedding: Optional[np.ndarray] = None, model_tag: Optional[str] = None):
+        """插入一条记忆 (向量可稍后由 set_embeddings 补写)"""
+        self.manager._insert(Memory, self._row(memory, memory_type, expires_at, embedding, model_tag))
+
+    def set_embeddings(self, memory_uids: Sequence[str], vectors: np.ndarray, model_tag: str):
+        """批量写入向量 (一次 executemany)"""
+        if not len(memory_uids):
+            return
+        self.manager._flush_pending(Memory)
+        table = Memory.__table__
+        stmt = update(table).where(table.c.memory_uid == bindparam("uid")).values(
+            embedding=bindparam("vector"), embedding_model=bindparam("model"))
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self.manager.get_session() as session:
+            session.execute(stmt, [{"uid": uid, "vector": vectors[i].tobytes(), "model": model_tag}
+                                   for i, uid in enumerate(memory_uids)])
+
+    def delete(self, memory_uids: Sequence[str]):
+        """按记忆 ID 删除 (清理 / 过期淘汰)"""
+        if not memory_uids:
+            return
+        self.manager._flush_pending(Memory)
+        memory_uids = list(memory_uids)
+        with self.manager.get_session() as session:
+            for start in range(0, len(memory_uids), DELETE_CHUNK):
+                session.execute(delete(Memory).where(Memory.memory_uid.in_(memory_uids[start:start + DELETE_CHUNK])))
+
+    # --- Read ---
+    def load(self, model_tag: str) -> Iterator[Tuple[Dict[str, Any], str, Optional[np.ndarray]]]:
+        """
+        按时间顺序返回全部记忆: (记忆字典, 类型, 向量)
+        向量由其他模型生成时返回 None (由 MemoryManager 重新计算)；旧库中没有 memory_uid 的行补写 ID
+        """
+        self.manager._flush_pending(Memory)
+        backfill = []
+        with self.manager.get_session() as session:
+            rows = session.execute(select(
+                Memory.id, Memory.memory_uid, Memory.memory_type, Memory.content, Memory.meta,
+                Memory.importance_score, Memory.timestamp, Memory.embedding, Memory.embedding_model,
+            ).order_by(Memory.timestamp, Memory.id)).all()
+        for row in rows:
+            memory_uid = row.memory_uid
+            if memory_uid is None:
+                memory_uid = f"memory-{row.id}"
+                backfill.append({"row_id": row.id, "uid": memory_uid})
+            memory_type = row.memory_type.value.lower()
+            memory = {
+                "id": memory_uid,
+                "content": row.content,
+                "type": memory_type,
+                "importance": row.importance_score,
+                "timestamp": _to_epoch(row.timestamp),
+                "metadata": row.meta or {},
+            }
+            vector = None
+            if row.embedding is not None and row.embedding_model == model_tag:
+                vector = np.frombuffer(row.embedding, dtype=np.float32)
+            yield memory, memory_type, vector
+        if backfill:
+            table = Memory.__table__
+            with self.manager.get_session() as session:
+                session.execute(update(table).where(table.c.id == bindparam("row_id"))
+                                .values(memory_uid=bindparam("uid")), backfill)
+            logger.info(f"Assigned ids to {len(backfill)} legacy memory rows.")
+
+    def recent(self, limit: int = 10, memory_type: Optional[str] = None) -> List[Memory]:
+        """最近的记忆行 (按时间倒序)"""
+        self.manager._flush_pending(Memory)
+        query = select(Memory).order_by(Memory.timestamp.desc()).limit(limit)
+        if memory_type:
+            query = query.where(Memory.memory_type == MemoryType(memory_type.upper()))
+        with self.manager.get_session() as session:
+            rows = session.scalars(query).all()
+            session.expunge_all()
+            return rows
@@ -1,10 +1,22 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Text, JSON, Enum, Index, LargeBinary, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 import enum
 
 Base = declarative_base()
 
+# JSON 列: PostgreSQL 上使用 JSONB (二进制存储，支持 GIN 索引)，其他方言仍为 JSON
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+def keyset_index(table: str) -> Index:
+    """
+    游标分页用的 (timestamp, id) 复合索引
+    SQLite 的 timestamp 索引隐式包含 rowid 已经满足要求，只在 PostgreSQL 上创建
+    """
+    return Index(f"ix_{table}_timestamp_id", "timestamp", "id").ddl_if(dialect="postgresql")
+
 class TradeSide(str, enum.Enum):
     BUY = "BUY"
     SELL = "SELL"
@@ -35,6 +47,7 @@ class Position(Base):
     avg_price = Column(Float, nullable=False, default=0.0, comment="平均持仓价格")
     current_price = Column(Float, nullable=False, default=0.0, comment="最近一次更新的市场价格")
     pnl = Column(Float, default=0.0, comment="未实现盈亏")
+    realized_pnl = Column(Float, default=0.0, comment="累计已实现盈亏")
     update_time = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="最后更新时间")
 
     def __repr__(self):
@@ -53,6 +66,13 @@ class Trade(Base):
     timestamp = Column(DateTime, default=datetime.utcnow, index=True, comment="交易时间")
     order_id = Column(String(50), unique=True, index=True, comment="交易所订单ID")
     status = Column(Enum(OrderStatus), default=OrderStatus.FILLED, comment="订单状态")
+    realized_pnl = Column(Float, default=0.0, comment="本笔成交的已实现盈亏 (仅卖出)")
+
+    # 风控聚合查询: 按币种 + 时间窗口统计
+    __table_args__ = (
+        Index("ix_trades_symbol_timestamp", "symbol", "timestamp"),
+        keyset_index("trades"),
+    )
 
     def __repr__(self):
         return f"<Trade(id={self.id}, symbol='{self.symbol}', side='{self.side}', price={self.price})>"
@@ -71,21 +91,82 @@ class MarketData(Base):
     def __repr__(self):
         return f"<MarketData(symbol='{self.symbol}', price={self.price}, time='{self.timestamp}')>"
 
+class Kline(Base):
+    """K线时序表 (本地历史)"""
+    __tablename__ = 'klines'
+    # 以 (symbol, interval, open_time) 为聚簇主键 (SQLite WITHOUT ROWID)，
+    # 主键索引本身即包含全部列，范围查询无需回表
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    symbol = Column(String(20), primary_key=True, comment="交易对")
+    interval = Column(String(8), primary_key=True, comment="K线周期 (如 1m, 15m, 1h)")
+    open_time = Column(BigInteger, primary_key=True, autoincrement=False, comment="开盘时间 (毫秒时间戳)")
+    open = Column(Float, nullable=False, comment="开盘价")
+    high = Column(Float, nullable=False, comment="最高价")
+    low = Column(Float, nullable=False, comment="最低价")
+    close = Column(Float, nullable=False, comment="收盘价")
+    volume = Column(Float, nullable=False, default=0.0, comment="成交量")
+    close_time = Column(BigInteger, comment="收盘时间 (毫秒时间戳)")
+    quote_volume = Column(Float, comment="成交额")
+    trades = Column(Integer, comment="成交笔数")
+
+    def __repr__(self):
+        return f"<Kline(symbol='{self.symbol}', interval='{self.interval}', open_time={self.open_time}, close={self.close})>"
+
+class EquitySnapshot(Base):
+    """账户权益快照 (定时写入，用于资产曲线)"""
+    __tablename__ = 'equity_snapshots'
+    # 同一快照按多个分辨率写入 (如 1m / 1h / 1d，每个桶保留最后一条)，
+    # 长区间直接读粗粒度行，按 (resolution, ts) 主键范围扫描即可，无需聚合排序
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    resolution = Column(Integer, primary_key=True, autoincrement=False, comment="分辨率 (秒)")
+    ts = Column(BigInteger, primary_key=True, autoincrement=False, comment="快照时间 (UTC 秒级时间戳，对齐到分辨率)")
+    equity = Column(Float, nullable=False, comment="总权益 (现金 + 持仓市值)")
+    cash = Column(Float, nullable=False, comment="现金余额")
+    position_value = Column(Float, nullable=False, default=0.0, comment="持仓市值")
+    unrealized_pnl = Column(Float, nullable=False, default=0.0, comment="未实现盈亏")
+    realized_pnl = Column(Float, nullable=False, default=0.0, comment="累计已实现盈亏")
+
+    def __repr__(self):
+        return f"<EquitySnapshot(resolution={self.resolution}, ts={self.ts}, equity={self.equity})>"
+
 class AIDecision(Base):
     """AI决策记录表"""
     __tablename__ = 'ai_decisions'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     decision_type = Column(String(50), nullable=False, comment="决策类型 (如 BUY_SIGNAL, SELL_SIGNAL, HOLD)")
-    input_data = Column(JSON, comment="输入数据快照 (JSON)")
-    output_recommendation = Column(JSON, comment="AI输出建议 (JSON)")
+    input_data = Column(JSONType, comment="输入数据快照 (JSON)")
+    output_recommendation = Column(JSONType, comment="AI输出建议 (JSON)")
     confidence = Column(Float, comment="置信度 (0.0-1.0)")
     timestamp = Column(DateTime, default=datetime.utcnow, index=True, comment="决策生成时间")
     layer = Column(Enum(DecisionLayer), nullable=False, comment="决策层级")
+    search_text = Column(Text, nullable=True, comment="全文检索文本 (reasoning / thought_process / 新闻标题，见 search.py)")
+
+    __table_args__ = (
+        keyset_index("ai_decisions"),
+        # PostgreSQL 全文检索索引 (SQLite 使用 FTS5 虚拟表)
+        Index("ix_ai_decisions_search_text", text("to_tsvector('simple', coalesce(search_text, ''))"),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     def __repr__(self):
         return f"<AIDecision(type='{self.decision_type}', layer='{self.layer}', confidence={self.confidence})>"
 
+class DecisionBlob(Base):
+    """决策上下文分块 (内容寻址，压缩存储，见 blob_store.py)"""
+    __tablename__ = 'decision_blobs'
+
+    hash = Column(String(64), primary_key=True, comment="原始 JSON 的 sha256")
+    codec = Column(String(8), nullable=False, comment="压缩算法 (zlib / zstd)")
+    size = Column(Integer, nullable=False, comment="压缩前字节数")
+    data = Column(LargeBinary, nullable=False, comment="压缩后的 JSON")
+    last_seen = Column(DateTime, default=datetime.utcnow, index=True, comment="最近一次写入或被引用的时间 (用于回收)")
+
+    def __repr__(self):
+        return f"<DecisionBlob(hash='{self.hash[:12]}', size={self.size})>"
+
 class AICommunication(Base):
     """AI间通信记录表"""
     __tablename__ = 'ai_communications'
@@ -94,22 +175,31 @@ class AICommunication(Base):
     from_ai = Column(String(50), nullable=False, comment="发送方AI名称")
     to_ai = Column(String(50), nullable=False, comment="接收方AI名称")
     message_type = Column(String(50), nullable=False, comment="消息类型")
-    content = Column(JSON, nullable=False, comment="消息内容 (JSON)")
+    content = Column(JSONType, nullable=False, comment="消息内容 (JSON)")
     timestamp = Column(DateTime, default=datetime.utcnow, index=True, comment="发送时间")
 
+    __table_args__ = (keyset_index("ai_communications"),)
+
     def __repr__(self):
         return f"<AICommunication(from='{self.from_ai}', to='{self.to_ai}', type='{self.message_type}')>"
 
 class Memory(Base):
-    """系统记忆表"""
+    """系统记忆表 (MemoryManager 的持久化存储，见 memories.py)"""
     __tablename__ = 'memory'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
+    memory_uid = Column(String(36), nullable=True, unique=True, index=True, comment="记忆 ID (MemoryManager 的 uuid)")
     memory_type = Column(Enum(MemoryType), nullable=False, comment="记忆类型")
-    content = Column(JSON, nullable=False, comment="记忆内容")
+    content = Column(JSONType, nullable=False, comment="记忆内容")
+    meta = Column(JSONType, nullable=True, comment="记忆元数据 (symbol / tags / pnl 等)")
+    symbol = Column(String(20), nullable=True, index=True, comment="交易对 (取自元数据，便于按币种查询)")
     importance_score = Column(Float, default=0.0, index=True, comment="重要性评分")
     timestamp = Column(DateTime, default=datetime.utcnow, index=True, comment="记忆形成时间")
-    expiry_date = Column(DateTime, nullable=True, index=True, comment="过期时间 (仅短期记忆)")
+    expiry_date = Column(DateTime, nullable=True, index=True, comment="过期时间 (按类型与重要性档位计算，空为永久保留)")
+    embedding = Column(LargeBinary, nullable=True, comment="归一化 float32 向量")
+    embedding_model = Column(String(100), nullable=True, comment="生成向量的模型 (换模型后重新计算)")
+
+    __table_args__ = (Index("ix_memory_type_timestamp", "memory_type", "timestamp"),)
 
     def __repr__(self):
         return f"<Memory(type='{self.memory_type}', score={self.importance_score})>"
@@ -150,7 +240,7 @@ class CoordinatorTrigger(Base):
     # 触发条件 JSON
     # e.g. {"symbol": "BTCUSDT", "condition": "LTE", "value": 42000}
     # e.g. {"cron": "0 */4 * * *"}
-    condition_data = Column(JSON, nullable=False)
+    condition_data = Column(JSONType, nullable=False)
     
     status = Column(Enum(TriggerStatus), default=TriggerStatus.ACTIVE)
     
@@ -1,12 +1,27 @@
-from sqlalchemy import create_engine
+from sqlalchemy import insert, select, func, inspect, case
+from sqlalchemy.dialects import sqlite, postgresql
 from sqlalchemy.orm import sessionmaker, scoped_session
 from contextlib import contextmanager
 from typing import List, Optional, Any
 import os
+import threading
+import numpy as np
+from types import SimpleNamespace
+from itertools import chain
 from datetime import datetime
 
-from src.database.models import Base, Position, Trade, MarketData, AIDecision, AICommunication, Memory, Config
+from src.database.models import Base, Position, Trade, TradeSide, MarketData, Kline, EquitySnapshot, AIDecision, AICommunication, Memory
+from src.database.engine import create_db_engine, load_database_config, resolve_database_url
+from src.database.write_buffer import WriteBehindBuffer
+from src.database.positions import PositionRepository
+from src.database.trade_stats import TradeStats
+from src.database.pagination import keyset_page, split_page
+from src.database.blob_store import BlobStore, BlobReferences
+from src.database.search import DecisionSearch, extract_search_text
+from src.database.config_cache import ConfigCache
+from src.database.memories import MemoryRepository
 from src.utils.logger import logger
+from src.utils.lazy import LazyObject
 
 # 数据库路径配置
 # 数据库路径配置
@@ -16,21 +31,129 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 backend_root = os.path.dirname(os.path.dirname(current_dir))
 # 数据目录在 backend/data
 DB_PATH = os.path.join(backend_root, "data", "database.db")
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+DATABASE_URL = f"sqlite:///{DB_PATH}"  # 默认后端；可由环境变量 DATABASE_URL 或 database.url 覆盖
 
 class DatabaseManager:
     """数据库管理类，处理所有数据库交互"""
+
+    # output_recommendation 中由列表接口在 SQL 里直接提取的键 (不拆分到 decision_blobs)
+    DECISION_SUMMARY_KEYS = ("reasoning", "action", "technical_summary")
+    # Agent.log_decision 把完整决策 (含 output_recommendation) 整体记为 output_recommendation，摘要键嵌套一层
+    DECISION_SUMMARY_PATHS = DECISION_SUMMARY_KEYS + tuple(("output_recommendation", k) for k in DECISION_SUMMARY_KEYS)
+    DECISION_PAYLOAD_COLUMNS = ("input_data", "output_recommendation")
     
-    def __init__(self, db_url: str = DATABASE_URL):
-        self.engine = create_engine(db_url, echo=False, pool_pre_ping=True)
+    def __init__(self, db_url: Optional[str] = None, storage_profile: Optional[dict] = None):
+        # 未指定时按 环境变量 DATABASE_URL > config.yaml database.url > 本地 SQLite 选择后端
+        db_url = db_url or resolve_database_url(DATABASE_URL)
+        # SQLite 使用 WAL 等调优参数，PostgreSQL 使用连接池参数 (见 engine.py)，storage_profile 可覆盖默认值
+        engine_kwargs = {"profile": storage_profile} if storage_profile else {}
+        self.engine = create_db_engine(db_url, **engine_kwargs)
+        # 服务端数据库可能被多个进程同时写入: 持仓读取走数据库、成交行锁、统计定期重新聚合
+        self.shared_writers = self.engine.dialect.name != "sqlite"
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
-        logger.info(f"Database engine initialized at {db_url}")
+        # 写缓冲 (默认关闭，由 enable_write_behind 开启)
+        self.write_buffer: Optional[WriteBehindBuffer] = None
+        # 持仓仓库 (带内存镜像)
+        self.positions = PositionRepository(self)
+        # 交易滚动统计 (风控检查读内存，成交时同步更新)
+        self.trade_stats = TradeStats(self)
+        # 决策上下文分块存储 (去重 + 压缩)；列表接口直接读取的顶层键保留在行内
+        self.decision_blobs = BlobStore(self, protected_keys=self.DECISION_SUMMARY_PATHS)
+        self._decision_blob_refs = BlobReferences()
+        self._decision_pack_lock = threading.Lock()
+        # 决策全文检索 (SQLite FTS5 / PostgreSQL tsvector)
+        self.decision_search = DecisionSearch(self)
+        # config 表读穿透缓存 (读取为字典查找，跨进程修改通过版本检查发现)
+        self.config_cache = ConfigCache(self)
+        # 记忆表 (MemoryManager 的持久化后端: 类型化列 + 向量 BLOB)
+        self.memories = MemoryRepository(self)
+        logger.info(f"Database engine initialized at {self.engine.url.render_as_string(hide_password=True)}")
 
     def create_tables(self):
         """创建所有数据表"""
         Base.metadata.create_all(bind=self.engine)
+        self._upgrade_schema()
+        self.decision_search.install()
         logger.info("All database tables created successfully.")
 
+    def _upgrade_schema(self):
+        """轻量迁移: create_all 不会修改已存在的表，这里为旧库补充新增的可空列和索引"""
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                existing = {c["name"] for c in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing or not column.nullable:
+                        continue
+                    col_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}')
+                    logger.info(f"Added column {table.name}.{column.name}")
+                for index in table.indexes:
+                    index.create(bind=conn, checkfirst=True)
+
+    # --- Write-Behind ---
+    def enable_write_behind(self, **options) -> WriteBehindBuffer:
+        """
+        开启写缓冲: market_data / ai_decisions / memory 的插入改为批量异步写入
+        (成交记录始终同步写入，重复或失败的成交直接抛给调用方)
+        未传入的参数取 config.yaml 中 database.write_behind 的配置
+        """
+        if self.write_buffer is None:
+            config = load_database_config().get('write_behind', {}) or {}
+            params = {
+                key: options.get(key, config[key])
+                for key in ("flush_interval_ms", "batch_size", "max_pending")
+                if key in options or key in config
+            }
+            self.write_buffer = WriteBehindBuffer(self, **params).start()
+        return self.write_buffer
+
+    def disable_write_behind(self):
+        """关闭写缓冲并写出剩余数据"""
+        if self.write_buffer is not None:
+            buffer, self.write_buffer = self.write_buffer, None
+            buffer.close()
+
+    def _insert(self, model, data: dict):
+        """单行插入: 开启写缓冲时进入缓冲队列，否则立即提交"""
+        if self.write_buffer is not None:
+            self.write_buffer.submit(model, data)
+            return
+        with self.get_session() as session:
+            session.add(model(**data))
+
+    def bulk_insert(self, model, rows: List[dict]):
+        """批量插入 (单个 executemany 事务)"""
+        if not rows:
+            return
+        if self.write_buffer is not None:
+            self.write_buffer.submit_many(model, rows)
+            return
+        with self.get_session() as session:
+            session.execute(insert(model), [WriteBehindBuffer._stamp(model, row) for row in rows])
+
+    def _flush_pending(self, model):
+        """
+        读取前写出该表的缓冲数据，保证读到刚写入的记录
+        pending 包含后台线程正在写出的批次，flush 会等待其提交 (同一把 flush 锁)
+        """
+        if self.write_buffer is not None and self.write_buffer.pending(model):
+            self.write_buffer.flush(model)
+
+    def _upsert_stmt(self, model, index_elements: List[str], update_columns: List[str]):
+        """按方言生成 INSERT ... ON CONFLICT DO UPDATE 语句"""
+        dialect_insert = postgresql.insert if self.engine.dialect.name == "postgresql" else sqlite.insert
+        stmt = dialect_insert(model)
+        if not update_columns:
+            return stmt.on_conflict_do_nothing(index_elements=index_elements)
+        return stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={col: stmt.excluded[col] for col in update_columns}
+        )
+
     @contextmanager
     def get_session(self):
         """获取数据库会话的上下文管理器"""
@@ -48,84 +171,410 @@ class DatabaseManager:
     # --- Position Operations ---
     def update_position(self, symbol: str, amount: float, avg_price: float, current_price: float):
         """更新或创建持仓记录"""
-        with self.get_session() as session:
-            try:
-                position = session.query(Position).filter(Position.symbol == symbol).first()
-                if position:
-                    position.amount = amount
-                    position.avg_price = avg_price
-                    position.current_price = current_price
-                    # 简单计算未实现盈亏: (当前价格 - 平均价格) * 数量
-                    position.pnl = (current_price - avg_price) * amount
-                    logger.debug(f"Updated position for {symbol}")
-                else:
-                    position = Position(
-                        symbol=symbol,
-                        amount=amount,
-                        avg_price=avg_price,
-                        current_price=current_price,
-                        pnl=(current_price - avg_price) * amount
-                    )
-                    session.add(position)
-                    logger.info(f"Created new position for {symbol}")
-            except Exception as e:
-                logger.error(f"Failed to update position for {symbol}: {e}")
-                raise
+        try:
+            self.positions.set(symbol, amount, avg_price, current_price)
+            logger.debug(f"Updated position for {symbol}")
+        except Exception as e:
+            logger.error(f"Failed to update position for {symbol}: {e}")
+            raise
+
+    def apply_fill(self, symbol: str, side, quantity: float, price: float, trade: Optional[dict] = None) -> Position:
+        """按成交更新持仓 (加权平均成本 + 已实现盈亏)，trade 与持仓在同一事务中写入"""
+        return self.positions.apply_fill(symbol, side, quantity, price, trade=trade)
+
+    def get_position(self, symbol: str) -> Optional[Position]:
+        """按 symbol 获取持仓 (读内存镜像)"""
+        return self.positions.get(symbol)
 
     def get_all_positions(self) -> List[Position]:
-        """获取所有持仓"""
-        with self.get_session() as session:
-            positions = session.query(Position).all()
-            # 将对象从 session 中 detach，以便在 session 关闭后使用
-            session.expunge_all() 
-            return positions
+        """获取所有持仓 (读内存镜像)"""
+        return self.positions.get_all()
 
     # --- Trade Operations ---
     def record_trade(self, trade_data: dict):
-        """记录新的交易"""
-        with self.get_session() as session:
-            try:
-                trade = Trade(**trade_data)
-                session.add(trade)
-                logger.info(f"Recorded trade: {trade_data.get('symbol')} {trade_data.get('side')}")
-            except Exception as e:
-                logger.error(f"Failed to record trade: {e}")
-                raise
+        """
+        记录新的交易 (不经过写缓冲: 成交必须立即落库，失败时抛给调用方)
+        提交后同步更新交易滚动统计 (实盘成交不经过 apply_fill)
+        """
+        try:
+            # 先加载统计，避免加载结果中已包含这笔成交而被重复计数
+            self.trade_stats.ensure_loaded()
+            trade_data = dict(trade_data)
+            if trade_data.get("timestamp") is None:
+                trade_data["timestamp"] = datetime.utcnow()
+            with self.get_session() as session:
+                session.add(Trade(**trade_data))
+            self.trade_stats.record_fill(
+                trade_data.get("symbol"), float(trade_data.get("price") or 0.0),
+                float(trade_data.get("quantity") or 0.0), trade_data.get("realized_pnl") or 0.0,
+                trade_data["timestamp"],
+            )
+            logger.info(f"Recorded trade: {trade_data.get('symbol')} {trade_data.get('side')}")
+        except Exception as e:
+            logger.error(f"Failed to record trade: {e}")
+            raise
 
     def get_trades(self, limit: int = 50) -> List[Trade]:
         """获取最近交易记录"""
+        self._flush_pending(Trade)
         with self.get_session() as session:
             trades = session.query(Trade).order_by(Trade.timestamp.desc()).limit(limit).all()
             session.expunge_all()
             return trades
 
+    TRADE_SUMMARY_COLUMNS = ["id", "symbol", "side", "price", "quantity", "fee", "realized_pnl", "order_id", "status", "timestamp"]
+
+    def get_trades_page(self, limit: int = 50, cursor: Optional[str] = None, symbol: Optional[str] = None):
+        """
+        成交记录游标分页 (按时间倒序)
+        :return: (rows, next_cursor)
+        """
+        self._flush_pending(Trade)
+        query = select(*[getattr(Trade, c) for c in self.TRADE_SUMMARY_COLUMNS])
+        if symbol:
+            query = query.where(Trade.symbol == symbol)
+        query = keyset_page(query, Trade, cursor, limit)
+        with self.get_session() as session:
+            rows = session.execute(query).all()
+        return split_page(rows, limit)
+
+    # --- Trade Aggregates ---
+    def count_trades_since(self, since: datetime, symbol: Optional[str] = None) -> int:
+        """统计 since 之后的成交笔数"""
+        self._flush_pending(Trade)
+        query = select(func.count(Trade.id)).where(Trade.timestamp >= since)
+        if symbol:
+            query = query.where(Trade.symbol == symbol)
+        with self.get_session() as session:
+            return session.execute(query).scalar() or 0
+
+    def get_trade_times_since(self, since: datetime) -> List[datetime]:
+        """since 之后所有成交的时间 (升序)"""
+        self._flush_pending(Trade)
+        query = select(Trade.timestamp).where(Trade.timestamp >= since).order_by(Trade.timestamp)
+        with self.get_session() as session:
+            return list(session.execute(query).scalars())
+
+    def get_daily_realized_pnl(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> dict:
+        """按 UTC 日汇总已实现盈亏: {"2024-01-01": 123.4, ...}"""
+        self._flush_pending(Trade)
+        query = self._daily_pnl_query(since, until)
+        with self.get_session() as session:
+            return {str(d): float(pnl or 0.0) for d, pnl in session.execute(query).all()}
+
+    @staticmethod
+    def _daily_pnl_query(since: Optional[datetime], until: Optional[datetime]):
+        # date() 在 SQLite 返回 'YYYY-MM-DD' 文本，在 PostgreSQL 返回 date (str() 后格式相同)
+        day = func.date(Trade.timestamp)
+        query = select(day, func.sum(Trade.realized_pnl)).group_by(day).order_by(day)
+        if since:
+            query = query.where(Trade.timestamp >= since)
+        if until:
+            query = query.where(Trade.timestamp < until)
+        return query
+
+    def get_notional_by_symbol(self, since: Optional[datetime] = None) -> dict:
+        """按币种汇总成交额 (price * quantity)"""
+        self._flush_pending(Trade)
+        query = select(Trade.symbol, func.sum(Trade.price * Trade.quantity)).group_by(Trade.symbol)
+        if since:
+            query = query.where(Trade.timestamp >= since)
+        with self.get_session() as session:
+            return {symbol: float(total or 0.0) for symbol, total in session.execute(query).all()}
+
+    def get_closed_trade_stats(self) -> dict:
+        """已平仓 (卖出) 成交统计: 笔数、盈利笔数、累计已实现盈亏"""
+        self._flush_pending(Trade)
+        query = select(
+            func.count(Trade.id),
+            func.sum(case((Trade.realized_pnl > 0, 1), else_=0)),
+            func.sum(Trade.realized_pnl),
+        ).where(Trade.side == TradeSide.SELL)
+        with self.get_session() as session:
+            closed, wins, realized = session.execute(query).one()
+        return {"closed": closed or 0, "wins": int(wins or 0), "realized_pnl": float(realized or 0.0)}
+
     # --- Market Data Operations ---
     def save_market_data(self, data: dict):
         """保存市场快照"""
+        try:
+            self._insert(MarketData, data)
+        except Exception as e:
+            logger.error(f"Failed to save market data: {e}")
+
+    # --- Kline Operations ---
+    KLINE_FIELDS = ["open_time", "open", "high", "low", "close", "volume", "close_time", "quote_volume", "trades"]
+
+    def upsert_klines(self, symbol: str, interval: str, klines: List[dict]) -> int:
+        """
+        批量幂等写入K线 (重复的 open_time 覆盖为最新值，如未收盘的当前K线)
+        :param klines: [{"open_time": ms, "open":..., "high":..., "low":..., "close":..., "volume":..., ...}]
+        """
+        if not klines:
+            return 0
+        rows = [
+            {"symbol": symbol, "interval": interval, **{k: row.get(k) for k in self.KLINE_FIELDS}}
+            for row in klines
+        ]
+        stmt = self._upsert_stmt(Kline, ["symbol", "interval", "open_time"], self.KLINE_FIELDS[1:])
         with self.get_session() as session:
-            try:
-                market_data = MarketData(**data)
-                session.add(market_data)
-            except Exception as e:
-                logger.error(f"Failed to save market data: {e}")
+            session.execute(stmt, rows)
+        logger.debug(f"Upserted {len(rows)} klines for {symbol} {interval}")
+        return len(rows)
+
+    def get_klines(self, symbol: str, interval: str, start: Optional[int] = None,
+                   end: Optional[int] = None, limit: Optional[int] = None) -> dict:
+        """
+        按时间范围查询本地K线，直接返回 NumPy 数组
+        :param start/end: 开盘时间范围 (毫秒, 闭区间)
+        :param limit: 仅返回最近 N 根
+        :return: {"open_time": int64[], "open": float64[], "high": ..., "low": ..., "close": ..., "volume": ...}
+        """
+        columns = [Kline.open_time, Kline.open, Kline.high, Kline.low, Kline.close, Kline.volume]
+        query = select(*columns).where(Kline.symbol == symbol, Kline.interval == interval)
+        if start is not None:
+            query = query.where(Kline.open_time >= start)
+        if end is not None:
+            query = query.where(Kline.open_time <= end)
+        if limit:
+            query = query.order_by(Kline.open_time.desc()).limit(limit)
+        else:
+            query = query.order_by(Kline.open_time)
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+
+        # 直接展开为连续 float64 缓冲区 (比逐个 Row 转数组快一个数量级)
+        data = np.fromiter(
+            chain.from_iterable(rows), dtype=np.float64, count=len(rows) * len(columns)
+        ).reshape(len(rows), len(columns))
+        if limit:
+            data = data[::-1]
+        result = {c.key: np.ascontiguousarray(data[:, i]) for i, c in enumerate(columns)}
+        result["open_time"] = result["open_time"].astype(np.int64)
+        return result
+
+    def get_latest_kline_time(self, symbol: str, interval: str) -> Optional[int]:
+        """本地最新一根K线的开盘时间 (毫秒)"""
+        with self.get_session() as session:
+            return session.query(func.max(Kline.open_time)).filter(
+                Kline.symbol == symbol, Kline.interval == interval
+            ).scalar()
+
+    # --- Equity Snapshot Operations ---
+    EQUITY_FIELDS = ["ts", "equity", "cash", "position_value", "unrealized_pnl", "realized_pnl"]
+
+    def save_equity_snapshot(self, snapshot: dict, resolutions: List[int]):
+        """
+        按各分辨率写入同一条权益快照 (ts 对齐到分辨率，同一个桶内后写覆盖先写)
+        :param snapshot: 含 ts (秒级时间戳) 与 EQUITY_FIELDS 中的数值
+        """
+        rows = [
+            dict(snapshot, resolution=res, ts=int(snapshot["ts"]) // res * res)
+            for res in resolutions
+        ]
+        stmt = self._upsert_stmt(EquitySnapshot, ["resolution", "ts"], self.EQUITY_FIELDS[1:])
+        with self.get_session() as session:
+            session.execute(stmt, rows)
+
+    def get_first_equity_time(self, resolution: int, start: Optional[int] = None) -> Optional[int]:
+        """指定分辨率下 (start 之后) 最早的快照时间"""
+        query = select(func.min(EquitySnapshot.ts)).where(EquitySnapshot.resolution == resolution)
+        if start is not None:
+            query = query.where(EquitySnapshot.ts >= start)
+        with self.get_session() as session:
+            return session.execute(query).scalar()
+
+    def get_equity_snapshots(self, resolution: int, start: Optional[int] = None, end: Optional[int] = None,
+                             limit: Optional[int] = None) -> dict:
+        """
+        按时间范围查询某一分辨率的权益快照，返回 NumPy 数组
+        :param start/end: 秒级时间戳 (闭区间)
+        :param limit: 仅返回最早的 N 条
+        """
+        fields = self.EQUITY_FIELDS
+        query = (
+            select(*[getattr(EquitySnapshot, f) for f in fields])
+            .where(EquitySnapshot.resolution == resolution)
+            .order_by(EquitySnapshot.ts)
+        )
+        if start is not None:
+            query = query.where(EquitySnapshot.ts >= start)
+        if end is not None:
+            query = query.where(EquitySnapshot.ts <= end)
+        if limit:
+            query = query.limit(limit)
+
+        with self.get_session() as session:
+            rows = session.execute(query).all()
+
+        flat = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=len(rows) * len(fields))
+        table = flat.reshape(len(rows), len(fields))
+        result = {f: table[:, i] for i, f in enumerate(fields)}
+        result["ts"] = result["ts"].astype(np.int64)
+        return result
 
     # --- AI Decision Operations ---
+    def _pack_decision(self, decision_data: dict) -> dict:
+        """将大的上下文拆分为内容寻址的分块写入 decision_blobs，行内只保留骨架"""
+        packed = dict(decision_data)
+        # 检索文本在拆分前提取 (分块后的长文本无法在 SQL 中读取)
+        if packed.get("search_text") is None:
+            packed["search_text"] = extract_search_text(decision_data)
+        for column in self.DECISION_PAYLOAD_COLUMNS:
+            if packed.get(column) is not None:
+                packed[column] = self.decision_blobs.pack(packed[column])
+        return packed
+
+    def unpack_decision_payload(self, value: Any) -> Any:
+        """按分块占位符还原 input_data / output_recommendation"""
+        return self.decision_blobs.unpack(value)
+
+    def _unpack_decision(self, decision):
+        for column in self.DECISION_PAYLOAD_COLUMNS:
+            setattr(decision, column, self.unpack_decision_payload(getattr(decision, column)))
+        return decision
+
     def log_decision(self, decision_data: dict):
         """记录AI决策"""
-        with self.get_session() as session:
-            try:
-                decision = AIDecision(**decision_data)
-                session.add(decision)
-                logger.info(f"Logged AI decision: {decision_data.get('decision_type')}")
-            except Exception as e:
-                logger.error(f"Failed to log AI decision: {e}")
+        try:
+            # 分块写入与决策入库之间不能插入回收 (见 sweep_decision_blobs)
+            with self._decision_pack_lock:
+                self._insert(AIDecision, self._pack_decision(decision_data))
+            logger.info(f"Logged AI decision: {decision_data.get('decision_type')}")
+        except Exception as e:
+            logger.error(f"Failed to log AI decision: {e}")
+
+    def log_decisions(self, decisions: List[dict]):
+        """批量记录AI决策 (如新闻采集)"""
+        try:
+            with self._decision_pack_lock:
+                self.bulk_insert(AIDecision, [self._pack_decision(d) for d in decisions])
+            logger.info(f"Logged {len(decisions)} AI decisions")
+        except Exception as e:
+            logger.error(f"Failed to log AI decisions: {e}")
 
     def get_decisions(self, limit: int = 50) -> List[AIDecision]:
         """获取最近的AI决策"""
+        self._flush_pending(AIDecision)
         with self.get_session() as session:
             decisions = session.query(AIDecision).order_by(AIDecision.timestamp.desc()).limit(limit).all()
             session.expunge_all()
-            return decisions
+        return [self._unpack_decision(d) for d in decisions]
+
+    def get_decisions_page(self, limit: int = 50, cursor: Optional[str] = None,
+                           decision_type: Optional[str] = None, include_details: bool = False):
+        """
+        AI 决策游标分页 (按时间倒序)
+        默认只投影摘要列 (reasoning / action.type / technical_summary 由数据库从 JSON 中提取)，
+        不加载完整的 input_data / output_recommendation；完整内容通过 get_decision(id) 获取
+        :return: (rows, next_cursor)
+        """
+        self._flush_pending(AIDecision)
+        query = self._decisions_page_query(limit, cursor, decision_type, include_details)
+        with self.get_session() as session:
+            rows = session.execute(query).all()
+        if include_details:
+            rows = [
+                SimpleNamespace(**dict(r._asdict(), output_recommendation=self.unpack_decision_payload(r.output_recommendation)))
+                for r in rows
+            ]
+        return split_page(rows, limit)
+
+    @staticmethod
+    def _decisions_page_query(limit: int, cursor: Optional[str], decision_type: Optional[str], include_details: bool):
+        """get_decisions_page 的查询 (摘要列由数据库从 JSON 中提取)"""
+        output = AIDecision.output_recommendation
+        columns = [AIDecision.id, AIDecision.decision_type, AIDecision.layer, AIDecision.confidence, AIDecision.timestamp]
+        if include_details:
+            columns.append(output.label("output_recommendation"))
+        else:
+            # Agent 记录的决策把摘要键嵌套在 output_recommendation 下，取先出现的一个
+            nested = ("output_recommendation",)
+            columns += [
+                func.coalesce(output["reasoning"].as_string(),
+                              output[nested + ("reasoning",)].as_string()).label("reasoning"),
+                func.coalesce(output[("action", "type")].as_string(),
+                              output[nested + ("action", "type")].as_string()).label("action"),
+                # JSON 值的提取在 SQLite 中是 JSON_QUOTE(...)，缺失时为 'null' 而不是 NULL，不能用 coalesce
+                case((output["technical_summary"].as_string().is_not(None), output["technical_summary"]),
+                     else_=output[nested + ("technical_summary",)]).label("technical_summary"),
+            ]
+        query = select(*columns)
+        if decision_type:
+            query = query.where(AIDecision.decision_type == decision_type)
+        return keyset_page(query, AIDecision, cursor, limit)
+
+    def get_decision(self, decision_id: int) -> Optional[AIDecision]:
+        """按 ID 获取完整的AI决策"""
+        self._flush_pending(AIDecision)
+        with self.get_session() as session:
+            decision = session.get(AIDecision, decision_id)
+            if decision is not None:
+                session.expunge(decision)
+        return self._unpack_decision(decision) if decision is not None else None
+
+    def search_decisions(self, query: str, limit: int = 20, cursor: Optional[str] = None,
+                         decision_type: Optional[str] = None):
+        """
+        全文检索 AI 决策 (reasoning / thought_process / 新闻标题)，按相关度排序
+        :return: (rows, next_cursor)；查询为空或游标无效时抛出 ValueError
+        """
+        self._flush_pending(AIDecision)
+        return self.decision_search.search(query, limit=limit, cursor=cursor, decision_type=decision_type)
+
+    def sweep_decision_blobs(self) -> int:
+        """
+        回收不再被任何决策引用的分块 (由 RetentionEngine 在归档后调用)
+        引用计数按决策 ID 增量维护: 每轮只解析新增决策的骨架，已删除的决策只需对比 ID，
+        只检查引用归零的分块 (本进程首次回收时检查全部)
+        """
+        started_at = datetime.utcnow()
+        refs = self._decision_blob_refs
+        with self._decision_pack_lock:
+            # 之后写入的决策都会重新 upsert 其分块 (刷新 last_seen)，缓冲中的决策先落盘
+            self.decision_blobs.reset_known()
+            self._flush_pending(AIDecision)
+            # 此刻已打包的决策都已提交且 ID 不超过 upper
+            with self.get_session() as session:
+                upper = session.execute(select(func.max(AIDecision.id))).scalar() or 0
+        if self.shared_writers:
+            # 其他进程的插入可能以更小的 ID 稍后提交，不能只读增量
+            refs.reset()
+        with self.get_session() as session:
+            live_ids = set(session.execute(select(AIDecision.id).where(AIDecision.id <= refs.max_id)).scalars())
+            new_rows = session.execute(
+                select(AIDecision.id, AIDecision.input_data, AIDecision.output_recommendation)
+                .where(AIDecision.id > refs.max_id, AIDecision.id <= upper)
+            ).all()
+        refs.retain(live_ids)
+        for row_id, input_data, output in new_rows:
+            refs.add(row_id, self.decision_blobs.refs(input_data, output))
+        refs.max_id = max(refs.max_id, upper)
+        suspects = None if refs.full_scan else refs.take_released()
+        removed = self.decision_blobs.sweep(refs, started_at, suspects)
+        refs.full_scan = False
+        return removed
+
+    def get_communications_page(self, limit: int = 50, cursor: Optional[str] = None):
+        """
+        AI 通信记录游标分页 (按时间倒序，不含 content)
+        :return: (rows, next_cursor)
+        """
+        query = select(AICommunication.id, AICommunication.from_ai, AICommunication.to_ai,
+                       AICommunication.message_type, AICommunication.timestamp)
+        query = keyset_page(query, AICommunication, cursor, limit)
+        with self.get_session() as session:
+            rows = session.execute(query).all()
+        return split_page(rows, limit)
+
+    def get_communication(self, communication_id: int) -> Optional[AICommunication]:
+        """按 ID 获取完整的AI通信记录"""
+        with self.get_session() as session:
+            comm = session.get(AICommunication, communication_id)
+            if comm is not None:
+                session.expunge(comm)
+            return comm
 
     def get_communications(self, limit: int = 50) -> List[AICommunication]:
         """获取最近的AI通信记录"""
@@ -137,24 +586,20 @@ class DatabaseManager:
 
     # --- Config Operations ---
     def get_config(self, key: str, default: Any = None) -> str:
-        """获取配置值"""
-        with self.get_session() as session:
-            config = session.query(Config).filter(Config.config_key == key).first()
-            return config.config_value if config else default
+        """获取配置值 (读缓存)"""
+        return self.config_cache.get(key, default)
+
+    def get_all_config(self) -> dict:
+        """获取全部配置"""
+        return self.config_cache.get_all()
 
     def set_config(self, key: str, value: str):
-        """设置配置值"""
-        with self.get_session() as session:
-            try:
-                config = session.query(Config).filter(Config.config_key == key).first()
-                if config:
-                    config.config_value = value
-                else:
-                    config = Config(config_key=key, config_value=value)
-                    session.add(config)
+        """设置配置值 (写库后更新缓存，值未变化时不写库)"""
+        try:
+            if self.config_cache.set(key, value):
                 logger.info(f"Config updated: {key} = {value}")
-            except Exception as e:
-                logger.error(f"Failed to set config {key}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to set config {key}: {e}")
 
     # --- Trigger Operations ---
     def add_trigger(self, trigger_data: dict) -> int:
@@ -192,21 +637,10 @@ class DatabaseManager:
                 t.triggered_at = datetime.utcnow() if status == 'TRIGGERED' else None
 
     # --- Memory Operations ---
-    def add_memory(self, memory_data: dict):
-        """添加系统记忆"""
-        with self.get_session() as session:
-            try:
-                memory = Memory(**memory_data)
-                session.add(memory)
-            except Exception as e:
-                logger.error(f"Failed to add memory: {e}")
-
-    def get_recent_memories(self, limit: int = 10) -> List[Memory]:
+    # 记忆统一由 MemoryManager (src/memory) 写入，这里只提供按时间倒序的直接查询
+    def get_recent_memories(self, limit: int = 10, memory_type: Optional[str] = None) -> List[Memory]:
         """获取最近记忆"""
-        with self.get_session() as session:
-            mems = session.query(Memory).order_by(Memory.timestamp.desc()).limit(limit).all()
-            session.expunge_all()
-            return mems
+        return self.memories.recent(limit, memory_type)
 
-# 全局数据库实例
-db = DatabaseManager()
+# 全局数据库实例 (首次访问时才创建引擎，导入本模块没有副作用)
+db = LazyObject(DatabaseManager)
@@ -0,0 +1,44 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple, List
+
+from sqlalchemy import or_, and_
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """(timestamp, id) -> 不透明游标字符串"""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """游标字符串 -> (timestamp, id)，格式错误时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_page(query, model, cursor: Optional[str], limit: int):
+    """
+    按 (timestamp, id) 倒序的游标分页
+    相比 OFFSET，翻到多深都只需从索引定位到游标位置再读 limit 行。
+    (SQLite 的 timestamp 索引隐式包含 rowid，即 (timestamp, id) 复合索引；PostgreSQL 上见 models.keyset_index)
+    :return: 追加了游标条件、排序和 limit + 1 的查询 (多取一行用于判断是否还有下一页)
+    """
+    ts_col, id_col = model.timestamp, model.id
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        query = query.where(or_(ts_col < ts, and_(ts_col == ts, id_col < row_id)))
+    return query.order_by(ts_col.desc(), id_col.desc()).limit(limit + 1)
+
+
+def split_page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    """截取一页结果并生成下一页游标 (没有更多数据时为 None)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.timestamp, last.id)
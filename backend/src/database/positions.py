@@ -0,0 +1,182 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from sqlalchemy import insert, select
+
+from src.database.models import Position, Trade
+from src.utils.logger import logger
+
+POSITION_FIELDS = ["symbol", "amount", "avg_price", "current_price", "pnl", "realized_pnl", "update_time"]
+
+# 数量低于该值视为已平仓
+DUST_AMOUNT = 1e-12
+
+
+class PositionRepository:
+    """
+    持仓仓库
+
+    - 内存镜像: 首次访问时全量加载一次，之后按 symbol 直接读取，不再扫描整张 positions 表
+    - 成交更新: apply_fill 在进程内加锁完成 读-算-写，持仓 upsert 与成交记录在同一个事务中提交，
+      每笔成交只需一次数据库往返；事务失败时镜像保持不变
+    单进程 (SQLite) 时假设本进程是 positions 表的唯一写入方，外部修改后需调用 refresh()；
+    多进程共享数据库 (manager.shared_writers) 时读取直接查库，成交在事务内行锁后再计算。
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.shared = getattr(manager, "shared_writers", False)
+        self._lock = threading.RLock()
+        self._mirror: Optional[Dict[str, Dict[str, Any]]] = None
+
+    # --- Mirror ---
+    def _positions(self) -> Dict[str, Dict[str, Any]]:
+        if self._mirror is None:
+            self.refresh()
+        return self._mirror
+
+    def refresh(self):
+        """从数据库重新加载镜像"""
+        with self._lock:
+            with self.manager.get_session() as session:
+                rows = session.query(Position).all()
+                self._mirror = {p.symbol: {f: getattr(p, f) for f in POSITION_FIELDS} for p in rows}
+        logger.debug(f"Position mirror loaded ({len(self._mirror)} symbols)")
+
+    @staticmethod
+    def _to_model(snapshot: Dict[str, Any]) -> Position:
+        # 返回独立的 (transient) 对象，调用方修改不会影响镜像
+        return Position(**snapshot)
+
+    @staticmethod
+    def _row_query(symbol: str, for_update: bool = False):
+        query = select(Position).where(Position.symbol == symbol)
+        return query.with_for_update() if for_update else query
+
+    @classmethod
+    def _read_row(cls, session, symbol: str, for_update: bool = False) -> Optional[Dict[str, Any]]:
+        row = session.execute(cls._row_query(symbol, for_update)).scalar_one_or_none()
+        return {f: getattr(row, f) for f in POSITION_FIELDS} if row else None
+
+    def get(self, symbol: str) -> Optional[Position]:
+        if self.shared:
+            # 其他进程可能刚写入，按主键直接查库
+            with self.manager.get_session() as session:
+                snapshot = self._read_row(session, symbol)
+        else:
+            with self._lock:
+                snapshot = self._positions().get(symbol)
+        return self._to_model(snapshot) if snapshot else None
+
+    def get_all(self) -> List[Position]:
+        with self._lock:
+            if self.shared:
+                self.refresh()
+            snapshots = list(self._positions().values())
+        return [self._to_model(s) for s in snapshots]
+
+    # --- Writes ---
+    def _current(self, session, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        读-算-写的起点
+        多进程共享数据库时在事务内锁定并读取最新持仓行 (SELECT ... FOR UPDATE)，否则直接读镜像
+        """
+        if not self.shared:
+            return self._positions().get(symbol)
+        # 新币种先插入空行，保证并发的首笔成交也能锁到同一行
+        stmt = self.manager._upsert_stmt(Position, ["symbol"], [])
+        session.execute(stmt, [{"symbol": symbol, "amount": 0.0, "avg_price": 0.0, "current_price": 0.0,
+                                "pnl": 0.0, "realized_pnl": 0.0}])
+        return self._read_row(session, symbol, for_update=True)
+
+    def _write(self, session, snapshot: Dict[str, Any], trade: Optional[Dict[str, Any]] = None):
+        """在调用方的事务中写入持仓 (upsert) 与可选的成交记录"""
+        stmt = self.manager._upsert_stmt(Position, ["symbol"], POSITION_FIELDS[1:])
+        session.execute(stmt, [snapshot])
+        if trade is not None:
+            session.execute(insert(Trade), [trade])
+
+    def set(self, symbol: str, amount: float, avg_price: float, current_price: float) -> Position:
+        """直接覆盖持仓 (已实现盈亏保持不变)"""
+        with self._lock:
+            with self.manager.get_session() as session:
+                old = self._current(session, symbol)
+                snapshot = {
+                    "symbol": symbol,
+                    "amount": amount,
+                    "avg_price": avg_price,
+                    "current_price": current_price,
+                    # 简单计算未实现盈亏: (当前价格 - 平均价格) * 数量
+                    "pnl": (current_price - avg_price) * amount,
+                    "realized_pnl": (old["realized_pnl"] or 0.0) if old else 0.0,
+                    "update_time": datetime.utcnow(),
+                }
+                self._write(session, snapshot)
+            # 事务提交成功后才更新镜像
+            self._positions()[symbol] = snapshot
+        return self._to_model(snapshot)
+
+    @staticmethod
+    def _fill(old: Optional[Dict[str, Any]], symbol: str, side: str, quantity: float, price: float):
+        """计算成交后的持仓快照，返回 (snapshot, 本笔已实现盈亏)"""
+        old_amount = old["amount"] if old else 0.0
+        old_avg = old["avg_price"] if old else 0.0
+        realized_total = (old["realized_pnl"] or 0.0) if old else 0.0
+
+        realized = 0.0
+        if side == "BUY":
+            # 移动平均成本法
+            total_cost = (old_amount * old_avg) + (quantity * price)
+            new_amount = old_amount + quantity
+            new_avg = total_cost / new_amount if new_amount > 0 else 0.0
+        elif side == "SELL":
+            closed = min(quantity, old_amount)
+            realized = (price - old_avg) * closed
+            new_amount = max(0.0, old_amount - quantity)
+            new_avg = old_avg if new_amount > DUST_AMOUNT else 0.0
+        else:
+            raise ValueError(f"Unknown trade side: {side}")
+
+        snapshot = {
+            "symbol": symbol,
+            "amount": new_amount,
+            "avg_price": new_avg,
+            "current_price": price,  # 最近成交价作为标记价格
+            "pnl": (price - new_avg) * new_amount,
+            "realized_pnl": realized_total + realized,
+            "update_time": datetime.utcnow(),
+        }
+        return snapshot, realized
+
+    def apply_fill(self, symbol: str, side: str, quantity: float, price: float,
+                   trade: Optional[Dict[str, Any]] = None) -> Position:
+        """
+        按成交更新持仓
+        BUY: 加权平均成本; SELL: 成本不变，按 (成交价 - 均价) * 平仓数量 计入已实现盈亏，清仓后均价归零
+        :param trade: 若提供，作为 Trade 记录在同一事务中写入 (自动补充 realized_pnl)
+        """
+        side = side.name if hasattr(side, "name") else str(side).upper()
+        stats = self.manager.trade_stats
+        with self._lock:
+            stats.ensure_loaded()
+            with self.manager.get_session() as session:
+                old = self._current(session, symbol)
+                snapshot, realized = self._fill(old, symbol, side, quantity, price)
+                if trade is not None:
+                    trade = dict(trade, realized_pnl=realized)
+                    if trade.get("timestamp") is None:
+                        trade["timestamp"] = snapshot["update_time"]
+                self._write(session, snapshot, trade)
+            self._positions()[symbol] = snapshot
+            if trade is not None:
+                # 只统计实际写入 trades 表的成交 (与重新聚合的结果一致)
+                stats.record_fill(symbol, price, quantity, realized, trade["timestamp"])
+
+        old_amount = old["amount"] if old else 0.0
+        old_avg = old["avg_price"] if old else 0.0
+        logger.info(
+            f"Position Update [{side}]: {symbol} {old_amount}->{snapshot['amount']}, "
+            f"Avg {old_avg:.2f}->{snapshot['avg_price']:.2f}, Realized {realized:+.2f}"
+        )
+        return self._to_model(snapshot)
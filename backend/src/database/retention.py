@@ -0,0 +1,353 @@
+import asyncio
+import calendar
+import glob
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+from sqlalchemy import select, delete, text, func
+
+from src.database.models import MarketData, Kline, AIDecision
+from src.database.operations import DatabaseManager, db, backend_root
+from src.database.engine import load_database_config
+from src.utils.logger import logger, setup_logger
+
+# 默认保留策略 (可在 config.yaml database.retention 中覆盖)
+DEFAULT_RETENTION_POLICY: Dict[str, Any] = {
+    "interval_minutes": 60,           # 后台维护周期
+    "market_data": {
+        "raw_days": 7,                # 原始 tick 保留天数
+        "bar_interval": "1h",         # 超期 tick 降采样为该周期的 OHLC K线 (写入 klines 表)
+    },
+    "ai_decisions": {
+        "hot_days": 30,               # 数据库中保留的决策天数，更早的移入归档文件
+        "batch_size": 5000,           # 单个归档文件的最大行数
+    },
+    "archive_dir": os.path.join(backend_root, "data", "archive"),
+    "vacuum_pages": 2000,             # 每轮增量 VACUUM 回收的页数
+}
+
+BAR_INTERVAL_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000}
+
+DECISION_COLUMNS = ["id", "decision_type", "layer", "confidence", "timestamp", "input_data", "output_recommendation"]
+
+
+def _to_epoch_ms(dt: datetime) -> int:
+    """UTC datetime (naive 视为 UTC) -> 毫秒时间戳"""
+    return calendar.timegm(dt.utctimetuple()) * 1000 + dt.microsecond // 1000
+
+
+def _merge_policy(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+class RetentionEngine:
+    """
+    数据保留引擎
+
+    1. market_data: 超过 raw_days 的 tick 聚合为 OHLC K线 (klines 表) 后删除
+    2. ai_decisions: 超过 hot_days 的决策整行写入压缩的列式归档文件后删除，并回收无引用的上下文分块
+    3. 增量 VACUUM 回收空闲页
+    归档数据仍可通过 query_decisions() 与库内数据统一查询。
+    """
+
+    def __init__(self, manager: Optional[DatabaseManager] = None, policy: Optional[Dict[str, Any]] = None):
+        self.manager = manager if manager is not None else db
+        config_policy = load_database_config().get('retention', {}) or {}
+        self.policy = _merge_policy(_merge_policy(DEFAULT_RETENTION_POLICY, config_policy), policy or {})
+        self.archive_dir = os.path.join(self.policy["archive_dir"], "ai_decisions")
+        self._vacuum_warned = False
+
+    # --- Market Data Downsampling ---
+    def downsample_market_data(self, now: Optional[datetime] = None) -> int:
+        """
+        将过期的 market_data tick 降采样为 OHLC K线并删除原始行
+        :return: 删除的 tick 数
+        """
+        now = now or datetime.utcnow()
+        cfg = self.policy["market_data"]
+        interval = cfg["bar_interval"]
+        bar_ms = BAR_INTERVAL_MS[interval]
+        # 截止时间对齐到 K线边界，避免同一根K线被拆到两次处理中
+        cutoff_ms = (_to_epoch_ms(now - timedelta(days=cfg["raw_days"])) // bar_ms) * bar_ms
+        cutoff = datetime.utcfromtimestamp(cutoff_ms / 1000)
+
+        with self.manager.get_session() as session:
+            oldest = session.query(func.min(MarketData.timestamp)).filter(MarketData.timestamp < cutoff).scalar()
+        if oldest is None:
+            return 0
+
+        # 按天分批处理 (窗口边界同样对齐K线)，避免一次性载入全部历史 tick
+        window_ms = max(bar_ms, (86_400_000 // bar_ms) * bar_ms)
+        window_start_ms = (_to_epoch_ms(oldest) // bar_ms) * bar_ms
+        total = bar_count = 0
+        while window_start_ms < cutoff_ms:
+            window_end_ms = min(window_start_ms + window_ms, cutoff_ms)
+            ticks, bars = self._downsample_window(
+                datetime.utcfromtimestamp(window_start_ms / 1000),
+                datetime.utcfromtimestamp(window_end_ms / 1000),
+                interval, bar_ms,
+            )
+            total += ticks
+            bar_count += bars
+            window_start_ms = window_end_ms
+
+        if total:
+            logger.info(f"Retention: downsampled {total} market_data ticks into {bar_count} {interval} bars.")
+        return total
+
+    def _downsample_window(self, start: datetime, end: datetime, interval: str, bar_ms: int):
+        """聚合 [start, end) 内的 tick，返回 (删除的 tick 数, 生成的K线数)"""
+        query = (
+            select(MarketData.id, MarketData.symbol, MarketData.price, MarketData.timestamp)
+            .where(MarketData.timestamp >= start, MarketData.timestamp < end)
+            .order_by(MarketData.symbol, MarketData.timestamp)
+        )
+        with self.manager.get_session() as session:
+            rows = session.execute(query).all()
+        if not rows:
+            return 0, 0
+
+        ids = [r.id for r in rows]
+        symbols = np.array([r.symbol for r in rows])
+        prices = np.fromiter((r.price for r in rows), dtype=np.float64, count=len(rows))
+        buckets = np.fromiter(
+            (_to_epoch_ms(r.timestamp) // bar_ms for r in rows), dtype=np.int64, count=len(rows)
+        )
+
+        # 行已按 (symbol, timestamp) 排序，symbol 或 bucket 变化处即为新K线起点
+        starts = np.flatnonzero(np.r_[True, (symbols[1:] != symbols[:-1]) | (buckets[1:] != buckets[:-1])])
+        ends = np.r_[starts[1:], len(rows)] - 1
+        highs = np.maximum.reduceat(prices, starts)
+        lows = np.minimum.reduceat(prices, starts)
+        counts = np.diff(np.r_[starts, len(rows)])
+
+        bars = []
+        for i, (s, e) in enumerate(zip(starts.tolist(), ends.tolist())):
+            open_time = int(buckets[s]) * bar_ms
+            bars.append({
+                "symbol": str(symbols[s]),
+                "interval": interval,
+                "open_time": open_time,
+                "open": float(prices[s]),
+                "high": float(highs[i]),
+                "low": float(lows[i]),
+                "close": float(prices[e]),
+                "volume": 0.0,  # market_data 只有 24h 滚动成交量，无法还原单根K线成交量
+                "close_time": open_time + bar_ms - 1,
+                "trades": int(counts[i]),
+            })
+
+        # 交易所K线更准确: 已存在的 K线保持不变
+        stmt = self.manager._upsert_stmt(Kline, ["symbol", "interval", "open_time"], [])
+        with self.manager.get_session() as session:
+            session.execute(stmt, bars)
+            for i in range(0, len(ids), 5000):
+                session.execute(delete(MarketData).where(MarketData.id.in_(ids[i:i + 5000])))
+        return len(ids), len(bars)
+
+    # --- AI Decision Archival ---
+    def archive_decisions(self, now: Optional[datetime] = None) -> int:
+        """
+        将超过 hot_days 的 AI 决策写入归档文件 (gzip 压缩的列式 JSON) 并从数据库删除
+        :return: 归档的行数
+        """
+        now = now or datetime.utcnow()
+        cfg = self.policy["ai_decisions"]
+        cutoff = now - timedelta(days=cfg["hot_days"])
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        total = 0
+        while True:
+            query = (
+                select(*[getattr(AIDecision, c) for c in DECISION_COLUMNS])
+                .where(AIDecision.timestamp < cutoff)
+                .order_by(AIDecision.timestamp, AIDecision.id)
+                .limit(cfg["batch_size"])
+            )
+            with self.manager.get_session() as session:
+                rows = session.execute(query).all()
+            if not rows:
+                break
+
+            self._write_archive(rows)
+            ids = [r.id for r in rows]
+            with self.manager.get_session() as session:
+                session.execute(delete(AIDecision).where(AIDecision.id.in_(ids)))
+            total += len(rows)
+            if len(rows) < cfg["batch_size"]:
+                break
+
+        if total:
+            logger.info(f"Retention: archived {total} ai_decisions older than {cutoff:%Y-%m-%d}.")
+        return total
+
+    def _write_archive(self, rows) -> str:
+        """写入单个归档文件 (先写临时文件再原子重命名，中途崩溃不会留下半个文件)"""
+        columns = {c: [] for c in DECISION_COLUMNS}
+        for r in rows:
+            for c in DECISION_COLUMNS:
+                value = getattr(r, c)
+                if c == "timestamp":
+                    value = value.isoformat()
+                elif c == "layer":
+                    value = value.value if hasattr(value, "value") else value
+                elif c in self.manager.DECISION_PAYLOAD_COLUMNS:
+                    # 归档文件自包含: 还原分块后写入
+                    value = self.manager.unpack_decision_payload(value)
+                columns[c].append(value)
+
+        first, last = rows[0].timestamp, rows[-1].timestamp
+        name = f"ai_decisions_{first:%Y%m%d%H%M%S}_{last:%Y%m%d%H%M%S}_{rows[0].id}.json.gz"
+        path = os.path.join(self.archive_dir, name)
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"version": 1, "columns": columns}, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        return path
+
+    def _archive_files(self, start: Optional[datetime], end: Optional[datetime]) -> List[tuple]:
+        """按文件名中的时间范围筛选需要读取的归档文件: [(first, last, path)]，按 last 倒序"""
+        files = []
+        for path in glob.glob(os.path.join(self.archive_dir, "ai_decisions_*.json.gz")):
+            # ai_decisions_<first>_<last>_<first_id>.json.gz
+            parts = os.path.basename(path)[:-len(".json.gz")].split("_")
+            try:
+                first = datetime.strptime(parts[2], "%Y%m%d%H%M%S")
+                last = datetime.strptime(parts[3], "%Y%m%d%H%M%S")
+            except (IndexError, ValueError):
+                continue
+            if start and last < start.replace(microsecond=0):
+                continue
+            if end and first > end:
+                continue
+            files.append((first, last, path))
+        files.sort(key=lambda f: (f[1], f[0]), reverse=True)
+        return files
+
+    def query_decisions(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        decision_type: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        统一查询: 合并数据库中的热数据与归档文件中的历史决策 (按时间倒序)
+        归档文件从新到旧读取，已凑满 limit 行且下一个文件整体更旧时停止 (不打开其余文件)
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+
+        query = select(*[getattr(AIDecision, c) for c in DECISION_COLUMNS])
+        if start:
+            query = query.where(AIDecision.timestamp >= start)
+        if end:
+            query = query.where(AIDecision.timestamp <= end)
+        if decision_type:
+            query = query.where(AIDecision.decision_type == decision_type)
+        query = query.order_by(AIDecision.timestamp.desc()).limit(limit)
+        with self.manager.get_session() as session:
+            for r in session.execute(query).all():
+                row = dict(r._mapping)
+                row["layer"] = row["layer"].value if hasattr(row["layer"], "value") else row["layer"]
+                for c in self.manager.DECISION_PAYLOAD_COLUMNS:
+                    row[c] = self.manager.unpack_decision_payload(row[c])
+                row["archived"] = False
+                results[row["id"]] = row
+
+        for _, last, path in self._archive_files(start, end):
+            if len(results) >= limit:
+                # 文件名中的时间截断到秒，last 之后一秒内的记录仍可能在该文件中
+                cutoff = sorted((r["timestamp"] for r in results.values()), reverse=True)[limit - 1]
+                if last + timedelta(seconds=1) <= cutoff:
+                    break
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                columns = json.load(f)["columns"]
+            for i in range(len(columns["id"])):
+                if columns["id"][i] in results:
+                    continue  # 库内数据优先 (归档后删除前崩溃会出现重复)
+                ts = datetime.fromisoformat(columns["timestamp"][i])
+                if (start and ts < start) or (end and ts > end):
+                    continue
+                if decision_type and columns["decision_type"][i] != decision_type:
+                    continue
+                row = {c: columns[c][i] for c in DECISION_COLUMNS}
+                row["timestamp"] = ts
+                row["archived"] = True
+                results[row["id"]] = row
+
+        ordered = sorted(results.values(), key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+        return ordered[:limit]
+
+    # --- Vacuum ---
+    def incremental_vacuum(self) -> None:
+        """
+        增量回收 SQLite 空闲页
+        新库在建表前由连接 PRAGMA 设为 auto_vacuum=INCREMENTAL；旧库需要一次完整 VACUUM 才能切换，
+        该操作长时间独占数据库，这里只告警跳过，由维护命令离线执行 (enable_incremental_vacuum)
+        """
+        if self.manager.engine.dialect.name != "sqlite":
+            return
+        with self.manager.engine.connect() as conn:
+            if conn.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+                if not self._vacuum_warned:
+                    logger.warning("Retention: database is not in incremental auto_vacuum mode, skipping vacuum. "
+                                   "Stop the app and run: python -m src.database.retention --enable-incremental-vacuum")
+                    self._vacuum_warned = True
+                return
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(self.policy['vacuum_pages'])})")
+
+    def enable_incremental_vacuum(self) -> bool:
+        """离线维护: 一次完整 VACUUM 将旧库切换为 auto_vacuum=INCREMENTAL (需先停止应用)；返回是否执行了切换"""
+        if self.manager.engine.dialect.name != "sqlite":
+            return False
+        with self.manager.engine.connect() as conn:
+            if conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+                return False
+            logger.warning("Retention: full VACUUM to enable incremental auto_vacuum...")
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        self._vacuum_warned = False
+        return True
+
+    # --- Scheduling ---
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        stats = {
+            "market_data_downsampled": self.downsample_market_data(now),
+            "ai_decisions_archived": self.archive_decisions(now),
+            "decision_blobs_removed": self.manager.sweep_decision_blobs(),
+        }
+        self.incremental_vacuum()
+        return stats
+
+    async def run_forever(self):
+        """后台定时维护任务 (在线程中执行，避免阻塞事件循环)"""
+        interval = self.policy["interval_minutes"] * 60
+        while True:
+            try:
+                stats = await asyncio.to_thread(self.run_once)
+                logger.info(f"Retention cycle finished: {stats}")
+            except Exception as e:
+                logger.error(f"Retention cycle failed: {e}")
+            await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="数据保留维护命令")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="一次性完整 VACUUM，将旧库切换为 auto_vacuum=INCREMENTAL (需先停止应用)")
+    parser.add_argument("--run-once", action="store_true", help="立即执行一轮保留维护")
+    args = parser.parse_args()
+    setup_logger()
+    engine = RetentionEngine()
+    if args.enable_incremental_vacuum:
+        logger.info(f"Incremental auto_vacuum {'enabled' if engine.enable_incremental_vacuum() else 'already enabled'}.")
+    if args.run_once:
+        logger.info(f"Retention cycle finished: {engine.run_once()}")
+
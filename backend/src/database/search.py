@@ -0,0 +1,249 @@
+import base64
+import re
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text, DateTime, Float
+
+from src.database.models import AIDecision
+from src.utils.logger import logger
+
+# 参与全文检索的字段 (在 input_data / output_recommendation 中任意层级出现即收录)
+# reasoning: 各 Agent 的推理; thought_process: Coordinator 的思考过程; title: NEWS_EVENT 新闻标题
+SEARCH_KEYS = ("reasoning", "thought_process", "title")
+MAX_WALK_DEPTH = 4
+
+FTS_TABLE = "ai_decisions_fts"
+FTS_TOKENIZER = "unicode61"
+BACKFILL_BATCH = 2000
+
+# unicode61 会把连续的中文当成一个词，写入前在每个汉字两侧加空格 (单字成词)，
+# 查询时中文词转为相邻单字的短语匹配，任意长度的中文词都能走索引
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_CJK_CHAR = re.compile(f"([{_CJK}])")
+# 片段中还原中文: 去掉两个汉字之间 (含高亮标记) 的空格
+_CJK_GAPS = [
+    re.compile(f"(?<=[{_CJK}]) +(?=[{_CJK}])"),
+    re.compile(f"(?<=[{_CJK}])\\] +\\[(?=[{_CJK}])"),
+    re.compile(f"(?<=[{_CJK}]) +(?=\\[[{_CJK}])"),
+    re.compile(f"(?<=[{_CJK}]\\]) +(?=[{_CJK}])"),
+    re.compile(f"(?<=[{_CJK}\\]]) +(?=[,.;:!?)，。；：！？）])"),
+]
+
+
+def segment(text: str) -> str:
+    """中文按字切分 (用于写入 search_text 与构造查询)"""
+    return " ".join(_CJK_CHAR.sub(r" \1 ", text).split())
+
+
+def join_cjk(snippet: Optional[str]) -> Optional[str]:
+    """还原 snippet 中被切分的中文"""
+    if not snippet:
+        return snippet
+    for pattern in _CJK_GAPS:
+        snippet = pattern.sub("", snippet)
+    return snippet
+
+
+def extract_search_text(decision: Dict[str, Any]) -> Optional[str]:
+    """从决策载荷中收集需要检索的文本 (写入 ai_decisions.search_text)"""
+    parts: List[str] = []
+
+    def walk(value: Any, depth: int):
+        if depth > MAX_WALK_DEPTH or not isinstance(value, dict):
+            return
+        for key, item in value.items():
+            if key in SEARCH_KEYS and isinstance(item, str) and item.strip():
+                parts.append(item.strip())
+            elif isinstance(item, dict):
+                walk(item, depth + 1)
+
+    for column in ("input_data", "output_recommendation"):
+        walk(decision.get(column), 0)
+    return segment("\n".join(parts)) or None
+
+
+def _terms(query: str) -> List[str]:
+    terms = [t for t in query.split() if t]
+    if not terms:
+        raise ValueError("Empty search query")
+    return terms
+
+
+def build_match_query(terms: List[str]) -> str:
+    """
+    用户输入 -> FTS5 MATCH 表达式
+    每个词作为短语引用 (避免语法注入)，词之间为 AND；英文词按前缀匹配 (approv -> approval)，
+    中文词为相邻单字组成的短语
+    """
+    phrases = []
+    for term in terms:
+        phrase = '"' + segment(term).replace('"', '""') + '"'
+        if not _CJK_CHAR.search(term[-1]):
+            phrase += "*"
+        phrases.append(phrase)
+    return " ".join(phrases)
+
+
+def encode_score_cursor(score: float, row_id: int) -> str:
+    raw = f"{score!r}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_score_cursor(cursor: str) -> Tuple[float, int]:
+    """游标字符串 -> (score, id)，格式错误时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return float(score), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class DecisionSearch:
+    """
+    AI 决策全文检索
+
+    SQLite: FTS5 外部内容表 (content=ai_decisions) 索引 search_text 列，由触发器随决策的
+    插入 / 删除 (含归档) / 更新同步，按 bm25 排序。
+    PostgreSQL: search_text 上的 GIN 表达式索引 (to_tsvector)，按 ts_rank 排序。
+    结果按 (score, id) 游标分页。
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    @property
+    def dialect(self) -> str:
+        return self.manager.engine.dialect.name
+
+    # --- Schema ---
+    def install(self):
+        """创建 FTS5 表与同步触发器 (幂等)；首次创建时为已有决策补全 search_text 并重建索引"""
+        if self.dialect != "sqlite":
+            return
+        with self.manager.engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first()
+            if exists:
+                return
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"search_text, content='ai_decisions', content_rowid='id', tokenize='{FTS_TOKENIZER}')"
+            )
+            conn.exec_driver_sql(f"""
+                CREATE TRIGGER IF NOT EXISTS ai_decisions_fts_ai AFTER INSERT ON ai_decisions
+                WHEN new.search_text IS NOT NULL BEGIN
+                    INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+                END""")
+            conn.exec_driver_sql(f"""
+                CREATE TRIGGER IF NOT EXISTS ai_decisions_fts_ad AFTER DELETE ON ai_decisions
+                WHEN old.search_text IS NOT NULL BEGIN
+                    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+                END""")
+            conn.exec_driver_sql(f"""
+                CREATE TRIGGER IF NOT EXISTS ai_decisions_fts_au AFTER UPDATE OF search_text ON ai_decisions BEGIN
+                    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text)
+                        SELECT 'delete', old.id, old.search_text WHERE old.search_text IS NOT NULL;
+                    INSERT INTO {FTS_TABLE}(rowid, search_text)
+                        SELECT new.id, new.search_text WHERE new.search_text IS NOT NULL;
+                END""")
+        self.backfill()
+        with self.manager.engine.begin() as conn:
+            conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        logger.info("Decision full-text index created.")
+
+    def backfill(self) -> int:
+        """为旧决策 (search_text 为空) 从载荷中提取检索文本"""
+        total, last_id = 0, 0
+        query = text(
+            "SELECT id, input_data, output_recommendation FROM ai_decisions "
+            "WHERE search_text IS NULL AND id > :last ORDER BY id LIMIT :n"
+        )
+        column = AIDecision.__table__.c
+        while True:
+            with self.manager.get_session() as session:
+                rows = session.execute(
+                    query.columns(column.id, column.input_data, column.output_recommendation),
+                    {"last": last_id, "n": BACKFILL_BATCH},
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                updates = []
+                for row in rows:
+                    payload = {c: self.manager.unpack_decision_payload(getattr(row, c))
+                               for c in ("input_data", "output_recommendation")}
+                    search_text = extract_search_text(payload)
+                    if search_text:
+                        updates.append({"row_id": row.id, "search_text": search_text})
+                if updates:
+                    session.execute(text("UPDATE ai_decisions SET search_text = :search_text WHERE id = :row_id"), updates)
+                total += len(updates)
+        if total:
+            logger.info(f"Backfilled search text for {total} decisions.")
+        return total
+
+    # --- Query ---
+    def search(self, query: str, limit: int = 20, cursor: Optional[str] = None,
+               decision_type: Optional[str] = None):
+        """
+        全文检索决策，按相关度排序 (score 越小越相关)
+        :return: (rows, next_cursor)，rows 含 id / decision_type / layer / confidence / timestamp / score / snippet
+        """
+        terms = _terms(query)
+        after = decode_score_cursor(cursor) if cursor else None
+        if self.dialect == "sqlite":
+            sql, params = self._sqlite_query(terms, decision_type, after)
+        else:
+            sql, params = self._postgres_query(terms, decision_type, after)
+        params["limit"] = limit + 1
+        stmt = text(sql).columns(timestamp=DateTime, score=Float)
+        with self.manager.get_session() as session:
+            rows = [
+                SimpleNamespace(**dict(r._asdict(), snippet=join_cjk(r.snippet)))
+                for r in session.execute(stmt, params)
+            ]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_score_cursor(rows[-1].score, rows[-1].id)
+        return rows, next_cursor
+
+    @staticmethod
+    def _filters(decision_type: Optional[str], after: Optional[Tuple[float, int]], score_expr: str,
+                 where: List[str], params: Dict[str, Any]):
+        if decision_type:
+            where.append("d.decision_type = :decision_type")
+            params["decision_type"] = decision_type
+        if after:
+            where.append(f"({score_expr} > :after_score OR ({score_expr} = :after_score AND d.id > :after_id))")
+            params["after_score"], params["after_id"] = after
+
+    def _sqlite_query(self, terms: List[str], decision_type: Optional[str], after):
+        params: Dict[str, Any] = {"match": build_match_query(terms)}
+        where = [f"{FTS_TABLE} MATCH :match"]
+        score = f"bm25({FTS_TABLE})"
+        self._filters(decision_type, after, score, where, params)
+        sql = (
+            f"SELECT d.id, d.decision_type, d.layer, d.confidence, d.timestamp, {score} AS score, "
+            f"snippet({FTS_TABLE}, 0, '[', ']', '…', 24) AS snippet "
+            f"FROM {FTS_TABLE} JOIN ai_decisions d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {' AND '.join(where)} ORDER BY score, d.id LIMIT :limit"
+        )
+        return sql, params
+
+    def _postgres_query(self, terms: List[str], decision_type: Optional[str], after):
+        params: Dict[str, Any] = {"query": segment(" ".join(terms))}
+        vector = "to_tsvector('simple', coalesce(d.search_text, ''))"
+        tsquery = "plainto_tsquery('simple', :query)"
+        score = f"(-ts_rank({vector}, {tsquery}))"
+        where = [f"{vector} @@ {tsquery}"]
+        self._filters(decision_type, after, score, where, params)
+        sql = (
+            f"SELECT d.id, d.decision_type, d.layer, d.confidence, d.timestamp, {score} AS score, "
+            f"ts_headline('simple', d.search_text, {tsquery}, 'StartSel=[, StopSel=], MaxWords=24') AS snippet "
+            f"FROM ai_decisions d WHERE {' AND '.join(where)} ORDER BY score, d.id LIMIT :limit"
+        )
+        return sql, params
@@ -0,0 +1,144 @@
+import bisect
+import threading
+import time
+from collections import deque, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from src.utils.logger import logger
+
+# 滑动窗口长度 (秒)
+HOUR_SECONDS = 3600
+# 多进程共享数据库时，其他进程的成交不会经过本进程，按该周期 (秒) 从数据库重新聚合
+SHARED_RELOAD_SECONDS = 5.0
+
+
+def _utc_day_start(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class TradeStats:
+    """
+    交易滚动统计 (风控热路径使用)
+
+    首次访问时用 SQL 聚合从 trades 表加载一次当日数据，之后每写入一笔成交记录
+    (DatabaseManager.record_trade / 带 trade 的 apply_fill) 同步更新，
+    下单前检查只读内存，不访问数据库:
+    - 当日 (UTC) 成交笔数 / 已实现盈亏 / 各币种成交额
+    - 最近 1 小时成交笔数 (滑动窗口)
+    跨越 UTC 零点时自动清零当日计数。
+    多进程共享数据库 (manager.shared_writers) 时每 SHARED_RELOAD_SECONDS 秒重新聚合一次。
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._lock = threading.Lock()
+        self._reload_seconds = SHARED_RELOAD_SECONDS if getattr(manager, "shared_writers", False) else None
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._day: Optional[datetime] = None
+        self._trades_today = 0
+        self._realized_today = 0.0
+        self._notional_today: Dict[str, float] = defaultdict(float)
+        self._recent: deque = deque()  # 最近 1 小时的成交时间 (epoch 秒, 递增)
+
+    # --- Loading ---
+    def _ensure_loaded(self, now: datetime):
+        if not self._loaded:
+            self._load(now)
+        elif self._reload_seconds and time.monotonic() - self._loaded_at > self._reload_seconds:
+            self._recent.clear()
+            self._load(now)
+        elif _utc_day_start(now) > self._day:
+            self._reset_day(now)
+
+    def _load(self, now: datetime):
+        day = _utc_day_start(now)
+        m = self.manager
+        self._reset_day(now)
+        self._trades_today = m.count_trades_since(day)
+        self._realized_today = m.get_daily_realized_pnl(since=day).get(day.date().isoformat(), 0.0)
+        self._notional_today.update(m.get_notional_by_symbol(since=day))
+        hour_ago = now - timedelta(seconds=HOUR_SECONDS)
+        self._recent.extend(
+            self._epoch(ts) for ts in m.get_trade_times_since(hour_ago)
+        )
+        self._loaded = True
+        self._loaded_at = time.monotonic()
+        logger.debug(f"Trade stats loaded: {self._trades_today} trades today, realized {self._realized_today:.2f}")
+
+    def _reset_day(self, now: datetime):
+        self._day = _utc_day_start(now)
+        self._trades_today = 0
+        self._realized_today = 0.0
+        self._notional_today.clear()
+
+    def ensure_loaded(self):
+        """确保已从数据库加载 (需在写入新成交之前调用，避免新成交被重复计数)"""
+        with self._lock:
+            self._ensure_loaded(datetime.utcnow())
+
+    def refresh(self, now: Optional[datetime] = None):
+        """从数据库重新加载 (外部写入 trades 表后调用)"""
+        with self._lock:
+            self._recent.clear()
+            self._load(now or datetime.utcnow())
+
+    @staticmethod
+    def _epoch(dt: datetime) -> float:
+        return (dt - datetime(1970, 1, 1)).total_seconds()
+
+    def _trim(self, now: datetime):
+        cutoff = self._epoch(now) - HOUR_SECONDS
+        while self._recent and self._recent[0] <= cutoff:
+            self._recent.popleft()
+
+    # --- Updates ---
+    def record_fill(self, symbol: str, price: float, quantity: float, realized_pnl: float = 0.0,
+                    timestamp: Optional[datetime] = None):
+        now = timestamp or datetime.utcnow()
+        with self._lock:
+            self._ensure_loaded(now)
+            if _utc_day_start(now) == self._day:
+                self._trades_today += 1
+                self._realized_today += realized_pnl or 0.0
+                self._notional_today[symbol] += price * quantity
+            epoch = self._epoch(now)
+            if not self._recent or epoch >= self._recent[-1]:
+                self._recent.append(epoch)
+            else:
+                bisect.insort(self._recent, epoch)  # 补录的历史成交，保持窗口有序
+
+    # --- Reads (O(1) amortized) ---
+    def trades_today(self, now: Optional[datetime] = None) -> int:
+        with self._lock:
+            self._ensure_loaded(now or datetime.utcnow())
+            return self._trades_today
+
+    def trades_last_hour(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.utcnow()
+        with self._lock:
+            self._ensure_loaded(now)
+            self._trim(now)
+            return len(self._recent)
+
+    def realized_pnl_today(self, now: Optional[datetime] = None) -> float:
+        with self._lock:
+            self._ensure_loaded(now or datetime.utcnow())
+            return self._realized_today
+
+    def notional_today(self, symbol: Optional[str] = None, now: Optional[datetime] = None):
+        with self._lock:
+            self._ensure_loaded(now or datetime.utcnow())
+            if symbol is not None:
+                return self._notional_today.get(symbol, 0.0)
+            return dict(self._notional_today)
+
+    def snapshot(self) -> Dict:
+        now = datetime.utcnow()
+        return {
+            "trades_today": self.trades_today(now),
+            "trades_last_hour": self.trades_last_hour(now),
+            "realized_pnl_today": self.realized_pnl_today(now),
+            "notional_today": self.notional_today(now=now),
+        }
@@ -0,0 +1,222 @@
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Type
+
+from sqlalchemy import insert
+
+from src.utils.logger import logger
+
+
+class TableMetrics:
+    """单表写入统计"""
+
+    def __init__(self):
+        self.rows_written = 0
+        self.batches = 0
+        self.failed_rows = 0
+        self.flush_seconds = 0.0
+        self.max_flush_ms = 0.0
+        self.queue_delay_seconds = 0.0  # 行从 submit 到落盘的累计等待时间
+        self.last_flush: Optional[datetime] = None
+
+    def to_dict(self, pending: int) -> Dict[str, Any]:
+        return {
+            "pending": pending,
+            "rows_written": self.rows_written,
+            "batches": self.batches,
+            "failed_rows": self.failed_rows,
+            "rows_per_sec": round(self.rows_written / self.flush_seconds, 1) if self.flush_seconds else 0.0,
+            "avg_batch_rows": round(self.rows_written / self.batches, 1) if self.batches else 0.0,
+            "avg_flush_ms": round(self.flush_seconds * 1000 / self.batches, 3) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_queue_delay_ms": round(self.queue_delay_seconds * 1000 / self.rows_written, 3) if self.rows_written else 0.0,
+            "last_flush": self.last_flush.isoformat() if self.last_flush else None,
+        }
+
+
+class WriteBehindBuffer:
+    """
+    写缓冲 (Write-Behind)
+
+    将逐行 INSERT 先缓存在内存中 (按表分组)，由后台线程每 flush_interval_ms 毫秒
+    或累计 batch_size 行时，以一次 executemany 事务批量写入。
+
+    - 背压: 待写入行数达到 max_pending 时，submit 会阻塞直到后台线程清空缓冲
+    - 关闭: close() / 进程退出 (atexit) 时会同步写完剩余数据
+    - 统计: get_metrics() 返回每张表的吞吐与延迟
+    """
+
+    def __init__(
+        self,
+        manager,
+        flush_interval_ms: int = 200,
+        batch_size: int = 1000,
+        max_pending: int = 50000,
+    ):
+        self.manager = manager
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+
+        self._pending: Dict[Type, List[tuple]] = defaultdict(list)
+        self._pending_count = 0
+        # 已被 flush 取出、尚未提交的行数 (读路径同样需要等待它们落盘)
+        self._inflight: Dict[Type, int] = defaultdict(int)
+        self._cond = threading.Condition()
+        # 同一时刻只允许一个 flush，保证写入顺序
+        self._flush_lock = threading.Lock()
+        self._metrics: Dict[str, TableMetrics] = defaultdict(TableMetrics)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Lifecycle ---
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        logger.info(
+            f"Write-behind buffer started (interval={self.flush_interval * 1000:.0f}ms, "
+            f"batch={self.batch_size}, max_pending={self.max_pending})"
+        )
+        return self
+
+    def close(self):
+        """停止后台线程并写完所有缓冲数据"""
+        if self._running:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+            if self._thread is not None:
+                self._thread.join()
+            atexit.unregister(self.close)
+        self.flush()
+
+    # --- Producer API ---
+    def submit(self, model: Type, row: Dict[str, Any]):
+        self.submit_many(model, [row])
+
+    def submit_many(self, model: Type, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        now = time.perf_counter()
+        stamped = [(self._stamp(model, row), now) for row in rows]
+
+        with self._cond:
+            # 背压: 缓冲已满时等待后台线程写出
+            while self._running and self._pending_count >= self.max_pending:
+                self._cond.notify_all()
+                self._cond.wait(timeout=self.flush_interval)
+
+            self._pending[model].extend(stamped)
+            self._pending_count += len(stamped)
+            if len(self._pending[model]) >= self.batch_size:
+                self._cond.notify_all()
+
+        if not self._running:
+            # 后台线程未启动 (或已关闭) 时同步写入，避免数据滞留
+            self.flush(model)
+
+    def pending(self, model: Optional[Type] = None) -> int:
+        """尚未提交的行数 (含正在写出的批次)"""
+        with self._cond:
+            if model is None:
+                return self._pending_count + sum(self._inflight.values())
+            return len(self._pending.get(model, ())) + self._inflight.get(model, 0)
+
+    # --- Flush ---
+    def flush(self, model: Optional[Type] = None):
+        """
+        立即写出缓冲数据
+        :param model: 仅写出指定表 (读路径在查询前调用，保证读到自己刚写入的数据)
+        """
+        with self._flush_lock:
+            with self._cond:
+                if model is None:
+                    batches = dict(self._pending)
+                    self._pending.clear()
+                else:
+                    rows = self._pending.pop(model, None)
+                    batches = {model: rows} if rows else {}
+                self._pending_count -= sum(len(rows) for rows in batches.values())
+                for table_model, rows in batches.items():
+                    self._inflight[table_model] += len(rows)
+                self._cond.notify_all()
+
+            for table_model, rows in batches.items():
+                try:
+                    for i in range(0, len(rows), self.batch_size):
+                        self._write_batch(table_model, rows[i:i + self.batch_size])
+                finally:
+                    with self._cond:
+                        self._inflight[table_model] -= len(rows)
+
+    def _write_batch(self, model: Type, batch: List[tuple]):
+        table = model.__tablename__
+        metrics = self._metrics[table]
+        rows = [row for row, _ in batch]
+        start = time.perf_counter()
+        try:
+            with self.manager.get_session() as session:
+                session.execute(insert(model), rows)
+            written = len(rows)
+        except Exception as e:
+            # 整批失败 (如唯一键冲突) 时逐行重试，隔离坏数据
+            logger.error(f"Batch insert into {table} failed ({len(rows)} rows), retrying row by row: {e}")
+            written = 0
+            for row in rows:
+                try:
+                    with self.manager.get_session() as session:
+                        session.execute(insert(model), [row])
+                    written += 1
+                except Exception as row_error:
+                    metrics.failed_rows += 1
+                    logger.error(f"Dropped row for {table}: {row_error}")
+
+        end = time.perf_counter()
+        elapsed = end - start
+        metrics.rows_written += written
+        metrics.batches += 1
+        metrics.flush_seconds += elapsed
+        metrics.max_flush_ms = max(metrics.max_flush_ms, elapsed * 1000)
+        metrics.queue_delay_seconds += sum(end - queued_at for _, queued_at in batch[:written])
+        metrics.last_flush = datetime.utcnow()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._running and not self._batch_ready():
+                    self._cond.wait(timeout=self.flush_interval)
+                running = self._running
+            if not running:
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush error: {e}")
+
+    def _batch_ready(self) -> bool:
+        return self._pending_count >= self.max_pending or any(
+            len(rows) >= self.batch_size for rows in self._pending.values()
+        )
+
+    @staticmethod
+    def _stamp(model: Type, row: Dict[str, Any]) -> Dict[str, Any]:
+        """时间戳取提交时刻而不是落盘时刻"""
+        if "timestamp" in model.__table__.c and row.get("timestamp") is None:
+            row = dict(row)
+            row["timestamp"] = datetime.utcnow()
+        return row
+
+    # --- Metrics ---
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """每张表的写入统计"""
+        with self._cond:
+            pending = {model.__tablename__: len(rows) for model, rows in self._pending.items()}
+        tables = set(self._metrics) | set(pending)
+        return {table: self._metrics[table].to_dict(pending.get(table, 0)) for table in sorted(tables)}
@@ -1,7 +1,7 @@
 import asyncio
 import os
 from src.execution.position_manager import PositionManager
-from src.utils.logger import logger
+from src.utils.logger import logger, setup_logger
 
 def run_demo():
     print("=== Position Manager Demo ===")
@@ -47,4 +47,5 @@ def run_demo():
 if __name__ == "__main__":
     # Ensure logs folder exists
     os.makedirs("data/logs", exist_ok=True)
+    setup_logger()
     run_demo()
@@ -174,43 +174,16 @@ class SimulatedPositionManager(BasePositionManager):
         qty = trade_data['quantity']
         price = trade_data['price']
         
-        # Get existing from DB
-        # Note: DB accessor in operations.py is simple 'update', we need manual calculation here
-        # or expand DB operations. 
-        # Here we do manual calc and call update.
-        
-        # 需要直接读取 DB 对象进行计算，operations里的 update_position 参数太简单，
-        # 我们这里先用 get_all 找到对应的，虽然效率低点但逻辑清晰
-        all_positions = self.db.get_all_positions()
-        target_pos = next((p for p in all_positions if p.symbol == symbol), None)
-        
-        current_amt = target_pos.amount if target_pos else 0.0
-        current_avg = target_pos.avg_price if target_pos else 0.0
+        # 持仓 (加权平均成本 / 已实现盈亏) 与成交记录在同一事务中更新
+        self.db.apply_fill(symbol, side, qty, price, trade=trade_data)
         
         if side == "BUY":
-            # 移动平均成本法
-            total_cost = (current_amt * current_avg) + (qty * price)
-            new_amt = current_amt + qty
-            new_avg = total_cost / new_amt if new_amt > 0 else 0.0
-            
             # deduction from balance
-            cost = qty * price
-            self.account_manager.update_simulated_balance(-cost)
-            
+            self.account_manager.update_simulated_balance(-qty * price)
         elif side == "SELL":
-            # 卖出不影响平均成本，但产生已实现盈亏
-            new_amt = current_amt - qty
-            new_avg = current_avg # Cost basis doesn't change on sell
-            if new_amt < 0: 
-                new_amt = 0 # Should validat before
-            
             # add to balance
-            revenue = qty * price
-            self.account_manager.update_simulated_balance(revenue)
+            self.account_manager.update_simulated_balance(qty * price)
             
-        # Update DB
-        self.db.update_position(symbol, new_amt, new_avg, price)
-        self.db.record_trade(trade_data)
         logger.info(f"Simulated position updated for {symbol}: {side} {qty} @ {price}")
 
     def get_summary(self) -> Dict:
@@ -31,26 +31,22 @@ class SafetyChecker:
 
     def check_daily_limit(self) -> bool:
         """检查今日交易次数是否超限"""
-        # 从数据库获取今日交易数量
-        # 这里简化处理：获取所有交易，按时间过滤。实际应在 DB 层做 select count where date
-        # 由于 db_operations.get_trades 只有 limit 限制，这里假设系统不频繁
-        # 正确做法是给 db_operations 加一个 count_daily_trades 方法
-        # 暂时跳过或假设 check passed，待 DB 完善。
-        # TODO: Implement accurate daily count in DB operations
-        
-        # 简易实现：如果不做 DB 改动，我们暂时认为总是通过，或者在此处增加 logger
-        logger.debug("Checking daily trade limit... (Mocked: PASS)")
+        # 读内存滚动计数 (成交时同步更新)，不访问数据库
+        count = self.db.trade_stats.trades_today()
+        if count >= self.max_daily_trades:
+            logger.warning(f"Daily trade limit reached: {count}/{self.max_daily_trades}")
+            return False
         return True
 
     def check_loss_threshold(self, account_info: Dict) -> bool:
         """检查当日亏损是否超过允许范围"""
-        # 需要 AccountManager 提供今日初始余额 vs 当前余额
-        # 或者 daily_stats 
-        # 这里仅检查 AccountManager 返回的 unrealized_pnl (如果有)
-        
-        # 如果是模拟盘，主要看 realized PnL
-        # 暂时简单处理：PASS
-        logger.debug("Checking loss threshold... (Mocked: PASS)")
+        # 当日 (UTC) 已实现盈亏 + 当前未实现盈亏
+        pnl = self.db.trade_stats.realized_pnl_today() + account_info.get("unrealized_pnl", 0.0)
+        equity = account_info.get("total_balance", 0.0)
+        if pnl < 0 and equity > 0 and -pnl / equity > self.max_daily_loss_pct:
+            logger.warning(f"Daily loss threshold hit: PnL {pnl:.2f} on equity {equity:.2f} "
+                           f"(limit {self.max_daily_loss_pct:.0%})")
+            return False
         return True
 
     def check_price_abnormal(self, current_price: float, order_price: float, threshold: float = 0.1) -> bool:
@@ -0,0 +1,115 @@
+from typing import Hashable, Sequence
+
+import numpy as np
+
+from .vector_index import spherical_kmeans
+
+
+def leader_clusters(vectors: np.ndarray, order: np.ndarray, threshold: float, block: int = 256) -> np.ndarray:
+    """
+    Threshold linkage to a leader, for normalized vectors.
+
+    Rows are visited in ``order`` (most representative first). A row not yet assigned
+    becomes a leader and takes every unassigned row whose cosine similarity to it is at
+    least ``threshold``. Every member is therefore close to its leader itself (no chaining
+    through intermediate rows). Leaders are processed ``block`` at a time, so the
+    similarities come from one matrix product per block.
+
+    Returns the leader row of each row (a leader maps to itself).
+    """
+    n = len(vectors)
+    labels = np.full(n, -1, dtype=np.int64)
+    for start in range(0, n, block):
+        leaders = order[start:start + block]
+        leaders = leaders[labels[leaders] < 0]
+        if not len(leaders):
+            continue
+        open_rows = np.flatnonzero(labels < 0)
+        sims = vectors[leaders] @ vectors[open_rows].T
+        for j, leader in enumerate(leaders):
+            if labels[leader] >= 0:
+                continue
+            hits = open_rows[sims[j] >= threshold]
+            labels[hits[labels[hits] < 0]] = leader
+            labels[leader] = leader
+    return labels
+
+
+def _partitioned_clusters(vectors: np.ndarray, order: np.ndarray, threshold: float, seed: int) -> np.ndarray:
+    """leader_clusters within each cell of a coarse spherical k-means partition (~sqrt(N) cells)."""
+    n = len(vectors)
+    k = max(2, int(np.sqrt(n)))
+    rng = np.random.default_rng(seed)
+    sample = vectors[np.sort(rng.choice(n, size=min(n, 64 * k), replace=False))]
+    centroids = spherical_kmeans(np.asarray(sample), k, seed=seed)
+    cells = np.empty(n, dtype=np.int64)
+    for start in range(0, n, 8192):
+        cells[start:start + 8192] = np.argmax(vectors[start:start + 8192] @ centroids.T, axis=1)
+
+    labels = np.empty(n, dtype=np.int64)
+    ordered_cells = cells[order]
+    for cell in np.unique(cells):
+        rows = np.flatnonzero(cells == cell)
+        cell_order = np.searchsorted(rows, order[ordered_cells == cell])  # global priority, local row numbers
+        labels[rows] = rows[leader_clusters(vectors[rows], cell_order, threshold)]
+    return labels
+
+
+def cluster_near_duplicates(vectors: np.ndarray, order: np.ndarray, threshold: float,
+                            partition_size: int = 2048, passes: int = 4, seed: int = 0) -> np.ndarray:
+    """
+    leader_clusters over the whole set, or, above ``partition_size`` rows, within the cells
+    of a coarse spherical k-means partition: near-duplicates mostly share a cell, and the
+    pairwise work drops from O(N^2) to about O(N * sqrt(N)). Duplicates split across
+    cells leave one leader per cell; the leaders are clustered again (with a new partition,
+    or exactly once few enough remain) for up to ``passes`` rounds, and merged clusters
+    take the surviving leader.
+
+    Returns the leader row of each row (a leader maps to itself).
+    """
+    n = len(vectors)
+    labels = np.arange(n)
+    active = np.arange(n)  # current leaders, ascending
+    for round_ in range(passes):
+        in_active = np.zeros(n, dtype=bool)
+        in_active[active] = True
+        local_order = np.searchsorted(active, order[in_active[order]])
+        exact = len(active) <= partition_size
+        if exact:
+            sub = leader_clusters(vectors[active], local_order, threshold)
+        else:
+            sub = _partitioned_clusters(vectors[active], local_order, threshold, seed + round_)
+        leader_of = np.empty(n, dtype=np.int64)
+        leader_of[active] = active[sub]
+        labels = leader_of[labels]
+        survivors = np.unique(active[sub])
+        if exact or len(survivors) == len(active):
+            break
+        active = survivors
+    return labels
+
+
+def cluster_within_groups(vectors: np.ndarray, order: np.ndarray, keys: Sequence[Hashable], threshold: float,
+                          **options) -> np.ndarray:
+    """
+    cluster_near_duplicates run separately on the rows of each key (e.g. symbol + action):
+    rows with different keys are never merged, however similar their text.
+
+    Returns the leader row of each row (a leader maps to itself).
+    """
+    groups = {}
+    for row, key in enumerate(keys):
+        groups.setdefault(key, []).append(row)
+    labels = np.arange(len(vectors))
+    position = np.empty(len(vectors), dtype=np.int64)
+    group_of = np.empty(len(vectors), dtype=np.int64)
+    for g, rows in enumerate(groups.values()):
+        group_of[rows] = g
+        position[rows] = np.arange(len(rows))
+    for g, rows in enumerate(groups.values()):
+        if len(rows) < 2:
+            continue
+        rows = np.array(rows, dtype=np.int64)
+        local_order = position[order[group_of[order] == g]]
+        labels[rows] = rows[cluster_near_duplicates(vectors[rows], local_order, threshold, **options)]
+    return labels
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+
+def normalize_text(text: str) -> str:
+    """Cache-key normalization: NFC and collapsed whitespace (case is kept; models may be cased)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embeddings keyed by (model tag, hash of the normalized text).
+
+    The same trigger description is embedded every cycle; with the cache a repeated
+    query skips inference entirely. Optionally persisted to an .npz file so the warm set
+    survives restarts. Keys include the model tag, so entries from another model never match.
+    """
+
+    def __init__(self, model_tag: str, capacity: int = 4096, path: Optional[str] = None):
+        self.model_tag = model_tag
+        self.capacity = capacity
+        self.path = path
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(f"{self.model_tag}\0{normalize_text(text)}".encode("utf-8"), digest_size=16).digest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self.key(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, text: str, vector: np.ndarray):
+        key = self.key(text)
+        with self._lock:
+            self._entries[key] = np.asarray(vector, dtype=np.float32)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # --- Persistence ---
+    def save(self):
+        if not self.path or not self._entries:
+            return
+        with self._lock:
+            keys = np.frombuffer(b"".join(self._entries.keys()), dtype=np.uint8).reshape(-1, 16)
+            vectors = np.stack(list(self._entries.values()))
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, model=np.array(self.model_tag), keys=keys, vectors=vectors)
+        os.replace(tmp, self.path)
+
+    def _load(self):
+        try:
+            with np.load(self.path) as data:
+                if str(data["model"]) != self.model_tag:
+                    return
+                keys, vectors = data["keys"], data["vectors"]
+            for key, vector in zip(keys[-self.capacity:], vectors[-self.capacity:]):
+                self._entries[bytes(key)] = vector
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding cache {self.path}: {e}")
@@ -0,0 +1,108 @@
+import json
+import os
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+from loguru import logger
+
+from .vector_index import EmbeddingMatrix, IVFIndex
+
+EMBEDDING_DIR = "embeddings"
+INDEX_VERSION = 1
+
+
+class EmbeddingStore:
+    """
+    On-disk embeddings for MemoryManager, stored next to memories.json.
+
+    Per memory type:
+      embeddings/<type>.f32         raw float32 rows, memory-mapped (EmbeddingMatrix path)
+      embeddings/<type>.index.npz   row -> memory id, timestamps (+ IVF centroids / list assignment)
+    plus embeddings/meta.json with the model tag and dimension. Rows are written in place
+    as memories are embedded; the index is rewritten (atomically) on save. Files written by
+    a different model are discarded on open, so their memories are simply re-embedded.
+
+    Between saves the file and the index disagree (appends, swap-with-last moves), which
+    EmbeddingMatrix records with a ``<type>.f32.dirty`` marker. A marker found on open means
+    the process stopped without saving: the index is dropped and that type is re-embedded,
+    rather than trusting rows that may now hold another memory's vector.
+    """
+
+    def __init__(self, storage_dir: str, model_tag: str):
+        self.dir = os.path.join(storage_dir, EMBEDDING_DIR)
+        self.model_tag = model_tag
+        os.makedirs(self.dir, exist_ok=True)
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.dim = self._check_meta()
+
+    def _vectors_path(self, memory_type: str) -> str:
+        return os.path.join(self.dir, f"{memory_type}.f32")
+
+    def _index_path(self, memory_type: str) -> str:
+        return os.path.join(self.dir, f"{memory_type}.index.npz")
+
+    def _check_meta(self) -> Optional[int]:
+        """Return the stored dim, or None (after clearing stale files) if the model changed."""
+        if not os.path.exists(self.meta_path):
+            return None
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception as e:
+            logger.warning(f"Unreadable embedding metadata ({e}); embeddings will be rebuilt.")
+            meta = {}
+        if meta.get("model") == self.model_tag and meta.get("version") == INDEX_VERSION:
+            return meta.get("dim")
+        if meta:
+            logger.info(f"Embedding model changed ({meta.get('model')} -> {self.model_tag}); discarding stored vectors.")
+        for name in os.listdir(self.dir):
+            os.remove(os.path.join(self.dir, name))
+        return None
+
+    def open(self, memory_type: str, ann: Optional[Dict[str, Any]] = None) -> Union[EmbeddingMatrix, IVFIndex]:
+        """
+        Map the stored matrix for memory_type (an empty file-backed matrix if none)
+        :param ann: IVFIndex options; when given the matrix is wrapped in an IVF index
+        """
+        path, index_path = self._vectors_path(memory_type), self._index_path(memory_type)
+        matrix, state = None, None
+        if os.path.exists(path + ".dirty"):
+            logger.warning(f"{memory_type} embeddings were not saved cleanly; they will be rebuilt.")
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            os.remove(path + ".dirty")
+        if self.dim and os.path.exists(path) and os.path.exists(index_path):
+            try:
+                with np.load(index_path) as index:
+                    ids, timestamps = index["ids"].tolist(), index["timestamps"]
+                    if "centroids" in index:
+                        state = {k: index[k] for k in ("centroids", "assign", "trained_size")}
+                matrix = EmbeddingMatrix.restore(path, self.dim, ids, timestamps)
+            except Exception as e:
+                logger.warning(f"Failed to open {memory_type} embeddings ({e}); they will be rebuilt.")
+        if matrix is None:
+            matrix = EmbeddingMatrix(dim=self.dim, path=path)
+        if ann is None:
+            return matrix
+        return IVFIndex(matrix, state=state, **ann)
+
+    def save(self, matrices: Dict[str, Union[EmbeddingMatrix, IVFIndex]]):
+        """Flush rows and atomically rewrite the id/timestamp index of every matrix."""
+        dims = {m.dim for m in matrices.values() if m.dim}
+        if not dims:
+            return
+        self.dim = dims.pop()
+        for memory_type, matrix in matrices.items():
+            matrix.flush()
+            tmp = self._index_path(memory_type) + ".tmp.npz"
+            extra = matrix.state() if isinstance(matrix, IVFIndex) else {}
+            np.savez(tmp, ids=np.array(matrix.ids, dtype=str), timestamps=matrix.timestamps, **extra)
+            os.replace(tmp, self._index_path(memory_type))
+            (matrix.matrix if isinstance(matrix, IVFIndex) else matrix).mark_clean()
+        self._write_meta()
+
+    def _write_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"model": self.model_tag, "dim": self.dim, "version": INDEX_VERSION}, f)
+        os.replace(tmp, self.meta_path)
@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+class EmbeddingWorker:
+    """
+    Background thread that embeds queued texts in batches.
+
+    submit() only enqueues, so callers (agents writing memories mid-cycle, the event loop)
+    never wait for the model. The worker takes the first queued item, gathers whatever else
+    arrives within ``max_wait_ms`` up to ``max_batch`` items, runs one ``encode_batch`` call
+    and hands (keys, vectors) to ``on_embedded``. The model releases the GIL during
+    inference, so a thread is enough; batching amortizes the per-call overhead.
+    """
+
+    def __init__(self, encode_batch: Callable[[List[str]], Optional[np.ndarray]],
+                 on_embedded: Callable[[List[Hashable], np.ndarray], Any],
+                 max_batch: int = 64, max_wait_ms: int = 20):
+        self.encode_batch = encode_batch
+        self.on_embedded = on_embedded
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[Hashable, str]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._idle = threading.Condition()
+        self._unfinished = 0
+        self._stopping = False
+        self.batches = 0
+        self.embedded = 0
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="memory-embedder", daemon=True)
+                self._thread.start()
+
+    def submit(self, items: Sequence[Tuple[Hashable, str]]):
+        """Queue (key, text) pairs for embedding."""
+        if not items:
+            return
+        with self._idle:
+            self._unfinished += len(items)
+        for item in items:
+            self._queue.put(item)
+        self._ensure_started()
+
+    @property
+    def backlog(self) -> int:
+        return self._unfinished
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submitted item has been processed; False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def _take_batch(self) -> List[Tuple[Hashable, str]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            items = [item for item in batch if item is not None]
+            try:
+                if items:
+                    vectors = self.encode_batch([text for _, text in items])
+                    if vectors is not None:
+                        self.on_embedded([key for key, _ in items], vectors)
+                        self.batches += 1
+                        self.embedded += len(items)
+            except Exception as e:
+                logger.error(f"Embedding worker batch failed: {e}")
+            finally:
+                with self._idle:
+                    self._unfinished -= len(items)
+                    self._idle.notify_all()
+            if self._stopping and len(items) < len(batch):
+                return
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Finish queued work, then stop the thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._stopping = True
+        self._queue.put(None)
+        self._thread.join(timeout)
@@ -0,0 +1,71 @@
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .vector_index import SECONDS_PER_DAY
+
+
+class RetentionPolicy:
+    """
+    Expiry time of a memory from the retention config.
+
+    short_term memories live ``retention.short_term`` days. long_term memories live
+    ``long_term_min`` / ``long_term_med`` / ``long_term_high`` days depending on which
+    importance tier (``cleanup.*_importance_threshold``) they fall in, and are kept forever
+    from the high threshold up. Episodic memories never expire.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        retention = config.get('retention', {}) or {}
+        thresholds = config.get('cleanup', {}) or {}
+        self.short_term_days = retention.get('short_term', 1)
+        self.tiers = [
+            (thresholds.get('low_importance_threshold', 20), retention.get('long_term_min', 30)),
+            (thresholds.get('medium_importance_threshold', 50), retention.get('long_term_med', 90)),
+            (thresholds.get('high_importance_threshold', 80), retention.get('long_term_high', 180)),
+        ]
+
+    def expires_at(self, memory: Dict[str, Any], memory_type: str) -> Optional[float]:
+        """Timestamp after which the memory is dropped; None when it is kept forever."""
+        if memory_type == "short_term":
+            return memory['timestamp'] + self.short_term_days * SECONDS_PER_DAY
+        if memory_type == "long_term":
+            for threshold, days in self.tiers:
+                if memory.get('importance', 0) < threshold:
+                    return memory['timestamp'] + days * SECONDS_PER_DAY
+        return None
+
+
+class ExpiryQueue:
+    """
+    Min-heap of (expires_at, memory_id, memory_type).
+
+    Entries are never removed in place: a memory deleted by other means, or whose expiry
+    changed, leaves a stale entry that the owner recognises (and skips or re-pushes) when it
+    is popped. rebuild() drops stale entries in one pass.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, expires_at: Optional[float], memory_id: str, memory_type: str):
+        if expires_at is not None:
+            heapq.heappush(self._heap, (expires_at, memory_id, memory_type))
+
+    def rebuild(self, entries: List[Tuple[float, str, str]]):
+        self._heap = [e for e in entries if e[0] is not None]
+        heapq.heapify(self._heap)
+
+    def next_expiry(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now: Optional[float] = None) -> List[Tuple[float, str, str]]:
+        """Pop every entry due at ``now``; O(k log n) for k due entries."""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        return due
@@ -0,0 +1,165 @@
+import hashlib
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Bootstrap corpus the IDF is fitted on (once; see frozen_idf)
+IDF_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "idf_corpus.txt")
+
+
+def hashing_tag(dim: int, word_ngrams: Sequence[int], char_ngrams: Sequence[int],
+                idf: Optional[np.ndarray] = None) -> str:
+    """Embedding space identifier (stored vectors from another configuration or IDF are discarded)."""
+    base = f"hashing-{dim}-w{word_ngrams[0]}{word_ngrams[1]}-c{char_ngrams[0]}{char_ngrams[1]}"
+    if idf is None:
+        return base + "-tf"
+    return f"{base}-idf{hashlib.sha1(np.ascontiguousarray(idf, dtype=np.float32).tobytes()).hexdigest()[:10]}"
+
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedder: signed feature hashing of word and character n-grams
+    with sublinear TF and (frozen) IDF weighting.
+
+    Features are word n-grams (``word_ngrams``) and character n-grams taken inside each
+    padded word (``char_ngrams``, so "resistance" and "resistances" share most features).
+    Each feature is hashed with crc32 into one of ``dim`` buckets, with a sign from a
+    second hash bit so collisions cancel out on average instead of piling up. Term
+    frequencies are dampened (1 + log tf) and each bucket is scaled by ``idf``. The IDF is
+    fitted once (fit_idf, see frozen_idf) and never updated by encode: a vector depends only
+    on its text and ``tag`` (which includes the IDF's digest), so stored rows, the embedding
+    cache and fresh queries always share one space. Encoding a memory costs tens of
+    microseconds and needs no model download; similarity is lexical, so paraphrases
+    without shared words score lower than with a sentence-transformer.
+
+    Word-level features (unigram + char n-grams) are cached per distinct word, so encoding
+    mostly hashes the word bigrams of the text.
+
+    Exposes ``encode(texts, convert_to_numpy=True)`` like SentenceTransformer, so
+    MemoryRetrieval uses it as a drop-in model.
+    """
+
+    WORD_CACHE_SIZE = 50000
+
+    def __init__(self, dim: int = 1024, word_ngrams: Tuple[int, int] = (1, 2),
+                 char_ngrams: Tuple[int, int] = (3, 5), char_weight: float = 0.5,
+                 idf: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.word_ngrams = tuple(word_ngrams)
+        self.char_ngrams = tuple(char_ngrams)
+        self.char_weight = char_weight
+        if idf is not None and len(idf) != dim:
+            raise ValueError(f"IDF has {len(idf)} buckets, embedder dim is {dim}")
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float32)
+        self._word_cache: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def tag(self) -> str:
+        return hashing_tag(self.dim, self.word_ngrams, self.char_ngrams, self.idf)
+
+    # --- Features ---
+    def _hash(self, feature: str) -> Tuple[int, float]:
+        h = zlib.crc32(feature.encode("utf-8"))
+        return h % self.dim, (1.0 if h & 0x80000000 else -1.0)
+
+    def _word_features(self, word: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Buckets and signed weights of a word's unigram and char n-grams (cached per word)."""
+        cached = self._word_cache.get(word)
+        if cached is not None:
+            return cached
+        features = ["w " + word] if self.word_ngrams[0] <= 1 <= self.word_ngrams[1] else []
+        weights = [1.0] * len(features)
+        lo, hi = self.char_ngrams
+        if hi:
+            padded = f"<{word}>"
+            grams = Counter(padded[i:i + n] for n in range(lo, hi + 1) for i in range(len(padded) - n + 1))
+            features.extend("c " + g for g in grams)
+            weights.extend(self.char_weight * (1.0 + math.log(c)) for c in grams.values())
+        hashed = [self._hash(f) for f in features]
+        cached = (np.array([b for b, _ in hashed], dtype=np.int64),
+                  np.array([sign * w for (_, sign), w in zip(hashed, weights)], dtype=np.float32))
+        if len(self._word_cache) >= self.WORD_CACHE_SIZE:
+            self._word_cache.clear()
+        self._word_cache[word] = cached
+        return cached
+
+    def _hashed(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Buckets and signed weights of every feature of one text (sublinear tf per word / n-gram)."""
+        words = TOKEN_RE.findall(text.lower())
+        buckets, values = [], []
+        for word, tf in Counter(words).items():
+            b, v = self._word_features(word)
+            buckets.append(b)
+            values.append(v * (1.0 + math.log(tf)) if tf > 1 else v)
+        lo, hi = self.word_ngrams
+        grams = Counter(" ".join(words[i:i + n]) for n in range(max(lo, 2), hi + 1) for i in range(len(words) - n + 1))
+        if grams:
+            hashed = [self._hash("w " + g) for g in grams]
+            buckets.append(np.array([b for b, _ in hashed], dtype=np.int64))
+            values.append(np.array([sign * (1.0 + math.log(c)) for (_, sign), c in zip(hashed, grams.values())],
+                                   dtype=np.float32))
+        if not buckets:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return np.concatenate(buckets), np.concatenate(values)
+
+    # --- IDF ---
+    def fit_idf(self, texts: Iterable[str]) -> np.ndarray:
+        """Smoothed IDF per bucket from the document frequencies of texts (does not change this embedder)."""
+        doc_freq = np.zeros(self.dim, dtype=np.int64)
+        documents = 0
+        for text in texts:
+            doc_freq[np.unique(self._hashed(text)[0])] += 1
+            documents += 1
+        return (np.log((1.0 + documents) / (1.0 + doc_freq)) + 1.0).astype(np.float32)
+
+    # --- Encode ---
+    def encode(self, texts: Union[str, Sequence[str]], convert_to_numpy: bool = True) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        features = [self._hashed(t) for t in batch]
+        rows = np.repeat(np.arange(len(batch)), [len(b) for b, _ in features])
+        flat = rows * self.dim + np.concatenate([b for b, _ in features])
+        dense = np.bincount(flat, weights=np.concatenate([v for _, v in features]),
+                            minlength=len(batch) * self.dim).reshape(len(batch), self.dim).astype(np.float32)
+        if self.idf is not None:
+            dense *= self.idf
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        dense /= np.maximum(norms, 1e-12)
+        return dense[0] if single else dense
+
+
+def frozen_idf(state_path: Optional[str], corpus_path: str = IDF_CORPUS, **options) -> Optional[np.ndarray]:
+    """
+    The IDF for a HashingEmbedder with ``options``: read from state_path, or fitted once on the
+    bootstrap corpus (one text per line) and written there. The file is never updated
+    afterwards, so the embedding space only changes with the configuration (then it is refitted).
+    Returns None (TF only) when there is no corpus.
+    """
+    embedder = HashingEmbedder(**options)
+    base = hashing_tag(embedder.dim, embedder.word_ngrams, embedder.char_ngrams)
+    if state_path and os.path.exists(state_path):
+        try:
+            with np.load(state_path) as data:
+                if "base" in data and str(data["base"]) == base:
+                    return data["idf"].astype(np.float32)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable hashing IDF {state_path}: {e}")
+    if not os.path.exists(corpus_path):
+        logger.warning(f"IDF corpus {corpus_path} not found; hashing embedder uses TF weighting only.")
+        return None
+    with open(corpus_path, encoding="utf-8") as f:
+        idf = embedder.fit_idf(line.strip() for line in f if line.strip())
+    if state_path:
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+        tmp = state_path + ".tmp.npz"
+        np.savez(tmp, base=np.array(base), idf=idf)
+        os.replace(tmp, state_path)
+    return idf
+
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+JOURNAL_FILE = "memories.journal.jsonl"
+
+
+class MemoryJournal:
+    """
+    Append-only JSONL log of memory changes, replayed on top of the memories.json snapshot.
+
+    Each line is {"op": "put", "memory": {...}} (insert or replace by id) or
+    {"op": "del", "ids": [...]} (tombstones written by cleanup). Appends are flushed to the
+    OS immediately and fsync'ed in groups: after ``fsync_batch`` records or once
+    ``fsync_interval_ms`` has passed since the last fsync, whichever comes first.
+    Appends only check the interval when they happen; a quiet journal relies on its owner's
+    timer (MemoryManager's reaper): ``on_unsynced`` fires when records start waiting,
+    sync_delay() says when they are due and sync_if_due() writes them.
+    A torn final line (crash mid-write) is ignored on replay and truncated away.
+    """
+
+    def __init__(self, storage_dir: str, fsync_batch: int = 32, fsync_interval_ms: int = 1000,
+                 on_unsynced: Optional[Callable[[], None]] = None):
+        self.path = os.path.join(storage_dir, JOURNAL_FILE)
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.records = 0  # records since the last compaction
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        self.on_unsynced = on_unsynced
+        self._lock = threading.Lock()
+        self._file = None
+
+    # --- Replay ---
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """Yield journal records in order; counts them toward the compaction threshold."""
+        if not os.path.exists(self.path):
+            return
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("unterminated record")
+                    record = json.loads(raw)
+                except ValueError:
+                    logger.warning(f"Ignoring torn memory journal record at byte {valid_bytes}.")
+                    break
+                valid_bytes += len(raw)
+                self.records += 1
+                yield record
+        if valid_bytes < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_bytes)
+
+    # --- Append ---
+    def _handle(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def _append(self, records: List[Dict[str, Any]]):
+        with self._lock:
+            f = self._handle()
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            f.flush()
+            waiting = self._unsynced
+            self.records += len(records)
+            self._unsynced += len(records)
+            if self._unsynced >= self.fsync_batch or time.monotonic() - self._synced_at >= self.fsync_interval:
+                self._fsync()
+        if self._unsynced and not waiting and self.on_unsynced:
+            self.on_unsynced()
+
+    def put(self, memory: Dict[str, Any]):
+        self._append([{"op": "put", "memory": memory}])
+
+    def delete(self, memory_ids: List[str]):
+        if memory_ids:
+            self._append([{"op": "del", "ids": list(memory_ids)}])
+
+    def _fsync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def sync(self):
+        """Force pending records to disk."""
+        with self._lock:
+            self._fsync()
+
+    def sync_delay(self) -> Optional[float]:
+        """Seconds until unsynced records are due for the interval fsync (None if there are none)."""
+        with self._lock:
+            if not self._unsynced:
+                return None
+            return max(self._synced_at + self.fsync_interval - time.monotonic(), 0.0)
+
+    def sync_if_due(self):
+        with self._lock:
+            if self._unsynced and time.monotonic() - self._synced_at >= self.fsync_interval:
+                self._fsync()
+
+    # --- Compaction ---
+    def reset(self):
+        """Truncate after the snapshot has been durably written (called by compaction)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.path, 'w', encoding='utf-8') as f:
+                os.fsync(f.fileno())
+            self.records = 0
+            self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            self._fsync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def apply_record(record: Dict[str, Any], memories: Dict[str, Dict[str, Any]]):
+    """Apply one journal record to an id -> memory dict (insertion ordered)."""
+    if record.get("op") == "put":
+        memory = record["memory"]
+        memories.pop(memory["id"], None)
+        memories[memory["id"]] = memory
+        return
+    for memory_id in record.get("ids", ()):
+        memories.pop(memory_id, None)
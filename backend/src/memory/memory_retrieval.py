@@ -1,21 +1,88 @@
 import yaml
 import time
+import threading
+import importlib.util
 import numpy as np
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Optional, Union
 from loguru import logger
 import os
 
-try:
-    from sentence_transformers import SentenceTransformer, util
-except ImportError:
-    logger.warning("sentence-transformers not installed. Vector retrieval will not work.")
-    SentenceTransformer = None
+from src.utils.lazy import optional_import
+from .vector_index import DEFAULT_DECAY_RATE, EmbeddingMatrix, apply_time_decay, normalize
+from .embedding_cache import EmbeddingCache
+from .hashing_embedder import HashingEmbedder, frozen_idf, hashing_tag
+
+EMBEDDERS = ("auto", "sentence-transformers", "hashing")
 
 class MemoryRetrieval:
-    def __init__(self, config_path: str = "src/config/memory_config.yaml"):
+    def __init__(self, config_path: str = "src/config/memory_config.yaml", cache_path: Optional[str] = None,
+                 idf_path: Optional[str] = None):
+        """
+        :param idf_path: where the hashing embedder's frozen IDF is kept (fitted on first use)
+        """
         self.config = self._load_config(config_path)
-        self.model = None
-        self._initialize_model()
+        self.embedder = self._select_embedder()
+        self.idf_path = idf_path
+        self._idf: Optional[np.ndarray] = None
+        self._idf_loaded = False
+        # The model is loaded on first use (seconds and hundreds of MB), not at construction
+        self._model = None
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
+        cache = self.config.get('memory', {}).get('retrieval', {}).get('cache', {}) or {}
+        self.cache: Optional[EmbeddingCache] = None
+        if cache.get('enabled', True):
+            self.cache = EmbeddingCache(self.model_tag, cache.get('capacity', 4096),
+                                        cache_path if cache.get('persist', True) else None)
+
+    @property
+    def model(self):
+        if not self._model_loaded:
+            with self._model_lock:
+                if not self._model_loaded:
+                    self._initialize_model()
+                    self._model_loaded = True
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model, self._model_loaded = model, True
+
+    @property
+    def available(self) -> bool:
+        """Whether embeddings can be produced, without loading the model to find out."""
+        if self._model_loaded:
+            return self._model is not None
+        return self.embedder == "hashing" or importlib.util.find_spec("sentence_transformers") is not None
+
+    def _select_embedder(self) -> str:
+        """'sentence-transformers' or 'hashing'; 'auto' uses the transformer when it is installed."""
+        embedder = self.config.get('memory', {}).get('retrieval', {}).get('embedder', 'auto')
+        if embedder not in EMBEDDERS:
+            logger.warning(f"Unknown embedder {embedder!r}, using auto")
+            embedder = "auto"
+        if embedder == "auto":
+            embedder = "sentence-transformers" if importlib.util.find_spec("sentence_transformers") else "hashing"
+        return embedder
+
+    def _hashing_options(self) -> Dict[str, Any]:
+        options = self.config.get('memory', {}).get('retrieval', {}).get('hashing', {}) or {}
+        return {
+            "dim": options.get('dim', 1024),
+            "word_ngrams": tuple(options.get('word_ngrams', (1, 2))),
+            "char_ngrams": tuple(options.get('char_ngrams', (3, 5))),
+            "char_weight": options.get('char_weight', 0.5),
+        }
+
+    @property
+    def hashing_idf(self) -> Optional[np.ndarray]:
+        """Frozen IDF of the hashing embedder (None when disabled); part of model_tag."""
+        if not self._idf_loaded:
+            options = self.config.get('memory', {}).get('retrieval', {}).get('hashing', {}) or {}
+            if options.get('idf', True):
+                self._idf = frozen_idf(self.idf_path, **self._hashing_options())
+            self._idf_loaded = True
+        return self._idf
 
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         try:
@@ -26,57 +93,95 @@ class MemoryRetrieval:
             return {}
 
     def _initialize_model(self):
-        if SentenceTransformer:
+        if self.embedder == "hashing":
+            self._model = HashingEmbedder(**self._hashing_options(), idf=self.hashing_idf)
+            logger.info(f"Using built-in hashing embedder ({self.model_tag}).")
+            return
+        # sentence-transformers pulls in torch; import it only when the model is first needed
+        st = optional_import("sentence_transformers", "Vector retrieval")
+        if st:
             try:
-                model_name = self.config.get('memory', {}).get('retrieval', {}).get('model_name', 'all-MiniLM-L6-v2')
+                model_name = self.model_tag
                 logger.info(f"Loading embedding model: {model_name}...")
-                self.model = SentenceTransformer(model_name)
+                self._model = st.SentenceTransformer(model_name)
                 logger.info("Embedding model loaded successfully.")
             except Exception as e:
                 logger.error(f"Failed to load SentenceTransformer model: {e}")
-                self.model = None
+                self._model = None
         else:
-            self.model = None
+            self._model = None
+
+    @property
+    def model_tag(self) -> str:
+        """Identifies the embedding space; stored vectors from another tag are discarded."""
+        if self.embedder == "hashing":
+            options = self._hashing_options()
+            return hashing_tag(options["dim"], options["word_ngrams"], options["char_ngrams"], self.hashing_idf)
+        return self.config.get('memory', {}).get('retrieval', {}).get('model_name', 'all-MiniLM-L6-v2')
+
+    @property
+    def decay_rate(self) -> float:
+        return self.config.get('memory', {}).get('retrieval', {}).get('time_decay_per_day', DEFAULT_DECAY_RATE)
 
     def get_embedding(self, text: str) -> Union[np.ndarray, None]:
-        """Generate embedding for text."""
+        """Generate a normalized float32 embedding for text (cached: repeats skip inference)."""
+        cached = self.cache.get(text) if self.cache is not None else None
+        if cached is not None:
+            return cached
         if not self.model:
             return None
         try:
-            return self.model.encode(text, convert_to_tensor=True)
+            embedding = normalize(self.model.encode(text, convert_to_numpy=True))
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             return None
+        if self.cache is not None:
+            self.cache.put(text, embedding)
+        return embedding
+
+    def encode_batch(self, texts: List[str]) -> Union[np.ndarray, None]:
+        """Embed several texts in one model call (cache misses only); returns an (n, dim) normalized float32 matrix."""
+        if not texts:
+            return None
+        cached = [self.cache.get(t) for t in texts] if self.cache is not None else [None] * len(texts)
+        missing = [i for i, v in enumerate(cached) if v is None]
+        if missing:
+            if not self.model:
+                return None
+            try:
+                encoded = normalize(self.model.encode([texts[i] for i in missing], convert_to_numpy=True))
+            except Exception as e:
+                logger.error(f"Error generating embeddings: {e}")
+                return None
+            for i, vector in zip(missing, encoded.reshape(len(missing), -1)):
+                cached[i] = vector
+                if self.cache is not None:
+                    self.cache.put(texts[i], vector)
+        return np.stack(cached)
+
+    def save(self):
+        """Persist the embedding cache."""
+        if self.cache is not None:
+            self.cache.save()
 
     def calculate_similarity(self, embedding1, embedding2) -> float:
         """Calculate cosine similarity between two embeddings."""
-        if not self.model or embedding1 is None or embedding2 is None:
-            return 0.0
-        try:
-            return util.cos_sim(embedding1, embedding2).item()
-        except Exception as e:
-            logger.error(f"Error calculating similarity: {e}")
+        if embedding1 is None or embedding2 is None:
             return 0.0
+        return float(normalize(embedding1).reshape(-1) @ normalize(embedding2).reshape(-1))
 
-    def apply_time_decay(self, similarity_score: float, timestamp: float, days_factor: float = 0.01) -> float:
+    def apply_time_decay(self, similarity_score: float, timestamp: float, days_factor: float = DEFAULT_DECAY_RATE) -> float:
         """
         Apply time decay to similarity score.
         score = score * (1 / (1 + decay_rate * days_passed))
         """
-        current_time = time.time()
-        days_passed = (current_time - timestamp) / (24 * 3600)
-        
-        # Avoid negative time if system clock skews
-        days_passed = max(0, days_passed)
-        
-        # Simple decay formula
-        decayed_score = similarity_score * (1 / (1 + days_factor * days_passed))
-        return decayed_score
+        return float(apply_time_decay(np.float64(similarity_score), np.float64(timestamp), decay_rate=days_factor))
 
     def retrieve_top_k(self, query_text: str, memories: List[Dict[str, Any]], top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Retrieve top K memories based on semantic similarity.
-        memories list should contain dicts with 'content' and 'embedding' keys.
+        memories list should contain dicts with 'content' and optionally 'embedding' / 'timestamp' keys;
+        missing embeddings are encoded in one batch and scored together with the rest.
         """
         if not self.model or not memories:
             return []
@@ -85,27 +190,22 @@ class MemoryRetrieval:
         if query_embedding is None:
             return []
 
-        scored_memories = []
-        for memory in memories:
-            mem_embedding = memory.get('embedding')
-            if mem_embedding is None:
-                # If embedding missing, try to generate on the fly (slower)
-                if 'content' in memory:
-                   mem_embedding = self.get_embedding(memory['content'])
-            
-            if mem_embedding is not None:
-                score = self.calculate_similarity(query_embedding, mem_embedding)
-                
-                # Apply time decay if configured (optional optimization)
-                # For strictly semantic search, we might not want time decay here, 
-                # but 'context' usually favors recent info.
-                if 'timestamp' in memory:
-                     score = self.apply_time_decay(score, memory['timestamp'])
-                
-                scored_memories.append((score, memory))
-
-        # Sort by score desc
-        scored_memories.sort(key=lambda x: x[0], reverse=True)
-
-        # Return top K
-        return [item[1] for item in scored_memories[:top_k]]
+        missing = [i for i, m in enumerate(memories) if m.get('embedding') is None and 'content' in m]
+        encoded = self.encode_batch([memories[i]['content'] for i in missing]) if missing else None
+        vectors, timestamps, candidates = [], [], []
+        fill = dict(zip(missing, encoded)) if encoded is not None else {}
+        for i, memory in enumerate(memories):
+            vector = memory.get('embedding')
+            if vector is None:
+                vector = fill.get(i)
+            if vector is None:
+                continue
+            vectors.append(np.asarray(vector, dtype=np.float32).reshape(-1))
+            timestamps.append(memory.get('timestamp', time.time()))
+            candidates.append(memory)
+        if not candidates:
+            return []
+
+        index = EmbeddingMatrix()
+        index.add_batch([str(i) for i in range(len(candidates))], np.stack(vectors), timestamps)
+        return [candidates[int(i)] for i, _ in index.search(query_embedding, top_k, decay_rate=self.decay_rate)]
@@ -1,13 +1,31 @@
 import json
 import os
+import threading
 import time
 import uuid
-from typing import List, Dict, Any, Optional
+import heapq
+from typing import List, Dict, Any, Optional, Set
+import numpy as np
 from loguru import logger
 from .memory_retrieval import MemoryRetrieval
+from .vector_index import EmbeddingMatrix, IVFIndex
+from .embedding_store import EmbeddingStore
+from .journal import MemoryJournal, apply_record
+from .embedding_worker import EmbeddingWorker
+from .metadata_index import MetadataIndex, memory_symbol, memory_tags
+from .expiry import RetentionPolicy, ExpiryQueue
+from .consolidation import cluster_within_groups
+from src.utils.lazy import LazyObject
+
+MEMORY_TYPES = ("short_term", "long_term", "episodic")
 
 class MemoryManager:
-    def __init__(self, config_path: str = None, storage_dir: str = None):
+    def __init__(self, config_path: str = None, storage_dir: str = None, database=None):
+        """
+        :param database: DatabaseManager whose memory table is the persistent store (typed columns
+            plus embedding BLOBs). Without it memories persist to memories.json + journal + memmap
+            embeddings under storage_dir.
+        """
         # 动态获取路径
         if config_path is None or storage_dir is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,16 +39,80 @@ class MemoryManager:
             if storage_dir is None:
                 storage_dir = os.path.join(backend_root, "data", "memory")
 
-        self.retriever = MemoryRetrieval(config_path)
+        self.retriever = MemoryRetrieval(config_path, cache_path=os.path.join(storage_dir, "embedding_cache.npz"),
+                                         idf_path=os.path.join(storage_dir, "hashing_idf.npz"))
         self.storage_dir = storage_dir
         self.config = self.retriever.config
         
         self.short_term_memory: List[Dict] = []
         self.long_term_memory: List[Dict] = []
         self.episodic_memory: List[Dict] = []
+        self._by_id: Dict[str, Dict] = {}
+        # symbol / tags / day / importance postings for filtered retrieval
+        self.metadata_index = MetadataIndex()
         
         self._ensure_storage_dir()
+        self.database = database.memories if database is not None else None
+        # long_term / episodic grow without bound (importance > 80 is kept forever), so they
+        # sit behind an IVF index; short_term stays small and is searched exactly
+        ann = self.config.get('memory', {}).get('retrieval', {}).get('ann', {}) or {}
+        ann_types = set(ann.get('types', ())) if ann.get('enabled', False) else set()
+        ann_options = {k: ann[k] for k in ('nprobe', 'min_train', 'retrain_growth') if k in ann}
+        # (re)training runs on a background thread (_schedule_training), never under the lock
+        ann_options['auto_train'] = False
+        # One normalized float32 matrix per memory type: memory-mapped from the embedding store,
+        # or filled from the embedding BLOBs of the memory table.
+        # Memories without a stored row (new inserts, new model, crash before save) stay pending
+        # until the embedding worker (or a query that needs them) embeds them in a batch
+        self.embedding_store: Optional[EmbeddingStore] = None
+        if self.database is None:
+            self.embedding_store = EmbeddingStore(self.storage_dir, self.retriever.model_tag)
+            self.vectors: Dict[str, EmbeddingMatrix] = {
+                t: self.embedding_store.open(t, ann_options if t in ann_types else None) for t in MEMORY_TYPES
+            }
+        else:
+            self.vectors = {t: IVFIndex(EmbeddingMatrix(), **ann_options) if t in ann_types else EmbeddingMatrix()
+                            for t in MEMORY_TYPES}
+        self._pending: Dict[str, Dict[str, None]] = {t: {} for t in MEMORY_TYPES}  # ordered id sets
+        # Guards the matrices / pending sets, which the embedding worker thread also updates
+        self._lock = threading.RLock()
+        self._trainer: Optional[threading.Thread] = None
+        worker = self.config.get('memory', {}).get('embedding_worker', {}) or {}
+        self.worker: Optional[EmbeddingWorker] = None
+        self.pending_wait = worker.get('pending_wait_ms', 50) / 1000.0
+        if worker.get('enabled', True):
+            self.worker = EmbeddingWorker(self.retriever.encode_batch, self._on_embedded,
+                                          worker.get('max_batch', 64), worker.get('max_wait_ms', 20))
+        # Inserts and cleanup deletes are appended to a journal; memories.json is only rewritten
+        # when the journal is compacted into a new snapshot
+        storage = self.config.get('memory', {}).get('storage', {}) or {}
+        self.journal: Optional[MemoryJournal] = None
+        # Set to wake the reaper early (journal records waiting for their interval fsync, close)
+        self._reaper_wake = threading.Event()
+        if self.database is None:
+            self.journal = MemoryJournal(self.storage_dir, storage.get('fsync_batch', 32), storage.get('fsync_interval_ms', 1000),
+                                         on_unsynced=self._reaper_wake.set)
+        self.compact_min_records = storage.get('compact_min_records', 1000)
+        self.compact_ratio = storage.get('compact_ratio', 0.25)
+        # Each memory's expiry is fixed at insert (importance tier), so cleanup only has to pop
+        # the head of a min-heap instead of re-checking every memory
+        memory_config = self.config.get('memory', {})
+        self.retention = RetentionPolicy(memory_config)
+        self.expiry = ExpiryQueue()
         self._load_memories()
+        self._schedule_training()
+        cleanup = memory_config.get('cleanup', {}) or {}
+        self.cleanup_interval = cleanup.get('interval_seconds', 60)
+        # Near-duplicate merging, run by the same background thread every interval_minutes
+        self.consolidation = memory_config.get('consolidation', {}) or {}
+        self._next_consolidation: Optional[float] = None
+        if self.consolidation.get('enabled', False):
+            self._next_consolidation = time.monotonic() + self.consolidation.get('interval_minutes', 60) * 60
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        if cleanup.get('background', True):
+            self._reaper = threading.Thread(target=self._reap_forever, name="memory-reaper", daemon=True)
+            self._reaper.start()
 
     def _ensure_storage_dir(self):
         os.makedirs(self.storage_dir, exist_ok=True)
@@ -38,6 +120,89 @@ class MemoryManager:
     def _get_file_path(self, filename: str) -> str:
         return os.path.join(self.storage_dir, filename)
 
+    @staticmethod
+    def _bucket(memory_type: str) -> str:
+        return memory_type if memory_type in MEMORY_TYPES else "short_term"
+
+    def _memories_of(self, memory_type: str) -> List[Dict]:
+        return {
+            "short_term": self.short_term_memory,
+            "long_term": self.long_term_memory,
+            "episodic": self.episodic_memory,
+        }[memory_type]
+
+    def _queue_pending(self, memory_type: str, memories: List[Dict]):
+        """Mark memories as awaiting an embedding and hand them to the worker."""
+        with self._lock:
+            for m in memories:
+                self._pending[memory_type][m['id']] = None
+        if self.worker and self.retriever.available:  # the worker thread loads the model if needed
+            self.worker.submit([((memory_type, m['id']), m['content']) for m in memories])
+
+    def _on_embedded(self, keys: List, vectors):
+        """Worker callback: store vectors of memories that are still pending (not deleted meanwhile)."""
+        stored = []
+        with self._lock:
+            for memory_type in MEMORY_TYPES:
+                rows = [i for i, (t, memory_id) in enumerate(keys)
+                        if t == memory_type and memory_id in self._pending[t]]
+                if not rows:
+                    continue
+                ids = [keys[i][1] for i in rows]
+                self.vectors[memory_type].add_batch(ids, vectors[rows], [self._by_id[m]['timestamp'] for m in ids])
+                for memory_id in ids:
+                    del self._pending[memory_type][memory_id]
+                stored.extend(rows)
+        if self.database is not None and stored:
+            self.database.set_embeddings([keys[i][1] for i in stored], vectors[stored], self.retriever.model_tag)
+        if stored:
+            self._schedule_training()
+
+    def _schedule_training(self):
+        """Start a background (re)training of the IVF indexes that are due, unless one is running."""
+        with self._lock:
+            if self._trainer is not None and self._trainer.is_alive():
+                return
+            due = [t for t in MEMORY_TYPES if isinstance(self.vectors[t], IVFIndex) and self.vectors[t].training_due]
+            if not due:
+                return
+            self._trainer = threading.Thread(target=self._train_indexes, args=(due,), name="memory-ivf-train", daemon=True)
+            self._trainer.start()
+
+    def _train_indexes(self, memory_types: List[str]):
+        """Trainer thread: k-means on a snapshot with the lock released; searches stay exact / on the old lists meanwhile."""
+        for t in memory_types:
+            index = self.vectors[t]
+            with self._lock:
+                snapshot = index.begin_training()
+            try:
+                centroids, assign = index.fit(snapshot)
+            except Exception as e:
+                logger.error(f"Training the {t} index failed: {e}")
+                with self._lock:
+                    index.abort_training()
+                continue
+            with self._lock:
+                index.install(centroids, assign)
+            logger.info(f"Trained the {t} index: {len(index)} memories in {len(centroids)} lists.")
+
+    def _index_pending(self, memory_type: str):
+        """Make sure pending memories of this type are searchable before a query scores them."""
+        if not self._pending[memory_type] or not self.retriever.available:
+            return
+        # Usually the worker is a few ms behind: give it a moment, then embed the rest inline
+        if self.worker and self.worker.backlog:
+            self.worker.wait(self.pending_wait)
+        with self._lock:
+            pending = [self._by_id[m] for m in self._pending[memory_type]]
+        if not pending:
+            return
+        vectors = self.retriever.encode_batch([m['content'] for m in pending])
+        if vectors is None:
+            return
+        self._on_embedded([(memory_type, m['id']) for m in pending], vectors)
+        logger.info(f"Indexed {len(pending)} {memory_type} memories.")
+
     def add_memory(self, content: str, memory_type: str = "short_term", importance: int = 0, metadata: Dict = None) -> str:
         """
         Add a new memory to the system.
@@ -45,8 +210,6 @@ class MemoryManager:
         memory_id = str(uuid.uuid4())
         timestamp = time.time()
         
-        embedding = self.retriever.get_embedding(content)
-        
         memory_data = {
             "id": memory_id,
             "content": content,
@@ -54,41 +217,93 @@ class MemoryManager:
             "importance": importance,
             "timestamp": timestamp,
             "metadata": metadata or {},
-            # 注意: embedding 需要能在内存中用于计算，但在 JSON 序列化时通常不保存或需要特殊处理
-            # 这里我们在内存中保存 embedding 对象，save 时忽略或转存
-            "embedding": embedding 
         }
 
-        if memory_type == "short_term":
-            self.short_term_memory.append(memory_data)
-        elif memory_type == "long_term":
-            self.long_term_memory.append(memory_data)
-        elif memory_type == "episodic":
-            self.episodic_memory.append(memory_data)
-        else:
+        bucket = self._bucket(memory_type)
+        if bucket != memory_type:
             logger.warning(f"Unknown memory type: {memory_type}, adding to short_term")
-            self.short_term_memory.append(memory_data)
-            
+        # The embedding lives only in the matrix row (and the BLOB column), not in the memory
+        # dict. With the worker enabled the caller never waits for the model
+        embedding = None if self.worker else self.retriever.get_embedding(content)
+        self._insert_memory(memory_data, bucket, embedding)
         logger.info(f"Added {memory_type} memory: {content[:50]}... (Importance: {importance})")
-        self._save_memories() # Simple auto-save for now
+        self._maybe_compact()
         return memory_id
 
-    def retrieve_similar(self, current_context: str, top_k: int = 5, memory_type: str = None) -> List[Dict]:
+    def _insert_memory(self, memory_data: Dict, bucket: str, embedding=None):
+        """Index and persist a new memory; without an embedding it is queued for the worker."""
+        expires_at = self._index_memory(memory_data, bucket, embedding)
+        if self.database is not None:
+            # inserted before queueing, so the worker's embedding update finds the row
+            self.database.put(memory_data, bucket, expires_at, embedding, self.retriever.model_tag)
+        if embedding is not None:
+            self._schedule_training()
+        else:
+            self._queue_pending(bucket, [memory_data])
+
+    def _index_memory(self, memory_data: Dict, bucket: str, embedding=None) -> Optional[float]:
+        """Add a memory to the lists, indexes, journal and (with an embedding) matrix; returns its expiry."""
+        memory_id = memory_data['id']
+        expires_at = self.retention.expires_at(memory_data, bucket)
+        with self._lock:
+            self._memories_of(bucket).append(memory_data)
+            self._by_id[memory_id] = memory_data
+            self.metadata_index.add(memory_data)
+            self.expiry.push(expires_at, memory_id, bucket)
+            if self.journal is not None:
+                # under the lock: a compaction on the reaper thread must not truncate this record
+                self.journal.put(memory_data)
+            if embedding is not None:
+                self.vectors[bucket].add(memory_id, embedding, memory_data['timestamp'])
+        return expires_at
+
+    def retrieve_similar(self, current_context: str, top_k: int = 5, memory_type: str = None,
+                         symbol: Optional[str] = None, tags: Optional[List[str]] = None,
+                         max_age_days: Optional[float] = None, min_importance: Optional[int] = None) -> List[Dict]:
         """
         Retrieve relevant memories.
+        Optional metadata filters (symbol, tags - all required, max_age_days, min_importance) narrow
+        the candidates through the secondary indexes before any similarity is computed.
         """
-        target_memories = []
-        if memory_type == "short_term":
-            target_memories = self.short_term_memory
-        elif memory_type == "long_term":
-            target_memories = self.long_term_memory
-        elif memory_type == "episodic":
-            target_memories = self.episodic_memory
-        else:
-            # If type not specified, search all
-            target_memories = self.short_term_memory + self.long_term_memory + self.episodic_memory
+        types = [memory_type] if memory_type in MEMORY_TYPES else list(MEMORY_TYPES)  # None: search all
+        query = self.retriever.get_embedding(current_context)
+        if query is None:
+            return []
+
+        since = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        with self._lock:
+            candidates = self.metadata_index.query(symbol, tags, since, min_importance)
+        if candidates is not None and not candidates:
+            return []
 
-        return self.retriever.retrieve_top_k(current_context, target_memories, top_k)
+        scored = []
+        for t in types:
+            self._index_pending(t)
+            with self._lock:
+                index = self.vectors[t]
+                if candidates is None:
+                    scored.extend(index.search(query, top_k, decay_rate=self.retriever.decay_rate))
+                else:
+                    scored.extend(index.search_subset(query, candidates, top_k, decay_rate=self.retriever.decay_rate))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        with self._lock:
+            # the reaper may have evicted a hit since its type was searched
+            found = (self._by_id.get(memory_id) for memory_id, _ in scored)
+            return [m for m in found if m is not None][:top_k]
+
+    def retrieve_recent(self, limit: int = 5, memory_type: str = None, symbol: Optional[str] = None) -> List[Dict]:
+        """
+        Most recent memories, newest first. Lists are appended in time order, so only the
+        tail of each list is looked at; a symbol filter goes through the metadata index.
+        """
+        types = [memory_type] if memory_type in MEMORY_TYPES else list(MEMORY_TYPES)
+        with self._lock:
+            if symbol:
+                ids = self.metadata_index.query(symbol=symbol)
+                candidates = [self._by_id[m] for m in ids if self._bucket(self._by_id[m].get('type')) in types]
+            else:
+                candidates = [m for t in types for m in self._memories_of(t)[-limit:]]
+            return heapq.nlargest(limit, candidates, key=lambda m: m['timestamp'])
 
     def calculate_importance(self, memory_data: Dict) -> int:
         """
@@ -123,100 +338,328 @@ class MemoryManager:
              
         return min(100, score)
 
-    def cleanup_old_memories(self):
+    def cleanup_old_memories(self, now: Optional[float] = None):
         """
         Cleanup memories based on retention policy and importance.
+        Full sweep over every memory; the background reaper (evict_expired) normally keeps up
+        without it. Also picks up memories whose timestamp / importance was edited in place.
         """
-        current_time = time.time()
-        retention_config = self.config.get('memory', {}).get('retention', {})
-        cleanup_thresholds = self.config.get('memory', {}).get('cleanup', {})
-        
-        blobs = [
-            (self.short_term_memory, retention_config.get('short_term', 1)),
-            # Long term logic is more complex based on importance, handled below explicitly if needed
-            # For simplicity, treating long_term list iteration separately
-        ]
-
-        # 1. Cleanup Short Term (Strict time limit)
-        st_days = retention_config.get('short_term', 1)
-        self.short_term_memory = [
-            m for m in self.short_term_memory 
-            if (current_time - m['timestamp']) < (st_days * 86400)
-        ]
-        
-        # 2. Cleanup Long Term (Based on Importance)
-        min_days = retention_config.get('long_term_min', 30)
-        med_days = retention_config.get('long_term_med', 90)
-        high_days = retention_config.get('long_term_high', 180)
-        
-        low_thresh = cleanup_thresholds.get('low_importance_threshold', 20)
-        med_thresh = cleanup_thresholds.get('medium_importance_threshold', 50)
-        high_thresh = cleanup_thresholds.get('high_importance_threshold', 80)
-        
-        new_long_term = []
-        for m in self.long_term_memory:
-            age_days = (current_time - m['timestamp']) / 86400
-            imp = m['importance']
-            
-            keep = True
-            if imp < low_thresh and age_days > min_days:
-                keep = False
-            elif imp < med_thresh and age_days > med_days:
-                keep = False
-            elif imp < high_thresh and age_days > high_days:
-                keep = False
-            # imp >= high_thresh -> keep forever (implicit)
-            
-            if keep:
-                new_long_term.append(m)
-                
-        self.long_term_memory = new_long_term
-        
-        self._save_memories()
+        current_time = time.time() if now is None else now
+        with self._lock:
+            before = set(self._by_id)
+            for t in ("short_term", "long_term"):
+                kept = []
+                for m in self._memories_of(t):
+                    expires_at = self.retention.expires_at(m, t)
+                    if expires_at is None or expires_at > current_time:
+                        kept.append(m)
+                self._memories_of(t)[:] = kept
+            self._drop_removed()
+            self._rebuild_expiry()
+            removed = sorted(before - set(self._by_id))
+        self._persist_delete(removed)
+        self._maybe_compact()
         logger.info("Memory cleanup completed.")
 
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """
+        Remove memories whose expiry has passed. Pops only the due heap entries, so the cost
+        follows the number of evictions rather than the number of memories.
+        """
+        now = time.time() if now is None else now
+        doomed: Dict[str, Set[str]] = {t: set() for t in MEMORY_TYPES}
+        with self._lock:
+            for expires_at, memory_id, memory_type in self.expiry.pop_expired(now):
+                memory = self._by_id.get(memory_id)
+                if memory is None or self._bucket(memory.get('type')) != memory_type:
+                    continue  # already removed
+                current = self.retention.expires_at(memory, memory_type)
+                if current is not None and current > now:
+                    self.expiry.push(current, memory_id, memory_type)  # importance / timestamp changed
+                elif current is not None:
+                    doomed[memory_type].add(memory_id)
+            for memory_type, ids in doomed.items():
+                if ids:
+                    self._remove_memories(memory_type, ids)
+            evicted = sorted(set().union(*doomed.values()))
+        self._persist_delete(evicted)
+        if evicted:
+            self._maybe_compact()
+            logger.info(f"Evicted {len(evicted)} expired memories.")
+        return len(evicted)
+
+    def consolidate_memories(self, threshold: Optional[float] = None) -> Dict[str, int]:
+        """
+        Merge near-duplicate short_term / long_term memories (the same alert recorded over and
+        over) into one representative each.
+
+        Embedded memories are clustered by cosine similarity (threshold linkage to a leader;
+        leaders are long_term first, then the most important, most repeated and newest),
+        separately per (symbol, action): an alert on BTCUSDT never absorbs the same alert on
+        ETHUSDT, nor a TRADE memory a WAIT one, however similar the text.
+        Each cluster of two or more becomes one new memory with:
+          - the leader's content, symbol and embedding, and the union of the members' tags
+          - importance = the highest member importance
+          - timestamp = the latest occurrence; metadata.first_seen = the earliest
+          - metadata.consolidated_count = the number of occurrences merged so far
+        It is long_term if any member was, or once it stands for ``promote_min_count``
+        occurrences; otherwise it stays short_term (and expires from its latest occurrence).
+        The changes are applied in memory under the lock and persisted after it is released;
+        the representative is written before the members are deleted, so a crash in between
+        leaves duplicates, never a loss. Episodic memories are left alone.
+        """
+        threshold = self.consolidation.get('similarity_threshold', 0.9) if threshold is None else threshold
+        promote_min_count = self.consolidation.get('promote_min_count', 3)
+        types = ("short_term", "long_term")
+        for t in types:
+            self._index_pending(t)
+        with self._lock:
+            ids = [m for t in types for m in self.vectors[t].ids]
+            if len(ids) < 2:
+                return {"clusters": 0, "merged": 0, "promoted": 0}
+            vectors = np.concatenate([np.asarray(self.vectors[t].vectors) for t in types if len(self.vectors[t])])
+            memories = [self._by_id[m] for m in ids]
+
+        def rank(row: int):
+            m = memories[row]
+            return (self._bucket(m.get('type')) == "long_term", m.get('importance', 0),
+                    (m.get('metadata') or {}).get('consolidated_count', 1), m['timestamp'])
+        order = np.array(sorted(range(len(ids)), key=rank, reverse=True), dtype=np.int64)
+        keys = [(memory_symbol(m), (m.get('metadata') or {}).get('action')) for m in memories]
+        labels = cluster_within_groups(vectors, order, keys, threshold)
+
+        stats = {"clusters": 0, "merged": 0, "promoted": 0}
+        by_leader = np.argsort(labels, kind="stable")
+        leaders, starts, counts = np.unique(labels[by_leader], return_index=True, return_counts=True)
+        removed: Dict[str, Set[str]] = {t: set() for t in types}
+        created = []  # (memory, bucket, expires_at, embedding) to persist once the lock is released
+        with self._lock:
+            for leader, start, size in zip(leaders, starts, counts):
+                if size < 2:
+                    continue
+                group = [memories[r] for r in by_leader[start:start + size] if ids[r] in self._by_id]
+                if len(group) < 2 or ids[leader] not in self._by_id:
+                    continue  # evicted while clustering
+                buckets = {self._bucket(m.get('type')) for m in group}
+                count = sum((m.get('metadata') or {}).get('consolidated_count', 1) for m in group)
+                bucket = "long_term" if "long_term" in buckets or count >= promote_min_count else "short_term"
+                lead = memories[leader]
+                metadata = dict(lead.get('metadata') or {})
+                tags = sorted({tag for m in group for tag in memory_tags(m)})
+                if tags:
+                    metadata['tags'] = tags
+                metadata['consolidated_count'] = count
+                metadata['first_seen'] = min((m.get('metadata') or {}).get('first_seen', m['timestamp']) for m in group)
+                representative = {
+                    "id": str(uuid.uuid4()),
+                    "content": lead['content'],
+                    "type": bucket,
+                    "importance": max(m.get('importance', 0) for m in group),
+                    "timestamp": max(m['timestamp'] for m in group),
+                    "metadata": metadata,
+                }
+                expires_at = self._index_memory(representative, bucket, vectors[leader])
+                created.append((representative, bucket, expires_at, vectors[leader]))
+                for m in group:
+                    removed[self._bucket(m.get('type'))].add(m['id'])
+                stats["clusters"] += 1
+                stats["merged"] += len(group)
+                stats["promoted"] += bucket == "long_term" and buckets == {"short_term"}
+            # One pass per list for all clusters
+            for t, doomed in removed.items():
+                if doomed:
+                    self._remove_memories(t, doomed)
+        if self.database is not None:
+            for memory, bucket, expires_at, embedding in created:
+                self.database.put(memory, bucket, expires_at, embedding, self.retriever.model_tag)
+        self._persist_delete(sorted(removed["short_term"] | removed["long_term"]))
+        if stats["clusters"]:
+            self._schedule_training()
+            self._maybe_compact()
+            logger.info(f"Consolidated {stats['merged']} memories into {stats['clusters']} "
+                        f"({stats['promoted']} promoted to long-term).")
+        return stats
+
+    def _remove_memories(self, memory_type: str, ids: Set[str]):
+        """Drop the given memories of one type from the list, matrix and indexes (lock held)."""
+        memories = self._memories_of(memory_type)
+        # Expiry order mostly follows insertion order: the evicted memories are usually a prefix
+        head = 0
+        while head < len(memories) and memories[head]['id'] in ids:
+            head += 1
+        del memories[:head]
+        if head < len(ids):
+            memories[:] = [m for m in memories if m['id'] not in ids]
+        for memory_id in ids:
+            self.vectors[memory_type].remove(memory_id)
+            self._pending[memory_type].pop(memory_id, None)
+            self.metadata_index.remove(memory_id)
+            del self._by_id[memory_id]
+
+    def _persist_delete(self, memory_ids: List[str]):
+        """
+        Record removals already applied in memory. Called with the lock released (a database
+        round trip must not stall queries); a compaction in between already leaves them out,
+        and a late tombstone for an id that is gone is a no-op on replay.
+        """
+        if not memory_ids:
+            return
+        if self.database is not None:
+            self.database.delete(memory_ids)
+        else:
+            self.journal.delete(memory_ids)
+
+    def _rebuild_expiry(self):
+        self.expiry.rebuild([(self.retention.expires_at(m, t), m['id'], t)
+                             for t in MEMORY_TYPES for m in self._memories_of(t)])
+
+    def _reap_forever(self):
+        """
+        Reaper thread: sleep until the next expiry (at most cleanup_interval), then evict;
+        consolidate when due; fsync journal records once fsync_interval_ms has passed.
+        """
+        while not self._reaper_stop.is_set():
+            self._reaper_wake.clear()
+            timeout = self.cleanup_interval
+            if self.journal is not None:
+                try:
+                    self.journal.sync_if_due()
+                except Exception as e:
+                    logger.error(f"Memory journal sync failed: {e}")
+                delay = self.journal.sync_delay()
+                if delay is not None:
+                    timeout = min(timeout, delay)
+            try:
+                self.evict_expired()
+                next_expiry = self.expiry.next_expiry()
+                if next_expiry is not None:
+                    timeout = min(timeout, max(next_expiry - time.time(), 0.0))
+            except Exception as e:
+                logger.error(f"Memory eviction failed: {e}")
+            if self._next_consolidation is not None:
+                if time.monotonic() >= self._next_consolidation:
+                    try:
+                        self.consolidate_memories()
+                    except Exception as e:
+                        logger.error(f"Memory consolidation failed: {e}")
+                    self._next_consolidation = time.monotonic() + self.consolidation.get('interval_minutes', 60) * 60
+                timeout = min(timeout, max(self._next_consolidation - time.monotonic(), 0.0))
+            self._reaper_wake.wait(timeout)
+
+    def _drop_removed(self):
+        """Forget ids (and matrix rows) of memories no longer in any list."""
+        with self._lock:
+            for t in MEMORY_TYPES:
+                alive = {m['id'] for m in self._memories_of(t)}
+                self.vectors[t].retain(alive)
+                self._pending[t] = {m: None for m in self._pending[t] if m in alive}
+            alive = {m['id'] for t in MEMORY_TYPES for m in self._memories_of(t)}
+            for memory_id in set(self._by_id) - alive:
+                self.metadata_index.remove(memory_id)
+            self._by_id = {k: v for k, v in self._by_id.items() if k in alive}
+
+    def _maybe_compact(self):
+        """Fold the journal into a new snapshot once it is large relative to the live set."""
+        if self.journal is not None and self.journal.records >= max(self.compact_min_records, self.compact_ratio * len(self._by_id)):
+            self._save_memories()
+
+    def flush(self, timeout: Optional[float] = 30.0):
+        """Force journal records to disk and persist the embedding index (after queued embeddings land)."""
+        if self.worker:
+            self.worker.wait(timeout)
+        if self.journal is not None:  # with the database, rows and embeddings are written as they arrive
+            self.journal.sync()
+            with self._lock:
+                self.embedding_store.save(self.vectors)
+        self.retriever.save()
+
+    def close(self):
+        self._reaper_stop.set()
+        self._reaper_wake.set()
+        if self._reaper:
+            self._reaper.join()
+        if self._trainer:
+            self._trainer.join()
+        self.flush()
+        if self.worker:
+            self.worker.stop()
+        if self.journal is not None:
+            self.journal.close()
+
     def _save_memories(self):
-        # Exclude embedding objects from JSON
-        def clean_for_dump(mem_list):
-            dumps = []
-            for m in mem_list:
-                copy_m = m.copy()
-                if 'embedding' in copy_m:
-                    del copy_m['embedding']
-                dumps.append(copy_m)
-            return dumps
-
-        data = {
-            "short_term": clean_for_dump(self.short_term_memory),
-            "long_term": clean_for_dump(self.long_term_memory),
-            "episodic": clean_for_dump(self.episodic_memory)
-        }
-        
+        """Compaction: write a full snapshot (atomically), then truncate the journal."""
+        path = self._get_file_path("memories.json")
         try:
-            with open(self._get_file_path("memories.json"), 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # Held throughout so no journal record lands between the snapshot and the truncate
+            with self._lock:
+                data = {t: self._memories_of(t) for t in MEMORY_TYPES}
+                tmp = path + ".tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps(data, ensure_ascii=False))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, path)
+                self.embedding_store.save(self.vectors)
+                self.journal.reset()
         except Exception as e:
             logger.error(f"Failed to save memories: {e}")
 
     def _load_memories(self):
+        """Replay: memories.json snapshot, then the journal on top of it."""
+        if self.database is not None:
+            return self._load_from_database()
+        memories: Dict[str, Dict] = {}
         path = self._get_file_path("memories.json")
-        if not os.path.exists(path):
-            return
-
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            self.short_term_memory = data.get("short_term", [])
-            self.long_term_memory = data.get("long_term", [])
-            self.episodic_memory = data.get("episodic", [])
-            
-            # Re-generate embeddings (expensive!) or load cached separate embedding file
-            # For this MVP, we re-generate on load if content exists, or do lazy loading.
-            # To avoid slow startup, we'll do it lazily or assume retriever handles missing embeddings gracefully
-            # (which my retrieve_similar implementation does check)
-            
-            logger.info(f"Loaded {len(self.short_term_memory)} short-term, {len(self.long_term_memory)} long-term memories.")
-            
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for t in MEMORY_TYPES:
+                    for m in data.get(t, []):
+                        memories[m['id']] = m
+            for record in self.journal.replay():
+                apply_record(record, memories)
         except Exception as e:
             logger.error(f"Failed to load memories: {e}")
+
+        for m in memories.values():
+            self._memories_of(self._bucket(m.get('type'))).append(m)
+            self._by_id[m['id']] = m
+            self.metadata_index.add(m)
+        self._rebuild_expiry()
+        for t in MEMORY_TYPES:
+            self.vectors[t].retain(m['id'] for m in self._memories_of(t))
+            # e.g. inserted after the last flush: re-embedded in the background
+            self._queue_pending(t, [m for m in self._memories_of(t) if m['id'] not in self.vectors[t]])
+        if memories:
+            logger.info(f"Loaded {len(self.short_term_memory)} short-term, {len(self.long_term_memory)} long-term memories.")
+
+    def _load_from_database(self):
+        """Load every row of the memory table; rows with a current-model BLOB skip re-embedding."""
+        stored: Dict[str, tuple] = {t: ([], []) for t in MEMORY_TYPES}
+        try:
+            for m, memory_type, vector in self.database.load(self.retriever.model_tag):
+                self._memories_of(memory_type).append(m)
+                self._by_id[m['id']] = m
+                self.metadata_index.add(m)
+                if vector is not None:
+                    stored[memory_type][0].append(m['id'])
+                    stored[memory_type][1].append(vector)
+        except Exception as e:
+            logger.error(f"Failed to load memories from database: {e}")
+        self._rebuild_expiry()
+        for t, (ids, vectors) in stored.items():
+            if ids:
+                self.vectors[t].add_batch(ids, np.stack(vectors), [self._by_id[m]['timestamp'] for m in ids])
+            self._queue_pending(t, [m for m in self._memories_of(t) if m['id'] not in self.vectors[t]])
+        if self._by_id:
+            logger.info(f"Loaded {len(self.short_term_memory)} short-term, {len(self.long_term_memory)} long-term memories.")
+
+
+def _create_default_manager() -> MemoryManager:
+    from src.database.operations import db
+    return MemoryManager(database=db)
+
+
+# The application's memory store, persisted in the database memory table (created on first use)
+memory_manager = LazyObject(_create_default_manager)
@@ -0,0 +1,112 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .vector_index import SECONDS_PER_DAY
+
+
+def memory_symbol(memory: Dict[str, Any]) -> Optional[str]:
+    symbol = (memory.get('metadata') or {}).get('symbol')
+    return str(symbol).upper() if symbol else None
+
+
+def memory_tags(memory: Dict[str, Any]) -> List[str]:
+    tags = (memory.get('metadata') or {}).get('tags') or []
+    if isinstance(tags, str):
+        tags = [tags]
+    return [str(t).lower() for t in tags]
+
+
+class MetadataIndex:
+    """
+    Secondary indexes over memory metadata, used to narrow the candidate set before
+    similarity scoring.
+
+    Posting sets (memory ids) per symbol, per tag, per day bucket of the timestamp and per
+    importance value. A query intersects the equality postings (symbol, tags) smallest
+    first; range predicates (since, min_importance) are then checked on those few candidates
+    directly, or, when there is no equality filter, answered by unioning the day /
+    importance buckets. Work depends on the size of the matching postings, not on how many
+    unrelated memories exist.
+    """
+
+    def __init__(self):
+        self.by_symbol: Dict[str, Set[str]] = defaultdict(set)
+        self.by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self.by_day: Dict[int, Set[str]] = defaultdict(set)
+        self.by_importance: Dict[int, Set[str]] = defaultdict(set)
+        self._fields: Dict[str, tuple] = {}  # id -> (symbol, tags, timestamp, importance)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    @staticmethod
+    def _discard(postings: Dict[Any, Set[str]], key, memory_id: str):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(memory_id)
+            if not ids:
+                del postings[key]
+
+    def add(self, memory: Dict[str, Any]):
+        memory_id = memory['id']
+        if memory_id in self._fields:
+            self.remove(memory_id)
+        symbol, tags = memory_symbol(memory), memory_tags(memory)
+        timestamp, importance = float(memory.get('timestamp', 0)), int(memory.get('importance', 0))
+        if symbol:
+            self.by_symbol[symbol].add(memory_id)
+        for tag in tags:
+            self.by_tag[tag].add(memory_id)
+        self.by_day[int(timestamp // SECONDS_PER_DAY)].add(memory_id)
+        self.by_importance[importance].add(memory_id)
+        self._fields[memory_id] = (symbol, tags, timestamp, importance)
+
+    def remove(self, memory_id: str):
+        fields = self._fields.pop(memory_id, None)
+        if fields is None:
+            return
+        symbol, tags, timestamp, importance = fields
+        if symbol:
+            self._discard(self.by_symbol, symbol, memory_id)
+        for tag in tags:
+            self._discard(self.by_tag, tag, memory_id)
+        self._discard(self.by_day, int(timestamp // SECONDS_PER_DAY), memory_id)
+        self._discard(self.by_importance, importance, memory_id)
+
+    def query(self, symbol: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+              since: Optional[float] = None, min_importance: Optional[int] = None) -> Optional[Set[str]]:
+        """Ids matching every given filter (tags: all must be present); None when no filter is given."""
+        postings = []
+        if symbol:
+            postings.append(self.by_symbol.get(symbol.upper(), set()))
+        for tag in tags or ():
+            postings.append(self.by_tag.get(str(tag).lower(), set()))
+
+        if postings:
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for ids in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= ids
+            if since is not None or min_importance is not None:
+                candidates = {m for m in candidates if self._matches_range(m, since, min_importance)}
+            return candidates
+
+        if since is None and min_importance is None:
+            return None
+        ranges = []
+        if since is not None:
+            first_day = int(since // SECONDS_PER_DAY)
+            ranges.append((self.by_day, lambda day: day >= first_day))
+        if min_importance is not None:
+            ranges.append((self.by_importance, lambda value: value >= min_importance))
+        # Build the smaller range union, then check the other predicate per candidate
+        unions = [[ids for key, ids in index.items() if keep(key)] for index, keep in ranges]
+        smallest = min(unions, key=lambda sets: sum(map(len, sets)))
+        candidates = set().union(*smallest)
+        return {m for m in candidates if self._matches_range(m, since, min_importance)}
+
+    def _matches_range(self, memory_id: str, since: Optional[float], min_importance: Optional[int]) -> bool:
+        _, _, timestamp, importance = self._fields[memory_id]
+        return (since is None or timestamp >= since) and (min_importance is None or importance >= min_importance)
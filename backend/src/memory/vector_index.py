@@ -0,0 +1,446 @@
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+DEFAULT_DECAY_RATE = 0.01
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (or a single vector) as float32; zero vectors stay zero."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def apply_time_decay(scores: np.ndarray, timestamps: np.ndarray, now: Optional[float] = None,
+                     decay_rate: float = DEFAULT_DECAY_RATE) -> np.ndarray:
+    """Vectorized score * 1 / (1 + decay_rate * days_passed); future timestamps count as age 0."""
+    if not decay_rate:
+        return scores
+    now = time.time() if now is None else now
+    days = np.maximum((now - timestamps) / SECONDS_PER_DAY, 0.0)
+    return scores / (1.0 + decay_rate * days)
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first (argpartition + sort of the k survivors)."""
+    n = len(scores)
+    if top_k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < n:
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class EmbeddingMatrix:
+    """
+    Contiguous, L2-normalized float32 embeddings for one memory type.
+
+    Row i holds the embedding of ``ids[i]``; timestamps are kept in a parallel array so
+    time decay is applied to all rows at once. Removal moves the last row into the hole,
+    so the matrix stays dense and a query is a single matrix-vector product.
+
+    With ``path`` the rows live in a memory-mapped float32 file (see EmbeddingStore);
+    growing the matrix extends the file instead of copying it. The first write after a save
+    creates ``<path>.dirty``: from then on the saved id -> row index no longer matches the
+    file (rows are appended and moved in place) until the next save calls mark_clean().
+    """
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 1024, path: Optional[str] = None):
+        self.dim = dim
+        self.path = path
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._capacity = capacity
+        self._vectors: Optional[np.ndarray] = None
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._dirty = False
+
+    @classmethod
+    def restore(cls, path: str, dim: int, ids: Sequence[str], timestamps: np.ndarray) -> "EmbeddingMatrix":
+        """Map an existing embedding file whose first len(ids) rows belong to ids."""
+        capacity = os.path.getsize(path) // (dim * 4)
+        matrix = cls(dim=dim, capacity=max(capacity, len(ids), 1), path=path)
+        matrix._reserve(len(ids))
+        matrix.ids = list(ids)
+        matrix._rows = {memory_id: row for row, memory_id in enumerate(matrix.ids)}
+        matrix._timestamps[:len(ids)] = timestamps
+        return matrix
+
+    def flush(self):
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+
+    @property
+    def dirty_path(self) -> Optional[str]:
+        return self.path + ".dirty" if self.path else None
+
+    def _touch(self):
+        """Create the dirty marker (durably) before the first row write since the last save."""
+        if self.path is None or self._dirty:
+            return
+        with open(self.dirty_path, "w") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._dirty = True
+
+    def mark_clean(self):
+        """Called once the rows are flushed and the index matching them is saved."""
+        if self._dirty:
+            if os.path.exists(self.dirty_path):
+                os.remove(self.dirty_path)
+            self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._rows
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._vectors[:len(self.ids)]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:len(self.ids)]
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if self.path is None:
+            vectors = np.empty((capacity, self.dim), dtype=np.float32)
+            if self._vectors is not None:
+                vectors[:len(self.ids)] = self.vectors
+            return vectors
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+        size = capacity * self.dim * 4
+        with open(self.path, "r+b" if os.path.exists(self.path) else "w+b") as f:
+            if os.fstat(f.fileno()).st_size < size:
+                f.truncate(size)
+        return np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _reserve(self, size: int):
+        if self._vectors is not None and size <= self._capacity:
+            return
+        if self._vectors is None:
+            self._capacity = max(self._capacity, size)
+        while self._capacity < size:
+            self._capacity *= 2
+        timestamps = np.empty(self._capacity, dtype=np.float64)
+        timestamps[:len(self.ids)] = self.timestamps
+        self._vectors, self._timestamps = self._allocate(self._capacity), timestamps
+
+    def add(self, memory_id: str, vector: np.ndarray, timestamp: float):
+        self.add_batch([memory_id], np.asarray(vector)[None, :], [timestamp])
+
+    def add_batch(self, memory_ids: Sequence[str], vectors: np.ndarray, timestamps: Iterable[float]):
+        """Insert or replace rows; vectors are normalized on the way in."""
+        vectors = normalize(np.asarray(vectors).reshape(len(memory_ids), -1))
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {vectors.shape[1]} does not match index dim {self.dim}")
+        self._reserve(len(self.ids) + len(memory_ids))
+        self._touch()
+        for memory_id, vector, timestamp in zip(memory_ids, vectors, timestamps):
+            row = self._rows.get(memory_id)
+            if row is None:
+                row = len(self.ids)
+                self.ids.append(memory_id)
+                self._rows[memory_id] = row
+            self._vectors[row] = vector
+            self._timestamps[row] = timestamp
+
+    def remove(self, memory_id: str) -> bool:
+        row = self._rows.pop(memory_id, None)
+        if row is None:
+            return False
+        last = len(self.ids) - 1
+        if row != last:
+            self._touch()
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self._rows[moved] = row
+            self._vectors[row] = self._vectors[last]
+            self._timestamps[row] = self._timestamps[last]
+        self.ids.pop()
+        return True
+
+    def retain(self, keep_ids: Iterable[str]) -> int:
+        """Drop every row whose id is not in keep_ids; returns the number removed."""
+        keep = set(keep_ids)
+        stale = [memory_id for memory_id in self.ids if memory_id not in keep]
+        for memory_id in stale:
+            self.remove(memory_id)
+        return len(stale)
+
+    def search(self, query: np.ndarray, top_k: int, now: Optional[float] = None,
+               decay_rate: float = DEFAULT_DECAY_RATE) -> List[Tuple[str, float]]:
+        """Cosine similarity (with time decay) against every row; returns [(id, score)] best first."""
+        if not self.ids:
+            return []
+        scores = self.vectors @ normalize(query).reshape(-1)
+        scores = apply_time_decay(scores, self.timestamps, now, decay_rate)
+        return [(self.ids[i], float(scores[i])) for i in top_k_indices(scores, top_k)]
+
+    def search_subset(self, query: np.ndarray, memory_ids: Iterable[str], top_k: int, now: Optional[float] = None,
+                      decay_rate: float = DEFAULT_DECAY_RATE) -> List[Tuple[str, float]]:
+        """Exact search restricted to memory_ids (candidates pre-filtered by metadata); unknown ids are skipped."""
+        rows = np.fromiter((r for r in map(self._rows.get, memory_ids) if r is not None), dtype=np.int64)
+        if not len(rows):
+            return []
+        scores = self.vectors[rows] @ normalize(query).reshape(-1)
+        scores = apply_time_decay(scores, self.timestamps[rows], now, decay_rate)
+        return [(self.ids[rows[i]], float(scores[i])) for i in top_k_indices(scores, top_k)]
+
+
+def spherical_kmeans(vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """k unit-length centroids for normalized vectors (cosine k-means); empty clusters are re-seeded."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(labels, kind="stable")
+        present, starts = np.unique(labels[order], return_index=True)
+        centroids[present] = np.add.reduceat(vectors[order], starts, axis=0)
+        empty = np.setdiff1d(np.arange(k), present)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), size=len(empty), replace=False)]
+        centroids = normalize(centroids)
+    return centroids
+
+
+class IVFIndex:
+    """
+    IVF-flat approximate search over an EmbeddingMatrix (pure NumPy).
+
+    Rows are assigned to the nearest of ~sqrt(N) k-means centroids and kept in one row array
+    per list; a query scores the centroids, then only the rows of the ``nprobe`` best lists.
+    Below ``min_train`` rows (or before training) search is exact. Inserts are appended to
+    their list, deletes follow the matrix's swap-with-last, and the centroids are retrained
+    once the index has grown by ``retrain_growth`` since the last training, so lists stay
+    balanced.
+
+    With ``auto_train`` add_batch trains inline. Otherwise the owner polls ``training_due``
+    and runs begin_training() / fit() / install(): only the first and last need its lock,
+    the k-means in fit() reads a snapshot while inserts and deletes carry on (the rows they
+    touch are re-assigned when the new centroids are installed).
+    """
+
+    def __init__(self, matrix: EmbeddingMatrix, nprobe: int = 16, min_train: int = 4096,
+                 retrain_growth: float = 2.0, sample_per_list: int = 64, state: Optional[Dict] = None,
+                 auto_train: bool = True):
+        self.matrix = matrix
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.retrain_growth = retrain_growth
+        self.sample_per_list = sample_per_list
+        self.auto_train = auto_train
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self._assign = np.empty(0, dtype=np.int32)   # row -> list
+        self._slot = np.empty(0, dtype=np.int64)     # row -> position in its list
+        self._lists: List[np.ndarray] = []           # list -> rows (first _sizes[list] valid)
+        self._sizes = np.empty(0, dtype=np.int64)
+        self._touched: Optional[set] = None          # rows written while a training is running
+        if state and len(state.get("assign", ())) == len(matrix):
+            self._install_state(state["centroids"], np.array(state["assign"], dtype=np.int32), len(matrix))
+            self.trained_size = int(state["trained_size"])
+        elif auto_train and self.training_due:
+            self.train()
+
+    # --- EmbeddingMatrix interface ---
+    @property
+    def ids(self) -> List[str]:
+        return self.matrix.ids
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self.matrix.dim
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.matrix.vectors
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.matrix.timestamps
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self.matrix
+
+    def flush(self):
+        self.matrix.flush()
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def training_due(self) -> bool:
+        if self._touched is not None:
+            return False  # already training
+        n = len(self.matrix)
+        if not self.trained:
+            return n >= self.min_train
+        return n >= self.trained_size * self.retrain_growth
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays persisted next to the matrix index (empty when untrained)."""
+        if not self.trained:
+            return {}
+        return {"centroids": self.centroids, "assign": self._assign[:len(self)],
+                "trained_size": np.array(self.trained_size)}
+
+    # --- Training ---
+    def train(self):
+        self.install(*self.fit(self.begin_training()))
+
+    def begin_training(self) -> np.ndarray:
+        """Snapshot of the current rows for fit(); rows written from now on are tracked."""
+        self._touched = set()
+        return self.matrix.vectors
+
+    def fit(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """k-means centroids for the snapshot and its list assignment (needs no lock)."""
+        n = len(vectors)
+        nlist = max(1, int(np.sqrt(n)))
+        sample = vectors
+        if n > nlist * self.sample_per_list:
+            rows = np.random.default_rng(n).choice(n, size=nlist * self.sample_per_list, replace=False)
+            sample = vectors[np.sort(rows)]
+        centroids = spherical_kmeans(np.asarray(sample), nlist)
+        return centroids, self._nearest(vectors, centroids)
+
+    def install(self, centroids: np.ndarray, assign: np.ndarray):
+        """Swap in fit()'s result, re-assigning the rows added or moved since begin_training()."""
+        n = len(self.matrix)
+        touched, self._touched = self._touched or set(), None
+        full = np.empty(n, dtype=np.int32)
+        kept = min(n, len(assign))
+        full[:kept] = assign[:kept]
+        stale = np.array(sorted({r for r in touched if r < kept} | set(range(kept, n))), dtype=np.int64)
+        if len(stale):
+            full[stale] = self._nearest(self.matrix.vectors[stale], centroids)
+        self._install_state(centroids, full, n)
+        self.trained_size = n
+
+    def abort_training(self):
+        self._touched = None
+
+    def _install_state(self, centroids: np.ndarray, assign: np.ndarray, n: int):
+        """Build the per-list row arrays from a row -> list assignment."""
+        nlist = len(centroids)
+        capacity = max(n, 1024)
+        self._assign = np.empty(capacity, dtype=np.int32)
+        self._assign[:n] = assign[:n]
+        order = np.argsort(self._assign[:n], kind="stable")
+        self._sizes = np.bincount(self._assign[:n], minlength=nlist).astype(np.int64)
+        starts = np.cumsum(self._sizes) - self._sizes
+        self._lists = np.split(order, starts[1:])
+        self._slot = np.empty(capacity, dtype=np.int64)
+        self._slot[order] = np.arange(n) - np.repeat(starts, self._sizes)
+        self.centroids = centroids
+
+    def _nearest(self, vectors: np.ndarray, centroids: Optional[np.ndarray] = None, chunk: int = 8192) -> np.ndarray:
+        centroids = self.centroids if centroids is None else centroids
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            out[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        return out
+
+    # --- List maintenance ---
+    def _reserve_rows(self, n: int):
+        if len(self._assign) < n:
+            size = max(n, 2 * len(self._assign))
+            self._assign = np.resize(self._assign, size)
+            self._slot = np.resize(self._slot, size)
+
+    def _append(self, row: int, lst: int):
+        size = self._sizes[lst]
+        if size == len(self._lists[lst]):
+            self._lists[lst] = np.resize(self._lists[lst], max(8, 2 * size))
+        self._lists[lst][size] = row
+        self._assign[row] = lst
+        self._slot[row] = size
+        self._sizes[lst] = size + 1
+
+    def _detach(self, row: int):
+        """Remove row from its list (the list's last entry fills the gap)."""
+        lst, slot = self._assign[row], self._slot[row]
+        last = self._sizes[lst] - 1
+        moved = self._lists[lst][last]
+        self._lists[lst][slot] = moved
+        self._slot[moved] = slot
+        self._sizes[lst] = last
+
+    def add(self, memory_id: str, vector: np.ndarray, timestamp: float):
+        self.add_batch([memory_id], np.asarray(vector)[None, :], [timestamp])
+
+    def add_batch(self, memory_ids: Sequence[str], vectors: np.ndarray, timestamps: Iterable[float]):
+        before = len(self.matrix)
+        self.matrix.add_batch(memory_ids, vectors, timestamps)
+        rows = np.fromiter(dict.fromkeys(self.matrix._rows[m] for m in memory_ids), dtype=np.int64)
+        if self._touched is not None:
+            self._touched.update(rows.tolist())
+        if self.auto_train and self.training_due:
+            self.train()
+            return
+        if not self.trained:
+            return
+        self._reserve_rows(len(self.matrix))
+        for row, lst in zip(rows.tolist(), self._nearest(self.matrix.vectors[rows]).tolist()):
+            if row < before:
+                self._detach(row)  # re-embedded memory
+            self._append(row, lst)
+
+    def remove(self, memory_id: str) -> bool:
+        row = self.matrix._rows.get(memory_id)
+        last = len(self.matrix) - 1
+        if row is None:
+            return False
+        if self.trained:
+            self._detach(row)
+            if row != last:  # the matrix moves its last row into the hole
+                lst, slot = self._assign[last], self._slot[last]
+                self._lists[lst][slot] = row
+                self._assign[row], self._slot[row] = lst, slot
+        if self._touched is not None and row != last:
+            self._touched.add(row)
+        return self.matrix.remove(memory_id)
+
+    def retain(self, keep_ids: Iterable[str]) -> int:
+        keep = set(keep_ids)
+        stale = [memory_id for memory_id in self.ids if memory_id not in keep]
+        for memory_id in stale:
+            self.remove(memory_id)
+        return len(stale)
+
+    def search_subset(self, query: np.ndarray, memory_ids: Iterable[str], top_k: int, now: Optional[float] = None,
+                      decay_rate: float = DEFAULT_DECAY_RATE) -> List[Tuple[str, float]]:
+        # A metadata-filtered candidate set is already small: score it exactly
+        return self.matrix.search_subset(query, memory_ids, top_k, now, decay_rate)
+
+    def search(self, query: np.ndarray, top_k: int, now: Optional[float] = None,
+               decay_rate: float = DEFAULT_DECAY_RATE, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        if not self.trained:
+            return self.matrix.search(query, top_k, now, decay_rate)
+        query = normalize(query).reshape(-1)
+        probes = top_k_indices(self.centroids @ query, nprobe or self.nprobe)
+        rows = np.concatenate([self._lists[p][:self._sizes[p]] for p in probes])
+        if not len(rows):
+            return []
+        scores = self.matrix.vectors[rows] @ query
+        scores = apply_time_decay(scores, self.matrix.timestamps[rows], now, decay_rate)
+        return [(self.ids[rows[i]], float(scores[i])) for i in top_k_indices(scores, top_k)]
@@ -14,13 +14,12 @@ if not os.path.exists(env_path):
     env_path = os.path.join(os.path.dirname(__file__), "..", "..", ".env")
 load_dotenv(env_path)
 
-from binance import AsyncClient, BinanceSocketManager
-
 from src.ai_agents.coordinator import CoordinatorAgent
 from src.ai_agents.consultants.technical import TechnicalConsultant
 from src.ai_agents.consultants.fundamental import FundamentalConsultant
 from src.ai_agents.consultants.risk import RiskConsultant
 from src.database.operations import db
+from src.database.async_operations import async_db
 from src.utils.logger import logger
 
 # Ensure Env
@@ -74,7 +73,13 @@ class Watchdog:
 
     def reload_triggers(self):
         """Reload active triggers from DB"""
-        raw_triggers = db.get_active_triggers()
+        self._set_triggers(db.get_active_triggers())
+
+    async def refresh_triggers(self):
+        """Reload active triggers from DB without blocking the event loop"""
+        self._set_triggers(await async_db.get_active_triggers())
+
+    def _set_triggers(self, raw_triggers):
         self.triggers = []
         for t in raw_triggers:
             try:
@@ -128,7 +133,7 @@ class Watchdog:
         while True:
             try:
                 # 1. Check for manual triggers
-                self.reload_triggers()
+                await self.refresh_triggers()
                 
                 # Check ALL triggers for 'is_manual'
                 manual_trigger = next((t for t in self.triggers if t.get('is_manual')), None)
@@ -138,7 +143,7 @@ class Watchdog:
                     target_symbol = manual_trigger.get('symbol', 'BTCUSDT') # Default to BTC
 
                     # Consume immediately
-                    db.update_trigger_status(manual_trigger['id'], "TRIGGERED")
+                    await async_db.update_trigger_status(manual_trigger['id'], "TRIGGERED")
                     
                     # Prepare Event
                     snapshot = MarketPreprocessor.get_snapshot(self.coordinator.connector, target_symbol)
@@ -155,7 +160,7 @@ class Watchdog:
                     await self.run_ai_cycle(event)
                     
                     # Reload to remove consumed trigger
-                    self.reload_triggers()
+                    await self.refresh_triggers()
                 
                 await asyncio.sleep(2) # Poll every 2 seconds
             except Exception as e:
@@ -169,14 +174,14 @@ class Watchdog:
         if not stream or current_price == 0: return
         
         # 0. Check System Status
-        status = db.get_config("system_status", "STOPPED")
+        status = await async_db.get_config("system_status", "STOPPED")
         if status != "RUNNING":
             if time.time() - self.last_wake_times.get(stream, 0) > 60:
                  self.last_wake_times[stream] = time.time()
             return
 
         # Heartbeat (Global)
-        db.set_config("system_heartbeat", datetime.now().strftime("%H:%M:%S"))
+        await async_db.set_config("system_heartbeat", datetime.now().strftime("%H:%M:%S"))
 
         # 2. Local Filter (Only Price/Tech triggers now)
         should_wake, reason, trigger_obj = self.should_wake_up(current_price, stream)
@@ -208,7 +213,7 @@ class Watchdog:
         
         action_type = decision.get('action', {}).get('type')
         if action_type == 'SET_TRIGGER':
-             self.reload_triggers()
+             await self.refresh_triggers()
              logger.info("Watchdog triggers updated.")
 
 # ...
@@ -277,6 +282,8 @@ async def start_coordinator_service():
         except Exception:
             pass
 
+    from binance import AsyncClient, BinanceSocketManager
+
     client = await AsyncClient.create(
         api_key=api_key, 
         api_secret=api_secret,
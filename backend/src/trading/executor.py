@@ -127,10 +127,8 @@ class TradeExecutor:
                 "order_id": str(binance_res['orderId']),
                 "status": OrderStatus.FILLED
             }
-            db.record_trade(trade_dict)
-            
-            # Update Position
-            self.position_manager.update_from_trade(trade_dict)
+            # 成交记录与持仓更新在同一事务中写入
+            self.position_manager.update_from_trade(trade_dict, record_trade=True)
             
             return ExecutionResult(True, str(binance_res['orderId']), "Real order filled", trade_dict['price'], trade_dict['quantity'])
 
@@ -167,9 +165,7 @@ class TradeExecutor:
             "order_id": trade_record.order_id,
             "status": trade_record.status
         }
-        db.record_trade(trade_dict) 
-        
-        # Update Position
-        self.position_manager.update_from_trade(trade_dict)
+        # 成交记录与持仓更新在同一事务中写入
+        self.position_manager.update_from_trade(trade_dict, record_trade=True)
         
         return ExecutionResult(True, fake_id, "Paper order filled", order.price, order.quantity)
@@ -32,6 +32,7 @@ class SafetyGuard:
             'max_single_loss': self.risk_config.get('max_single_loss', 0.02), # 2% per trade intent (not slippage)
             'max_order_pct': 0.20, # Max 20% of account per order (Fat Finger)
             'daily_trade_limit': self.risk_config.get('daily_trade_limit', 20),
+            'hourly_trade_limit': self.risk_config.get('hourly_trade_limit', 5),
             'min_notional': 10.0, # Binance Min $10
         }
         logger.info(f"SafetyGuard initialized with limits: {self.limits}")
@@ -108,9 +109,10 @@ class SafetyGuard:
 
     def _is_frequency_limit_reached(self) -> bool:
         """
-        检查过去 1 小时的下单数量
+        检查过去 1 小时及当日 (UTC) 的成交数量
         """
-        # 从 DB 查询过去 1h 的 Trades 数量
-        # count = db.get_recent_trade_count(minutes=60)
-        # return count > self.limits['daily_trade_limit']
-        return False # TODO: Implement DB query
+        # 读内存滚动计数 (成交时同步更新)，下单热路径不访问数据库
+        stats = db.trade_stats
+        if stats.trades_last_hour() >= self.limits['hourly_trade_limit']:
+            return True
+        return stats.trades_today() >= self.limits['daily_trade_limit']
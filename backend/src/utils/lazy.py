@@ -0,0 +1,91 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.logger import logger
+
+
+class LazyModule(ModuleType):
+    """
+    延迟导入的模块代理
+    首次访问属性时才执行真正的 import，之后直接转发 (重量级 SDK 不再拖慢启动)
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    """返回模块代理，用法与 import 后的模块相同: pd = lazy_import("pandas")"""
+    return LazyModule(name)
+
+
+_optional_modules: Dict[str, Optional[ModuleType]] = {}
+
+
+def optional_import(name: str, feature: str = "") -> Optional[ModuleType]:
+    """
+    导入可选依赖，未安装时返回 None
+    在使用处调用 (而不是模块顶层)，结果会缓存，缺失时只警告一次
+    """
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+            logger.warning(f"{name} not installed.{' ' + feature + ' will not work.' if feature else ''}")
+    return _optional_modules[name]
+
+
+class LazyObject:
+    """
+    延迟创建的全局单例代理
+    首次访问属性时调用 factory 创建实例 (如数据库引擎)，导入模块本身没有副作用
+    """
+
+    __slots__ = ("_factory", "_instance", "_lock")
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _get(self) -> Any:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    @property
+    def initialized(self) -> bool:
+        return object.__getattribute__(self, "_instance") is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._get(), name, value)
+
+    def __repr__(self) -> str:
+        if not self.initialized:
+            return f"<LazyObject (uninitialized) {object.__getattribute__(self, '_factory')!r}>"
+        return repr(self._get())
@@ -8,14 +8,14 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 # logger.py is in backend/src/utils, so root is up 2 levels
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 LOG_DIR = os.path.join(PROJECT_ROOT, "data", "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
 
 def setup_logger(log_level="INFO", log_file=None):
     """
-    配置全局 Logger
+    配置全局 Logger (由入口程序调用，导入本模块不会创建日志文件)
     :param log_level: 日志级别
     :param log_file: 日志文件路径，默认为 data/logs/app.log
     """
+    os.makedirs(LOG_DIR, exist_ok=True)
     logger.remove()  # 移除默认的 handler
     
     if log_file is None:
@@ -49,6 +49,3 @@ def setup_logger(log_level="INFO", log_file=None):
     )
     
     return logger
-
-# 默认初始化
-setup_logger()
@@ -0,0 +1,88 @@
+"""
+决策上下文存储基准
+
+模拟 Coordinator 每轮写入的完整上下文 (行情快照每轮变化，持仓 / 记忆 / 触发器大多不变)，
+对比原始 JSON 大小与分块去重 + 压缩后的实际存储大小。
+
+运行: python tests/bench_decision_blobs.py [--cycles 500]
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from loguru import logger
+from sqlalchemy import text
+
+from src.database.operations import DatabaseManager
+from src.database.blob_store import _dumps
+
+
+def make_context(cycle: int):
+    # 记忆和持仓每 50 轮变化一次，触发器每 10 轮变化一次
+    return {
+        "market_snapshot": {"BTC": 50000 + random.uniform(-500, 500), "ETH": 3000 + random.uniform(-50, 50),
+                            "timestamp": f"2024-01-01T00:{cycle % 60:02d}:00"},
+        "positions": [{"symbol": s, "amount": 0.1 * (cycle // 50 + 1), "avg_price": 100.0 * i}
+                      for i, s in enumerate(["BTCUSDT", "ETHUSDT", "SOLUSDT"])],
+        "active_triggers": [{"id": t, "description": f"Price crosses level {t}", "condition": {"operator": ">", "value": t}}
+                            for t in range(cycle // 10, cycle // 10 + 5)],
+        "memories": [{"content": f"Lesson {m}: " + "avoid chasing breakouts on low volume. " * 4,
+                      "importance": 50 + m} for m in range(cycle // 50, cycle // 50 + 15)],
+        "event": {"type": "SCHEDULED", "reason": "Periodic review"},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cycles", type=int, default=500)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(db_url=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        manager.create_tables()
+
+        raw_bytes = 0
+        start = time.perf_counter()
+        for cycle in range(args.cycles):
+            result = {"thought_process": "Market is ranging. " * 30, "action": {"type": "HOLD"}}
+            entry = {"decision_type": "HOLD", "layer": "EXECUTION", "input_data": make_context(cycle),
+                     "output_recommendation": result, "confidence": 0.9}
+            # 与 BaseAgent.log_decision 相同的记录结构
+            record = {"decision_type": "UNKNOWN", "input_data": {}, "output_recommendation": entry,
+                      "confidence": 0.9, "layer": "EXECUTION"}
+            raw_bytes += len(_dumps(record["input_data"])) + len(_dumps(record["output_recommendation"]))
+            manager.log_decision(record)
+        elapsed = time.perf_counter() - start
+
+        with manager.engine.connect() as conn:
+            row_bytes = conn.execute(text(
+                "SELECT SUM(LENGTH(input_data) + LENGTH(output_recommendation)) FROM ai_decisions"
+            )).scalar()
+            blob_bytes, blob_count = conn.execute(text("SELECT SUM(LENGTH(data)), COUNT(*) FROM decision_blobs")).one()
+
+        stored = row_bytes + (blob_bytes or 0)
+        print(f"cycles          : {args.cycles} ({elapsed * 1000 / args.cycles:.2f} ms/decision)")
+        print(f"raw JSON        : {raw_bytes / args.cycles:>9.0f} bytes/decision")
+        print(f"stored (row+blob): {stored / args.cycles:>9.0f} bytes/decision "
+              f"(rows {row_bytes / args.cycles:.0f}, {blob_count} blobs, codec={manager.decision_blobs.codec})")
+        print(f"reduction       : {raw_bytes / stored:.1f}x")
+
+        start = time.perf_counter()
+        manager.get_decisions(limit=100)
+        print(f"read 100 full   : {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        manager.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+决策全文检索基准
+
+生成 N 条决策 (约 70% 新闻标题、30% 带推理的 Agent 决策，词频服从 Zipf 分布，
+检索的主题短语各占约 0.1%)，对比
+FTS5 检索 (/api/ai/search 使用的路径) 与逐行扫描 search_text 的耗时。
+
+运行: python tests/bench_decision_search.py [--rows 1000000]
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from loguru import logger
+from sqlalchemy import insert, text
+
+from src.database.operations import DatabaseManager
+from src.database.models import AIDecision
+from src.database.search import segment
+
+# 检索的主题短语，各自以 TOPIC_RATE 的比例混入正文
+QUERIES = ["ETF approval", "whale liquidation", "fed cpi yields", "halving miner", "突破 阻力", "SEC lawsuit"]
+TOPIC_RATE = 0.001
+
+
+def make_vocabulary(rnd: random.Random, size: int = 20000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rnd.choice(letters) for _ in range(rnd.randint(3, 10))) for _ in range(size)]
+    words += ["减仓", "加仓", "观望", "回调", "支撑", "趋势", "震荡", "放量"]
+    # Zipf 分布: 少数高频词 + 大量低频词
+    cum_weights = list(accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    return words, cum_weights
+
+
+def make_rows(rnd: random.Random, vocab, start: datetime, count: int, offset: int):
+    words, cum_weights = vocab
+    rows = []
+    for i in range(count):
+        news = rnd.random() < 0.7
+        tokens = rnd.choices(words, cum_weights=cum_weights, k=rnd.randint(6, 12) if news else rnd.randint(25, 45))
+        for topic in QUERIES:
+            if rnd.random() < TOPIC_RATE:
+                tokens.insert(rnd.randrange(len(tokens)), topic)
+        body = " ".join(tokens)
+        rows.append({
+            "decision_type": "NEWS_EVENT" if news else "HOLD",
+            "layer": "ANALYSIS" if news else "EXECUTION",
+            "confidence": rnd.random(),
+            "timestamp": start + timedelta(seconds=offset + i),
+            "input_data": {"title": body} if news else {},
+            "output_recommendation": {} if news else {"reasoning": body},
+            "search_text": segment(body),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=20_000)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+    rnd = random.Random(0)
+    vocab = make_vocabulary(rnd)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        manager = DatabaseManager(db_url=f"sqlite:///{path}")
+        manager.create_tables()
+
+        start = time.perf_counter()
+        t0 = datetime(2024, 1, 1)
+        for offset in range(0, args.rows, args.batch):
+            rows = make_rows(rnd, vocab, t0, min(args.batch, args.rows - offset), offset)
+            with manager.get_session() as session:
+                session.execute(insert(AIDecision), rows)
+        elapsed = time.perf_counter() - start
+        print(f"rows            : {args.rows} (insert + index {elapsed:.1f}s, {args.rows / elapsed:.0f} rows/s)")
+        print(f"database size   : {os.path.getsize(path) / 1e6:.0f} MB")
+
+        print(f"{'query':<20} {'matches':>8} {'fts p50 ms':>11} {'scan ms':>9}")
+        for q in QUERIES:
+            timings = []
+            for _ in range(5):
+                t = time.perf_counter()
+                rows, _ = manager.search_decisions(q, limit=20)
+                timings.append((time.perf_counter() - t) * 1000)
+            timings.sort()
+
+            like = " AND ".join(f"search_text LIKE :p{i}" for i in range(len(q.split())))
+            params = {f"p{i}": f"%{segment(w)}%" for i, w in enumerate(q.split())}
+            t = time.perf_counter()
+            with manager.engine.connect() as conn:
+                matches = conn.execute(text(f"SELECT COUNT(*) FROM ai_decisions WHERE {like}"), params).scalar()
+            scan_ms = (time.perf_counter() - t) * 1000
+            print(f"{q:<20} {matches:>8} {timings[len(timings) // 2]:>11.1f} {scan_ms:>9.0f}")
+
+        print("sample          :", rows[0].snippet if rows else "-")
+        manager.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+启动耗时基准 (python -X importtime)
+
+在全新子进程中导入入口模块 (API / 数据库层 / 采集器 CLI)，取多次运行的中位数，
+列出累计耗时最高的依赖模块；任一入口超过预算时以非零状态退出 (可用于 CI)。
+
+运行:
+  python tests/bench_import_time.py [--runs 5] [--top 10] [--budget-ms 1500]
+  python tests/bench_import_time.py --target main --target src.api.ai
+"""
+import sys
+import os
+import argparse
+import statistics
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(current_dir)
+
+DEFAULT_TARGETS = ["main", "src.database.operations", "src.collectors.news_collector"]
+# 导入入口模块后不应被加载的重量级依赖 (由后台任务或首次使用时加载)
+DEFERRED_MODULES = ["pandas", "binance", "anthropic", "google.genai", "sentence_transformers", "torch"]
+
+
+def import_profile(target: str):
+    """
+    在子进程中导入 target
+    :return: (总耗时 ms, {直接导入的模块: 累计耗时 ms}, 已加载的重量级依赖)
+    """
+    probe = (
+        f"import sys; import {target}; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    cumulative, direct = {}, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            micros = int(parts[1])
+        except ValueError:
+            continue  # 表头行
+        name = parts[2].strip()
+        cumulative[name] = micros / 1000.0
+        # 缩进 = 嵌套层级；target 之下一层即 target 直接导入的模块
+        if len(parts[2]) - len(parts[2].lstrip()) == 3:
+            direct.append(name)
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative.get(target, 0.0), {m: cumulative[m] for m in direct}, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", action="append", help="module to import (repeatable)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports to list per target")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="fail if a target's median exceeds this")
+    args = parser.parse_args()
+
+    over_budget = []
+    for target in args.target or DEFAULT_TARGETS:
+        totals, profiles, loaded = [], [], []
+        for _ in range(args.runs):
+            total, cumulative, loaded = import_profile(target)
+            totals.append(total)
+            profiles.append(cumulative)
+        median = statistics.median(totals)
+        status = "OK" if median <= args.budget_ms else "OVER BUDGET"
+        print(f"\n{target}: median {median:.0f} ms (min {min(totals):.0f}, max {max(totals):.0f}) "
+              f"budget {args.budget_ms:.0f} ms [{status}]")
+        if loaded:
+            print(f"  heavy modules loaded at import: {', '.join(loaded)}")
+
+        modules = {m for p in profiles for m in p}
+        slowest = sorted(modules, key=lambda m: -statistics.median(p.get(m, 0.0) for p in profiles))
+        for module in slowest[:args.top]:
+            print(f"  {statistics.median(p.get(module, 0.0) for p in profiles):>8.1f} ms  {module}")
+        if median > args.budget_ms:
+            over_budget.append(target)
+
+    if over_budget:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+IVF-flat vs exact memory retrieval: recall@k against latency.
+
+Synthetic embeddings are drawn around topic centres (real sentence embeddings are
+clustered; uniform random vectors have no neighbourhood structure to exploit).
+Queries are perturbed copies of stored memories. Exact search (EmbeddingMatrix) is
+the ground truth; IVFIndex is swept over nprobe. Also reports training time and the
+cost of incremental inserts / deletes after training.
+
+Run:
+  python tests/bench_memory_ann.py [--memories 100000] [--dim 384] [--topics 2000] [--nprobe 1,4,8,16,32,64]
+"""
+import sys
+import os
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+import numpy as np
+
+from src.memory.vector_index import EmbeddingMatrix, IVFIndex
+
+
+def make_corpus(rng, n, dim, topics, noise):
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    data = centres[rng.integers(0, topics, n)] + noise * rng.standard_normal((n, dim)).astype(np.float32)
+    return data
+
+
+def median_ms(fn, items):
+    samples, results = [], []
+    for item in items:
+        t0 = time.perf_counter()
+        results.append(fn(item))
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples)) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memories", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--noise", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,4,8,16,32,64")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    now = time.time()
+    data = make_corpus(rng, args.memories, args.dim, args.topics, args.noise)
+    timestamps = now - rng.uniform(0, 365 * 86400, args.memories)
+    ids = [f"m{i}" for i in range(args.memories)]
+    picks = rng.integers(0, args.memories, args.queries)
+    queries = data[picks] + args.noise * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    exact = EmbeddingMatrix(capacity=args.memories)
+    exact.add_batch(ids, data, timestamps)
+    t0 = time.perf_counter()
+    ivf = IVFIndex(EmbeddingMatrix(capacity=args.memories), min_train=args.memories)
+    ivf.add_batch(ids, data, timestamps)
+    train_s = time.perf_counter() - t0
+    print(f"memories={args.memories} dim={args.dim} lists={len(ivf.centroids)} "
+          f"train+assign={train_s:.1f} s top_k={args.top_k}")
+
+    exact_ms, truth = median_ms(lambda q: {i for i, _ in exact.search(q, args.top_k, now=now)}, queries)
+    print(f"{'method':<14} {'recall@k':>9} {'median ms':>10} {'speedup':>8}")
+    print(f"{'exact':<14} {1.0:>9.3f} {exact_ms:>10.2f} {1.0:>7.1f}x")
+    for nprobe in [int(p) for p in args.nprobe.split(",")]:
+        ms, found = median_ms(lambda q: {i for i, _ in ivf.search(q, args.top_k, now=now, nprobe=nprobe)}, queries)
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        print(f"{'ivf nprobe=' + str(nprobe):<14} {recall:>9.3f} {ms:>10.2f} {exact_ms / ms:>7.1f}x")
+
+    # Incremental maintenance after training (no retrain: stays below retrain_growth)
+    extra = make_corpus(rng, 1000, args.dim, args.topics, args.noise)
+    extra_ids = [f"x{i}" for i in range(1000)]
+    t0 = time.perf_counter()
+    for memory_id, vector in zip(extra_ids, extra):
+        ivf.add(memory_id, vector, now)
+    insert_us = (time.perf_counter() - t0) / 1000 * 1e6
+    t0 = time.perf_counter()
+    for memory_id in extra_ids:
+        ivf.remove(memory_id)
+    delete_us = (time.perf_counter() - t0) / 1000 * 1e6
+    print(f"incremental: insert {insert_us:.0f} us/memory, delete {delete_us:.0f} us/memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Query embedding cache: repeated trigger descriptions with and without the LRU cache.
+
+Simulates watchdog cycles: each cycle embeds one of a small set of trigger descriptions
+(Zipf-distributed, with varying whitespace) and retrieves memories for it. Reports
+per-query latency, model calls and the cache hit rate. Uses the stub cost model from
+bench_memory_ingest when sentence-transformers is not installed.
+
+Run:
+  python tests/bench_memory_cache.py [--cycles 500] [--triggers 40]
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+sys.path.append(current_dir)
+
+import numpy as np
+from loguru import logger
+
+from src.memory.memory_system import MemoryManager
+from bench_memory_ingest import CONFIG_PATH, StubModel
+
+
+def run(args, use_cache: bool):
+    rng = np.random.default_rng(0)
+    triggers = [f"{sym} price within {p}% of key level, RSI {r}"
+                for sym, p, r in zip(["BTCUSDT", "ETHUSDT", "SOLUSDT", "DOGEUSDT"] * args.triggers,
+                                     range(args.triggers), range(30, 30 + args.triggers))]
+    weights = 1.0 / np.arange(1, len(triggers) + 1)
+    picks = rng.choice(len(triggers), size=args.cycles, p=weights / weights.sum())
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MemoryManager(config_path=CONFIG_PATH, storage_dir=tmp)
+        if not use_cache:
+            manager.retriever.cache = None
+        transformer = manager.retriever.embedder == "sentence-transformers" and manager.retriever.model
+        model = transformer or StubModel(args.call_ms, args.text_ms)
+        manager.retriever.model = model
+        for i in range(200):
+            manager.add_memory(f"memory {i} about {triggers[i % len(triggers)]}", "long_term", 50)
+        manager.worker.wait()
+        calls_before = getattr(model, "calls", 0)
+        if use_cache:
+            manager.retriever.cache.hits = manager.retriever.cache.misses = 0  # count queries only
+        latencies = []
+        for pick in picks:
+            query = triggers[pick] if rng.random() < 0.5 else f"  {triggers[pick]}  "
+            t0 = time.perf_counter()
+            manager.retrieve_similar(query, top_k=5)
+            latencies.append(time.perf_counter() - t0)
+        calls = getattr(model, "calls", 0) - calls_before
+        hit_rate = manager.retriever.cache.stats()["hit_rate"] if use_cache else 0.0
+        manager.close()
+    return float(np.median(latencies)) * 1000, float(np.mean(latencies)) * 1000, calls, hit_rate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cycles", type=int, default=500)
+    parser.add_argument("--triggers", type=int, default=40)
+    parser.add_argument("--call-ms", type=float, default=8.0)
+    parser.add_argument("--text-ms", type=float, default=1.5)
+    args = parser.parse_args()
+    logger.remove()
+
+    print(f"{args.cycles} queries over {args.triggers} distinct trigger descriptions")
+    print(f"{'mode':<9} {'p50 ms':>8} {'mean ms':>8} {'model calls':>12} {'hit rate':>9}")
+    for name, use_cache in (("no cache", False), ("cache", True)):
+        p50, mean, calls, hit_rate = run(args, use_cache)
+        print(f"{name:<9} {p50:>8.3f} {mean:>8.3f} {calls:>12} {hit_rate:>9.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Memory consolidation: near-duplicate memories merged into representatives.
+
+Synthetic store: ``--topics`` distinct pieces of information, each recorded a random
+number of times (1 to ``--max-repeats``, like the same proximity alert firing every cycle)
+as slightly perturbed embeddings, split between short_term and long_term. Reports
+consolidation time, store size and query latency before / after, how many of the top-5
+results are distinct topics, and clustering quality (duplicate groups fully merged,
+memories merged into the wrong topic).
+
+Run:
+  python tests/bench_memory_consolidation.py [--topics 2000,20000] [--max-repeats 10]
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+import numpy as np
+from loguru import logger
+
+from src.memory.memory_system import MemoryManager, MEMORY_TYPES
+from src.memory.vector_index import normalize
+
+CONFIG_PATH = os.path.join(os.path.dirname(current_dir), "src", "config", "memory_config.yaml")
+
+
+def make_manager(storage_dir: str, topics: int, max_repeats: int, dim: int, noise: float):
+    manager = MemoryManager(config_path=CONFIG_PATH, storage_dir=storage_dir)
+    manager._reaper_stop.set()
+    manager._reaper_wake.set()
+    manager.retriever.model = None  # vectors are injected below
+    manager.compact_min_records = 10 ** 9
+    rng = np.random.default_rng(0)
+    centers = normalize(rng.standard_normal((topics, dim)).astype(np.float32))
+    repeats = rng.integers(1, max_repeats + 1, topics)
+    rows = {t: ([], []) for t in MEMORY_TYPES}
+    now = time.time()
+    for topic, count in enumerate(repeats):
+        for r in range(count):
+            memory_type = "long_term" if rng.random() < 0.5 else "short_term"
+            memory_id = manager.add_memory(f"topic {topic} occurrence {r}", memory_type, int(rng.integers(0, 80)))
+            manager._by_id[memory_id]['timestamp'] = now - rng.uniform(0, 3600)
+            vector = centers[topic] + noise * rng.standard_normal(dim).astype(np.float32) / np.sqrt(dim)
+            rows[memory_type][0].append(memory_id)
+            rows[memory_type][1].append(vector)
+    for t, (ids, vectors) in rows.items():
+        if ids:
+            manager.vectors[t].add_batch(ids, normalize(np.stack(vectors)), [manager._by_id[m]['timestamp'] for m in ids])
+        manager._pending[t].clear()
+    return manager, centers, repeats
+
+
+def topic_of(memory) -> int:
+    return int(memory['content'].split()[1])  # representatives keep the leader's content
+
+
+def query_stats(manager, centers, queries):
+    latencies, distinct = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        scored = []
+        for t in MEMORY_TYPES:
+            scored.extend(manager.vectors[t].search(centers[q], 5))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        latencies.append(time.perf_counter() - t0)
+        distinct.append(len({topic_of(manager._by_id[m]) for m, _ in scored[:5]}))
+    return float(np.median(latencies)) * 1000, float(np.mean(distinct))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topics", default="2000,20000")
+    parser.add_argument("--max-repeats", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--noise", type=float, default=0.3, help="perturbation norm of a repeat")
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+    logger.remove()
+
+    print(f"{'topics':>7} {'memories':>9} {'after':>7} {'consolidate s':>14} {'groups merged':>14} "
+          f"{'wrong merges':>13} {'query ms':>15} {'distinct top5':>14}")
+    for topics in [int(t) for t in args.topics.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager, centers, repeats = make_manager(tmp, topics, args.max_repeats, args.dim, args.noise)
+            queries = np.random.default_rng(1).integers(0, topics, 50)
+            before = len(manager._by_id)
+            q_before, d_before = query_stats(manager, centers, queries)
+
+            t0 = time.perf_counter()
+            manager.consolidate_memories(threshold=args.threshold)
+            elapsed = time.perf_counter() - t0
+
+            survivors = np.zeros(topics, dtype=np.int64)  # memories left per topic
+            occurrences = np.zeros(topics, dtype=np.int64)  # occurrences they stand for
+            for memory in manager._by_id.values():
+                survivors[topic_of(memory)] += 1
+                occurrences[topic_of(memory)] += memory['metadata'].get('consolidated_count', 1)
+            duplicated = repeats > 1
+            merged_groups = float(np.mean(survivors[duplicated] == 1))
+            wrong = int(np.abs(occurrences - repeats).sum() // 2)  # each misplaced occurrence counts twice
+            q_after, d_after = query_stats(manager, centers, queries)
+            after = len(manager._by_id)
+            manager.close()
+        print(f"{topics:>7} {before:>9} {after:>7} {elapsed:>14.2f} {merged_groups:>14.1%} "
+              f"{wrong:>13} {q_before:>6.2f} -> {q_after:<5.2f} {d_before:>5.2f} -> {d_after:<5.2f}")
+
+
+if __name__ == "__main__":
+    main()
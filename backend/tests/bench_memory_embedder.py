@@ -0,0 +1,157 @@
+"""
+Embedders for memory retrieval: built-in HashingEmbedder vs sentence-transformers (MiniLM).
+
+Fixture corpus: groups of paraphrased trading memories plus unrelated distractors. Every
+paraphrase is used as a query against the rest of the corpus; recall@k is the share of its
+group-mates found in the top k. Also reports encode cost per text (single and batched).
+The "+idf" rows use the frozen IDF the app uses (fitted on src/memory/idf_corpus.txt, not
+on this fixture). The MiniLM rows are only printed when sentence-transformers is installed.
+
+Run:
+  python tests/bench_memory_embedder.py [--k 3] [--dims 256,1024,4096]
+"""
+import sys
+import os
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+import numpy as np
+from loguru import logger
+
+from src.memory.hashing_embedder import HashingEmbedder, frozen_idf
+from src.memory.vector_index import normalize
+from src.utils.lazy import optional_import
+
+PARAPHRASES = [
+    ["BTCUSDT rejected at the 69k resistance three times, shorting the third touch worked",
+     "Bitcoin failed to break the 69000 resistance on the third test and the short paid off",
+     "third rejection of BTC at 69k resistance was a profitable short entry"],
+    ["ETH funding rate flipped negative while price held support, a squeeze followed",
+     "negative funding on ETHUSDT with price holding support led to a short squeeze",
+     "Ethereum shorts got squeezed after funding turned negative above support"],
+    ["stop loss placed too tight on SOL, got wicked out before the move up",
+     "SOLUSDT stop was too tight and a wick took it out right before the rally",
+     "tight stop on Solana was hit by a wick, then price rallied without us"],
+    ["RSI divergence on the 4h chart preceded a 6% drop in BTC",
+     "bearish 4h RSI divergence on BTCUSDT came before a six percent decline",
+     "BTC fell 6% after a bearish divergence in the 4 hour RSI"],
+    ["volatility doubled after the CPI release, position size was cut in half",
+     "after CPI data volatility spiked 2x so we halved the position size",
+     "CPI print doubled volatility; reduced position sizing by 50%"],
+    ["DOGE pumped on social media hype and retraced the whole move within a day",
+     "DOGEUSDT meme pump driven by social hype fully retraced in 24 hours",
+     "social media hype pumped Dogecoin, the entire move reversed the same day"],
+    ["AI consensus split between technical and fundamental analysts, skipped the trade",
+     "technical and fundamental agents disagreed strongly so no trade was taken",
+     "split consensus among the analyst agents, decided to stay flat"],
+    ["liquidation cascade below 60k wiped out late longs on BTC",
+     "BTCUSDT long liquidations cascaded once price lost 60000",
+     "a cascade of long liquidations hit Bitcoin under the 60k level"],
+    ["taking partial profit at the first target reduced drawdown on ETH longs",
+     "scaling out at target one on ETHUSDT longs kept the drawdown smaller",
+     "partial profits at the first take-profit limited drawdown for Ethereum longs"],
+    ["weekend low liquidity caused slippage on a market order in BNB",
+     "BNBUSDT market order slipped badly during thin weekend liquidity",
+     "thin weekend order books gave us heavy slippage on BNB market orders"],
+    ["breakout above the daily range on AVAX failed and trapped buyers",
+     "AVAXUSDT daily range breakout was a fakeout that trapped longs",
+     "failed breakout over the AVAX daily range caught breakout buyers"],
+    ["exchange API timeouts during high volume delayed order placement",
+     "order placement was delayed by Binance API timeouts when volume surged",
+     "API timeouts at peak volume slowed down our orders on the exchange"],
+    ["FOMC rate decision day, held no positions into the announcement",
+     "stayed flat ahead of the FOMC interest rate announcement",
+     "closed all positions before the Fed rate decision"],
+    ["LINK accumulated quietly for weeks before a 30% breakout",
+     "LINKUSDT spent weeks in accumulation, then broke out thirty percent",
+     "Chainlink broke out 30% after a long quiet accumulation phase"],
+    ["trailing stop locked in gains on the XRP rally",
+     "XRPUSDT rally profits were protected by moving the trailing stop",
+     "a trailing stop secured most of the profit during the XRP run"],
+    ["overtrading after a loss led to three more losing trades",
+     "revenge trading following a loss produced a losing streak of three",
+     "after one loss we overtraded and lost three more times"],
+]
+
+DISTRACTORS = [
+    "ADA price moved sideways all week with low volume",
+    "system restarted after config update, no open positions",
+    "daily equity snapshot recorded, balance unchanged",
+    "new trigger set for BTCUSDT at 65000 support",
+    "monitoring latency increased during database maintenance",
+    "ETH gas fees dropped to a yearly low",
+    "paper trading mode enabled for the weekend",
+    "MATIC delisted from the watchlist due to low liquidity",
+    "risk manager approved a 2% position on SOL",
+    "news sentiment neutral across major coins today",
+    "coordinator woke up on a scheduled four hour review",
+    "funding rates normal on all perpetual pairs",
+]
+
+
+def recall_at_k(vectors: np.ndarray, groups: np.ndarray, k: int) -> float:
+    sims = vectors @ vectors.T
+    np.fill_diagonal(sims, -np.inf)
+    hits, total = 0, 0
+    for i, group in enumerate(groups):
+        if group < 0:
+            continue
+        mates = set(np.flatnonzero(groups == group)) - {i}
+        top = np.argsort(-sims[i])[:k]
+        hits += len(mates & set(top.tolist()))
+        total += min(len(mates), k)
+    return hits / total
+
+
+def encode_cost(model, texts, repeat: int = 5):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            model.encode(text, convert_to_numpy=True)
+    single = (time.perf_counter() - t0) / (repeat * len(texts))
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        model.encode(texts, convert_to_numpy=True)
+    batched = (time.perf_counter() - t0) / (repeat * len(texts))
+    return single * 1e6, batched * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=2, help="recall@k (each group has k=2 mates)")
+    parser.add_argument("--dims", default="256,1024,4096")
+    args = parser.parse_args()
+    logger.remove()
+
+    texts = [t for group in PARAPHRASES for t in group] + DISTRACTORS
+    groups = np.array([g for g, group in enumerate(PARAPHRASES) for _ in group] + [-1] * len(DISTRACTORS))
+    print(f"{len(PARAPHRASES)} paraphrase groups + {len(DISTRACTORS)} distractors, recall@{args.k}")
+    print(f"{'embedder':<34} {'recall':>7} {'us/text':>8} {'us/text batched':>16}")
+
+    configs = []
+    for dim in [int(d) for d in args.dims.split(",")]:
+        for label, options in ((f"hashing dim={dim} words only", dict(dim=dim, char_ngrams=(0, 0))),
+                               (f"hashing dim={dim} words+chars", dict(dim=dim))):
+            configs.append((label, options))
+            configs.append((label + " +idf", dict(options, idf=frozen_idf(None, **options))))
+    for name, options in configs:
+        model = HashingEmbedder(**options)
+        recall = recall_at_k(model.encode(texts), groups, args.k)
+        single, batched = encode_cost(model, texts)
+        print(f"{name:<34} {recall:>7.3f} {single:>8.1f} {batched:>16.1f}")
+
+    st = optional_import("sentence_transformers", "MiniLM comparison")
+    if st is None:
+        print("sentence-transformers not installed: MiniLM row skipped")
+        return
+    model = st.SentenceTransformer("all-MiniLM-L6-v2")
+    recall = recall_at_k(normalize(model.encode(texts, convert_to_numpy=True)), groups, args.k)
+    single, batched = encode_cost(model, texts, repeat=1)
+    print(f"{'all-MiniLM-L6-v2':<34} {recall:>7.3f} {single:>8.1f} {batched:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
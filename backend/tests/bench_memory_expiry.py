@@ -0,0 +1,90 @@
+"""
+Memory cleanup cost: full retention sweep vs expiry min-heap eviction.
+
+Each store holds N memories (short_term / long_term across all importance tiers, ages
+spread over 200 days, with embedding rows). Simulated time then advances in steps of
+``--step-hours``; at each step the same expired memories are removed either by
+cleanup_old_memories (re-checks every memory) or by evict_expired (pops the due heap
+entries). Reports the median cost per step and the number of evictions per step.
+
+Run:
+  python tests/bench_memory_expiry.py [--sizes 10000,100000] [--steps 20] [--step-hours 1]
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+import numpy as np
+from loguru import logger
+
+from src.memory.memory_system import MemoryManager, MEMORY_TYPES
+
+CONFIG_PATH = os.path.join(os.path.dirname(current_dir), "src", "config", "memory_config.yaml")
+
+
+def make_manager(storage_dir: str, size: int, now: float, dim: int) -> MemoryManager:
+    manager = MemoryManager(config_path=CONFIG_PATH, storage_dir=storage_dir)
+    manager._reaper_stop.set()  # steps are driven explicitly
+    manager._reaper_wake.set()
+    manager.compact_min_records = 10 * size  # measure cleanup, not snapshots
+    rng = np.random.default_rng(0)
+    ages = np.sort(rng.uniform(0, 200 * 86400, size))[::-1]  # inserted in time order
+    for i in range(size):
+        memory_type = "short_term" if i % 10 == 0 else "long_term"
+        memory_id = manager.add_memory(f"ETHUSDT note #{i}", memory_type, int(rng.integers(0, 101)))
+        manager._by_id[memory_id]['timestamp'] = now - (ages[i] if memory_type == "long_term" else ages[i] / 200)
+    for t in MEMORY_TYPES:
+        memories = manager._memories_of(t)
+        if memories:
+            manager.vectors[t].add_batch([m['id'] for m in memories],
+                                         rng.standard_normal((len(memories), dim)).astype(np.float32),
+                                         [m['timestamp'] for m in memories])
+        manager._pending[t].clear()
+    manager._rebuild_expiry()
+    manager.evict_expired(now)  # start from a clean state
+    manager.cleanup_old_memories(now)
+    return manager
+
+
+def run(manager: MemoryManager, cleanup, now: float, args) -> tuple:
+    samples, evicted = [], []
+    for step in range(1, args.steps + 1):
+        at = now + step * args.step_hours * 3600
+        before = len(manager._by_id)
+        t0 = time.perf_counter()
+        cleanup(manager, at)
+        samples.append(time.perf_counter() - t0)
+        evicted.append(before - len(manager._by_id))
+    return float(np.median(samples)) * 1000, float(np.mean(evicted)), len(manager._by_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--step-hours", type=float, default=1.0)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+    logger.remove()
+
+    now = time.time()
+    print(f"{'memories':>9} {'evicted/step':>13} {'sweep ms':>9} {'heap ms':>8} {'speedup':>8}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            sweep = make_manager(a, size, now, args.dim)
+            heap = make_manager(b, size, now, args.dim)
+            sweep_ms, evicted, left_a = run(sweep, lambda m, at: m.cleanup_old_memories(at), now, args)
+            heap_ms, _, left_b = run(heap, lambda m, at: m.evict_expired(at), now, args)
+            assert left_a == left_b
+            sweep.close()
+            heap.close()
+        print(f"{size:>9} {evicted:>13.1f} {sweep_ms:>9.2f} {heap_ms:>8.3f} {sweep_ms / heap_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Filtered memory retrieval: "SOLUSDT, last 30 days, importance >= 50" as unrelated memories grow.
+
+A fixed set of SOLUSDT memories is mixed with a growing number of memories about other
+symbols. Each query is answered three ways:
+  - scan:     filter every memory dict in Python, then score the survivors
+  - score-all: score every row (one mat-vec), then keep the best rows that pass the filter
+  - index:    MetadataIndex postings -> exact scoring of the candidates only
+
+Run:
+  python tests/bench_memory_filters.py [--unrelated 10000,100000,300000] [--target 2000]
+"""
+import sys
+import os
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+import numpy as np
+
+from src.memory.metadata_index import MetadataIndex, memory_symbol
+from src.memory.vector_index import EmbeddingMatrix, top_k_indices, apply_time_decay, normalize
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "XRPUSDT", "DOGEUSDT", "ADAUSDT", "AVAXUSDT", "LINKUSDT"]
+
+
+def build(rng, target: int, unrelated: int, dim: int, now: float):
+    n = target + unrelated
+    symbols = ["SOLUSDT"] * target + [SYMBOLS[i] for i in rng.integers(0, len(SYMBOLS), unrelated)]
+    timestamps = now - rng.uniform(0, 180 * 86400, n)
+    importance = rng.integers(0, 101, n)
+    memories = [{"id": f"m{i}", "timestamp": float(timestamps[i]), "importance": int(importance[i]),
+                 "metadata": {"symbol": symbols[i]}} for i in range(n)]
+    matrix = EmbeddingMatrix(capacity=n)
+    matrix.add_batch([m["id"] for m in memories], rng.standard_normal((n, dim)).astype(np.float32), timestamps)
+    index = MetadataIndex()
+    for m in memories:
+        index.add(m)
+    arrays = (np.array([s == "SOLUSDT" for s in symbols]), timestamps, importance)
+    return memories, matrix, index, arrays
+
+
+def median_ms(fn, queries):
+    samples, last = [], None
+    for q in queries:
+        t0 = time.perf_counter()
+        last = fn(q)
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples)) * 1000, last
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--unrelated", default="10000,100000,300000")
+    parser.add_argument("--target", type=int, default=2000, help="SOLUSDT memories")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    now = time.time()
+    since = now - 30 * 86400
+    print(f"filter: symbol=SOLUSDT, last 30 days, importance>=50 ({args.target} SOLUSDT memories)")
+    print(f"{'unrelated':>10} {'scan ms':>9} {'score-all ms':>13} {'index ms':>9}")
+    for unrelated in [int(u) for u in args.unrelated.split(",")]:
+        rng = np.random.default_rng(0)
+        memories, matrix, index, (is_sol, timestamps, importance) = build(rng, args.target, unrelated, args.dim, now)
+        queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+        def scan(q):
+            ids = [m["id"] for m in memories if memory_symbol(m) == "SOLUSDT"
+                   and m["timestamp"] >= since and m["importance"] >= 50]
+            return [i for i, _ in matrix.search_subset(q, ids, args.top_k, now=now)]
+
+        def score_all(q):
+            scores = apply_time_decay(matrix.vectors @ normalize(q), matrix.timestamps, now)
+            scores[~(is_sol & (timestamps >= since) & (importance >= 50))] = -np.inf
+            return [matrix.ids[i] for i in top_k_indices(scores, args.top_k)]
+
+        def indexed(q):
+            ids = index.query(symbol="SOLUSDT", since=since, min_importance=50)
+            return [i for i, _ in matrix.search_subset(q, ids, args.top_k, now=now)]
+
+        scan_ms, a = median_ms(scan, queries)
+        all_ms, b = median_ms(score_all, queries)
+        index_ms, c = median_ms(indexed, queries)
+        assert a == b == c
+        print(f"{unrelated:>10} {scan_ms:>9.2f} {all_ms:>13.2f} {index_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
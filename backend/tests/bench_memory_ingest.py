@@ -0,0 +1,87 @@
+"""
+Memory ingestion: synchronous per-memory encode vs the background batching worker.
+
+Measures the time add_memory blocks its caller and the time until every memory is
+searchable, for a burst of inserts (agents writing memories during one cycle).
+Uses the configured sentence-transformers model when it is installed; otherwise a stub
+whose encode cost is a fixed per-call overhead plus a per-text cost (defaults roughly
+match MiniLM-L6 on one CPU core).
+
+Run:
+  python tests/bench_memory_ingest.py [--memories 200] [--call-ms 8] [--text-ms 1.5]
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+import numpy as np
+from loguru import logger
+
+from src.memory.memory_system import MemoryManager
+
+CONFIG_PATH = os.path.join(os.path.dirname(current_dir), "src", "config", "memory_config.yaml")
+
+
+class StubModel:
+    def __init__(self, call_ms: float, text_ms: float, dim: int = 384):
+        self.call_s, self.text_s, self.dim = call_ms / 1000, text_ms / 1000, dim
+        self.calls = 0
+
+    def encode(self, texts, convert_to_numpy=True):
+        single = isinstance(texts, str)
+        n = 1 if single else len(texts)
+        self.calls += 1
+        time.sleep(self.call_s + self.text_s * n)
+        out = np.random.default_rng(n).standard_normal((n, self.dim)).astype(np.float32)
+        return out[0] if single else out
+
+
+def run(worker: bool, args, model) -> tuple:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MemoryManager(config_path=CONFIG_PATH, storage_dir=tmp)
+        if not worker:
+            manager.worker = None
+        if model is not None:
+            manager.retriever.model = model
+        calls_before = getattr(manager.retriever.model, "calls", 0)
+        blocked = []
+        t0 = time.perf_counter()
+        for i in range(args.memories):
+            t = time.perf_counter()
+            manager.add_memory(f"BTCUSDT proximity alert {i}: price within {i % 10 / 10:.1f}% of resistance",
+                               "short_term", 50)
+            blocked.append(time.perf_counter() - t)
+        if manager.worker:
+            manager.worker.wait()
+        searchable = time.perf_counter() - t0
+        calls = getattr(manager.retriever.model, "calls", 0) - calls_before
+        manager.close()
+    return float(np.median(blocked)) * 1000, max(blocked) * 1000, searchable, calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memories", type=int, default=200)
+    parser.add_argument("--call-ms", type=float, default=8.0, help="stub: fixed cost per encode call")
+    parser.add_argument("--text-ms", type=float, default=1.5, help="stub: cost per text in a call")
+    args = parser.parse_args()
+    logger.remove()
+
+    probe = MemoryManager(config_path=CONFIG_PATH, storage_dir=tempfile.mkdtemp())
+    transformer = probe.retriever.embedder == "sentence-transformers" and probe.retriever.model
+    model = None if transformer else StubModel(args.call_ms, args.text_ms)
+    print(f"model: {'sentence-transformers' if model is None else f'stub ({args.call_ms} ms/call + {args.text_ms} ms/text)'}"
+          f", {args.memories} inserts")
+    print(f"{'mode':<8} {'blocked p50 ms':>15} {'blocked max ms':>15} {'all searchable s':>17} {'encode calls':>13}")
+    for name, worker in (("sync", False), ("worker", True)):
+        p50, worst, total, calls = run(worker, args, model)
+        print(f"{name:<8} {p50:>15.3f} {worst:>15.3f} {total:>17.2f} {calls:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Memory insert cost: full memories.json rewrite per insert vs append-only journal.
+
+For each store size N, preloads N memories, then times single inserts:
+  - rewrite: the previous add_memory behaviour (copy every memory dict, json.dump indent=2)
+  - journal: MemoryManager.add_memory (one JSONL append, grouped fsync, periodic compaction)
+
+Run:
+  python tests/bench_memory_journal.py [--sizes 1000,10000,50000] [--inserts 200]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from loguru import logger
+
+from src.memory.memory_system import MemoryManager, MEMORY_TYPES
+
+CONFIG_PATH = os.path.join(os.path.dirname(current_dir), "src", "config", "memory_config.yaml")
+
+
+def legacy_save(manager: MemoryManager, path: str):
+    """The old _save_memories: copy each dict, drop embeddings, pretty-print everything."""
+    data = {}
+    for t in MEMORY_TYPES:
+        dumps = []
+        for m in manager._memories_of(t):
+            copy_m = m.copy()
+            copy_m.pop('embedding', None)
+            dumps.append(copy_m)
+        data[t] = dumps
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def make_manager(storage_dir: str, size: int) -> MemoryManager:
+    manager = MemoryManager(config_path=CONFIG_PATH, storage_dir=storage_dir)
+    manager.compact_min_records = size + 1  # no compaction while preloading
+    for i in range(size):
+        manager.add_memory(f"BTCUSDT proximity alert #{i}: price within 0.5% of resistance", "long_term", i % 100,
+                           metadata={"symbol": "BTCUSDT", "pnl_percentage": i % 7})
+    manager._save_memories()
+    manager.compact_min_records = 1000
+    return manager
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--inserts", type=int, default=200)
+    args = parser.parse_args()
+    logger.remove()
+
+    print(f"{'memories':>9} {'rewrite us/insert':>18} {'journal us/insert':>18} {'speedup':>8}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = make_manager(tmp, size)
+            legacy_path = os.path.join(tmp, "legacy.json")
+
+            t0 = time.perf_counter()
+            for i in range(args.inserts):
+                manager.add_memory(f"rewrite insert {i}", "short_term", 50)
+                legacy_save(manager, legacy_path)
+            rewrite_us = (time.perf_counter() - t0) / args.inserts * 1e6
+
+            t0 = time.perf_counter()
+            for i in range(args.inserts):
+                manager.add_memory(f"journal insert {i}", "short_term", 50)
+            manager.journal.sync()
+            journal_us = (time.perf_counter() - t0) / args.inserts * 1e6
+            manager.close()
+        print(f"{size:>9} {rewrite_us:>18.0f} {journal_us:>18.0f} {rewrite_us / journal_us:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Memory retrieval benchmark: per-memory Python loop vs one float32 matrix.
+
+Builds N synthetic memories (random unit embeddings, timestamps spread over a year)
+and times a top-k query both ways:
+  - loop:   the previous MemoryRetrieval.retrieve_top_k (cosine + decay per memory, full sort)
+  - matrix: EmbeddingMatrix.search (one mat-vec product, vectorized decay, argpartition)
+then persists the matrix with EmbeddingStore and times a restart (open + first query),
+which previously meant re-encoding every memory.
+
+Run:
+  python tests/bench_memory_retrieval.py [--memories 100000] [--dim 384] [--queries 20] [--top-k 5]
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+import numpy as np
+
+from src.memory.embedding_store import EmbeddingStore
+from src.memory.vector_index import EmbeddingMatrix
+
+
+def loop_top_k(query, memories, top_k, now, decay_rate=0.01):
+    """Previous implementation: one cosine similarity and one decay call per memory."""
+    scored = []
+    for memory in memories:
+        emb = memory["embedding"]
+        score = float(np.dot(query, emb) / (np.linalg.norm(query) * np.linalg.norm(emb)))
+        days = max(0.0, (now - memory["timestamp"]) / 86400)
+        scored.append((score / (1 + decay_rate * days), memory))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [m["id"] for _, m in scored[:top_k]]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return result, float(np.median(samples)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memories", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--loop-queries", type=int, default=3, help="the loop is slow; fewer repeats")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    now = time.time()
+    vectors = rng.standard_normal((args.memories, args.dim)).astype(np.float32)
+    timestamps = now - rng.uniform(0, 365 * 86400, args.memories)
+    ids = [f"m{i}" for i in range(args.memories)]
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    t0 = time.perf_counter()
+    index = EmbeddingMatrix(capacity=args.memories)
+    index.add_batch(ids, vectors, timestamps)
+    build_ms = (time.perf_counter() - t0) * 1000
+    memories = [{"id": i, "embedding": v, "timestamp": t} for i, v, t in zip(ids, vectors, timestamps)]
+
+    expected, loop_ms = timed(lambda: loop_top_k(queries[0], memories, args.top_k, now), args.loop_queries)
+    got, _ = timed(lambda: [i for i, _ in index.search(queries[0], args.top_k, now=now)], 1)
+    assert got == expected, (got, expected)
+
+    latencies = []
+    for q in queries:
+        _, ms = timed(lambda: index.search(q, args.top_k, now=now), 1)
+        latencies.append(ms)
+    matrix_ms = float(np.median(latencies))
+
+    print(f"memories={args.memories} dim={args.dim} top_k={args.top_k} "
+          f"matrix={index.vectors.nbytes / 2**20:.0f} MiB (built in {build_ms:.0f} ms)")
+    print(f"{'method':<8} {'median ms/query':>16}")
+    print(f"{'loop':<8} {loop_ms:>16.1f}")
+    print(f"{'matrix':<8} {matrix_ms:>16.2f}   ({loop_ms / matrix_ms:.0f}x, identical top-{args.top_k})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EmbeddingStore(tmp, "bench")
+        stored = store.open("long_term")
+        stored.add_batch(ids, vectors, timestamps)
+        store.save({"long_term": stored})
+        del stored
+
+        t0 = time.perf_counter()
+        reopened = EmbeddingStore(tmp, "bench").open("long_term")
+        open_ms = (time.perf_counter() - t0) * 1000
+        first, first_ms = timed(lambda: [i for i, _ in reopened.search(queries[0], args.top_k, now=now)], 1)
+        assert first == expected
+        print(f"restart: open {open_ms:.0f} ms, first query {first_ms:.1f} ms, "
+              f"0 re-encodes (was {args.memories} encode calls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,646 @@
+import pytest
+import os
+from sqlalchemy import text
+from src.database.operations import DatabaseManager
+from src.database.async_operations import AsyncDatabaseManager
+
+# Setup Test DB
+TEST_DB_PATH = "tests/data/test_db_storage.db"
+TEST_DB_URL = f"sqlite:///{TEST_DB_PATH}"
+
+@pytest.fixture
+def db_manager():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(TEST_DB_PATH + suffix):
+            os.remove(TEST_DB_PATH + suffix)
+
+    os.makedirs(os.path.dirname(TEST_DB_PATH), exist_ok=True)
+    manager = DatabaseManager(db_url=TEST_DB_URL)
+    manager.create_tables()
+    yield manager
+
+    manager.engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(TEST_DB_PATH + suffix)
+        except OSError:
+            pass
+
+def test_sqlite_pragmas_applied(db_manager):
+    with db_manager.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -64000
+        assert conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2  # INCREMENTAL，建表前设置
+
+def test_retention_never_vacuums_implicitly(tmp_path):
+    import sqlite3
+    from src.database.retention import RetentionEngine
+    path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(path)  # 旧库: auto_vacuum=NONE
+    legacy.execute("CREATE TABLE t (x)")
+    legacy.close()
+    manager = DatabaseManager(db_url=f"sqlite:///{path}")
+    engine = RetentionEngine(manager, policy={"archive_dir": str(tmp_path)})
+
+    def mode():
+        with manager.engine.connect() as conn:
+            return conn.execute(text("PRAGMA auto_vacuum")).scalar()
+
+    engine.incremental_vacuum()  # 后台维护只告警跳过
+    assert mode() == 0
+    assert engine.enable_incremental_vacuum() and mode() == 2  # 显式维护命令
+    assert not engine.enable_incremental_vacuum()
+    engine.incremental_vacuum()
+    manager.engine.dispose()
+
+def test_storage_profile_override():
+    manager = DatabaseManager(db_url="sqlite://", storage_profile={"busy_timeout_ms": 1234})
+    with manager.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+    manager.engine.dispose()
+
+def test_backend_selection_and_postgres_schema(monkeypatch):
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateTable, CreateIndex
+    from src.database.engine import resolve_database_url
+    from src.database.models import AIDecision
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    assert resolve_database_url("sqlite:///fallback.db") == "sqlite:///fallback.db"
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    assert resolve_database_url("sqlite:///fallback.db") == "sqlite://"
+    manager = DatabaseManager()
+    assert str(manager.engine.url) == "sqlite://" and not manager.shared_writers
+    manager.engine.dispose()
+
+    # JSON 列在 PostgreSQL 上为 JSONB，并带有游标分页用的 (timestamp, id) 索引
+    ddl = str(CreateTable(AIDecision.__table__).compile(dialect=postgresql.dialect()))
+    assert "input_data JSONB" in ddl
+    index = next(ix for ix in AIDecision.__table__.indexes if ix.name == "ix_ai_decisions_timestamp_id")
+    assert "(timestamp, id)" in str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+
+def test_import_has_no_side_effects():
+    import subprocess
+    import sys
+
+    # 导入 API 入口不应创建引擎、加载交易所 SDK / LLM 客户端或写日志文件
+    probe = (
+        "import sys, src.utils.logger as log; "
+        "log.setup_logger = lambda *a, **k: sys.exit('setup_logger called at import'); "
+        "import main; from src.database.operations import db; "
+        "heavy = [m for m in ('pandas', 'binance', 'anthropic', 'google.genai') if m in sys.modules]; "
+        "print(db.initialized, heavy)"
+    )
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", probe], cwd=backend_dir, capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "False []"
+
+def test_config_roundtrip(db_manager):
+    db_manager.set_config("system_status", "RUNNING")
+    assert db_manager.get_config("system_status") == "RUNNING"
+    assert db_manager.get_config("missing_key", "DEFAULT") == "DEFAULT"
+
+def test_config_cache_reads_from_memory_and_sees_other_writers(db_manager):
+    from sqlalchemy import event
+
+    statements = []
+    event.listen(db_manager.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    db_manager.set_config("system_status", "RUNNING")
+    statements.clear()
+    for _ in range(100):
+        assert db_manager.get_config("system_status") == "RUNNING"
+    assert statements == []
+
+    # 值未变化时不写库
+    db_manager.set_config("system_status", "RUNNING")
+    assert not any(s.lstrip().upper().startswith(("INSERT", "UPDATE")) for s in statements)
+
+    # 另一个进程 (独立的 DatabaseManager) 修改后，超过检查间隔即可读到
+    other = DatabaseManager(db_url=TEST_DB_URL)
+    other.set_config("system_status", "STOPPED")
+    assert db_manager.get_config("system_status") == "RUNNING"
+    db_manager.config_cache.check_interval = 0
+    assert db_manager.get_config("system_status") == "STOPPED"
+    assert db_manager.get_all_config() == {"system_status": "STOPPED"}
+    other.engine.dispose()
+
+@pytest.mark.asyncio
+async def test_async_manager_delegates_to_executor(db_manager):
+    adb = AsyncDatabaseManager(db_manager, max_workers=2)
+    try:
+        await adb.set_config("trading_mode", "PAPER")
+        assert await adb.get_config("trading_mode") == "PAPER"
+        assert await adb.get_all_positions() == []
+        # 非方法属性直接返回
+        assert adb.engine is db_manager.engine
+    finally:
+        adb.close()
+
+def test_write_behind_batches_and_flushes(db_manager):
+    from src.database.models import MarketData, Trade, TradeSide
+    buffer = db_manager.enable_write_behind(flush_interval_ms=60000, batch_size=10000)
+    try:
+        for i in range(100):
+            db_manager.save_market_data({"symbol": "BTCUSDT", "price": 50000.0 + i})
+        db_manager.log_decisions([
+            {"decision_type": "NEWS_EVENT", "layer": "ANALYSIS", "input_data": {"title": f"n{i}"}}
+            for i in range(5)
+        ])
+        assert buffer.pending(MarketData) == 100
+
+        # 读路径会先写出对应表的缓冲
+        assert len(db_manager.get_decisions(limit=10)) == 5
+
+        # 成交不经过缓冲: 重复的 order_id 直接报错给调用方
+        trade = {"symbol": "BTCUSDT", "side": TradeSide.BUY, "price": 1.0, "quantity": 1.0, "order_id": "dup"}
+        db_manager.record_trade(trade)
+        with pytest.raises(Exception):
+            db_manager.record_trade(dict(trade))
+        db_manager.record_trade(dict(trade, order_id="unique"))
+        assert buffer.pending(Trade) == 0
+        assert len(db_manager.get_trades()) == 2
+
+        # 缓冲写入时唯一键冲突只丢弃冲突行
+        memory = {"id": "dup", "content": "x", "importance": 10, "timestamp": 1_700_000_000.0}
+        db_manager.memories.put(memory, "short_term")
+        db_manager.memories.put(dict(memory), "short_term")
+        assert len(db_manager.get_recent_memories()) == 1
+    finally:
+        db_manager.disable_write_behind()
+
+    with db_manager.get_session() as session:
+        assert session.query(MarketData).count() == 100
+    metrics = buffer.get_metrics()
+    assert metrics["market_data"]["rows_written"] == 100
+    assert metrics["memory"]["failed_rows"] == 1
+    assert "trades" not in metrics
+
+def test_write_behind_counts_rows_being_flushed(db_manager):
+    import threading
+    from src.database.models import MarketData
+    buffer = db_manager.enable_write_behind(flush_interval_ms=60000, batch_size=10000)
+    started, release = threading.Event(), threading.Event()
+    write_batch = buffer._write_batch
+
+    def slow_write(model, batch):
+        started.set()
+        release.wait(5)
+        write_batch(model, batch)
+
+    buffer._write_batch = slow_write
+    try:
+        db_manager.save_market_data({"symbol": "BTCUSDT", "price": 1.0})
+        flusher = threading.Thread(target=buffer.flush)
+        flusher.start()
+        assert started.wait(5)
+        # 行已被取出但尚未提交: 仍计入 pending，读路径会等待这次 flush 完成
+        assert buffer.pending(MarketData) == 1
+        threading.Timer(0.1, release.set).start()
+        db_manager._flush_pending(MarketData)
+        with db_manager.get_session() as session:
+            assert session.query(MarketData).count() == 1
+        flusher.join()
+        assert buffer.pending() == 0
+    finally:
+        release.set()
+        db_manager.disable_write_behind()
+
+def test_kline_upsert_and_range_query(db_manager):
+    import numpy as np
+    base = 1_700_000_000_000
+    klines = [
+        {"open_time": base + i * 60_000, "open": 100.0 + i, "high": 101.0 + i, "low": 99.0 + i,
+         "close": 100.5 + i, "volume": 10.0, "close_time": base + i * 60_000 + 59_999}
+        for i in range(10)
+    ]
+    assert db_manager.upsert_klines("BTCUSDT", "1m", klines) == 10
+    # 幂等: 重复写入只覆盖
+    db_manager.upsert_klines("BTCUSDT", "1m", [dict(klines[-1], close=999.0)])
+
+    data = db_manager.get_klines("BTCUSDT", "1m")
+    assert isinstance(data["close"], np.ndarray)
+    assert len(data["open_time"]) == 10
+    assert data["open_time"].dtype == np.int64
+    assert data["close"][-1] == 999.0
+
+    window = db_manager.get_klines("BTCUSDT", "1m", start=base + 2 * 60_000, end=base + 4 * 60_000)
+    assert window["open_time"].tolist() == [base + 2 * 60_000, base + 3 * 60_000, base + 4 * 60_000]
+
+    latest = db_manager.get_klines("BTCUSDT", "1m", limit=3)
+    assert latest["open_time"].tolist() == [base + 7 * 60_000, base + 8 * 60_000, base + 9 * 60_000]
+    assert db_manager.get_latest_kline_time("BTCUSDT", "1m") == base + 9 * 60_000
+    assert len(db_manager.get_klines("ETHUSDT", "1m")["close"]) == 0
+
+def test_retention_downsamples_and_archives(db_manager, tmp_path):
+    from datetime import datetime, timedelta
+    from src.database.models import MarketData, AIDecision, DecisionLayer
+    from src.database.retention import RetentionEngine
+
+    engine = RetentionEngine(db_manager, policy={
+        "archive_dir": str(tmp_path),
+        "market_data": {"raw_days": 7, "bar_interval": "1h"},
+        "ai_decisions": {"hot_days": 30, "batch_size": 2},
+    })
+    now = datetime(2024, 3, 1, 12, 0, 0)
+    old = datetime(2024, 1, 15, 10, 0, 0)
+    with db_manager.get_session() as session:
+        for i, price in enumerate([100.0, 105.0, 95.0, 101.0]):
+            session.add(MarketData(symbol="BTCUSDT", price=price, timestamp=old + timedelta(minutes=i * 10)))
+        session.add(MarketData(symbol="BTCUSDT", price=200.0, timestamp=now))
+        for i in range(3):
+            session.add(AIDecision(decision_type="OLD", layer=DecisionLayer.ANALYSIS,
+                                   input_data={"i": i}, timestamp=old + timedelta(minutes=i)))
+        session.add(AIDecision(decision_type="NEW", layer=DecisionLayer.ANALYSIS, timestamp=now))
+
+    stats = engine.run_once(now)
+    assert stats == {"market_data_downsampled": 4, "ai_decisions_archived": 3, "decision_blobs_removed": 0}
+
+    bars = db_manager.get_klines("BTCUSDT", "1h")
+    assert bars["open"].tolist() == [100.0]
+    assert bars["high"].tolist() == [105.0]
+    assert bars["low"].tolist() == [95.0]
+    assert bars["close"].tolist() == [101.0]
+    with db_manager.get_session() as session:
+        assert session.query(MarketData).count() == 1
+        assert session.query(AIDecision).count() == 1
+    assert len(list(tmp_path.rglob("*.json.gz"))) == 2
+
+    history = engine.query_decisions(limit=10)
+    assert [d["decision_type"] for d in history] == ["NEW", "OLD", "OLD", "OLD"]
+    assert history[1]["archived"] and history[1]["input_data"] == {"i": 2}
+    window = engine.query_decisions(start=old, end=old + timedelta(minutes=1), decision_type="OLD")
+    assert len(window) == 2
+
+    # 不带时间范围的查询只打开凑满 limit 所需的最新归档文件
+    import gzip
+    from src.database import retention
+    opened = []
+    real_open = gzip.open
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(retention.gzip, "open", lambda path, *a, **kw: opened.append(path) or real_open(path, *a, **kw))
+        latest = engine.query_decisions(limit=2)
+    assert [d["input_data"] for d in latest] == [None, {"i": 2}]
+    assert len(opened) == 1
+
+def test_position_fill_is_atomic_and_mirrored(db_manager):
+    from src.database.models import Trade
+    buy = {"symbol": "BTCUSDT", "side": "BUY", "price": 50000.0, "quantity": 0.1, "order_id": "b1"}
+    db_manager.apply_fill("BTCUSDT", "BUY", 0.1, 50000.0, trade=buy)
+    db_manager.apply_fill("BTCUSDT", "BUY", 0.1, 60000.0)
+    pos = db_manager.apply_fill("BTCUSDT", "SELL", 0.1, 70000.0,
+                                trade={"symbol": "BTCUSDT", "side": "SELL", "price": 70000.0, "quantity": 0.1, "order_id": "s1"})
+    assert pos.amount == pytest.approx(0.1)
+    assert pos.avg_price == pytest.approx(55000.0)
+    assert pos.realized_pnl == pytest.approx(1500.0)
+
+    # 成交记录失败 (order_id 重复) 时整笔回滚，镜像不变
+    with pytest.raises(Exception):
+        db_manager.apply_fill("BTCUSDT", "SELL", 0.1, 80000.0, trade=dict(buy, side="SELL"))
+    assert db_manager.get_position("BTCUSDT").amount == pytest.approx(0.1)
+
+    # 新实例从数据库重新加载，与镜像一致
+    fresh = DatabaseManager(db_url=TEST_DB_URL)
+    stored = fresh.get_position("BTCUSDT")
+    assert stored.realized_pnl == pytest.approx(1500.0)
+    assert stored.avg_price == pytest.approx(55000.0)
+    fresh.engine.dispose()
+
+    trades = db_manager.get_trades()
+    assert {t.order_id: t.realized_pnl for t in trades} == {"b1": 0.0, "s1": pytest.approx(1500.0)}
+    assert db_manager.get_position("ETHUSDT") is None
+
+def test_trade_aggregates_and_rolling_stats(db_manager):
+    from datetime import datetime, timedelta
+    from src.execution.safety_checks import SafetyChecker
+
+    now = datetime.utcnow()
+    yesterday = now - timedelta(days=1, hours=1)
+    db_manager.record_trade({"symbol": "ETHUSDT", "side": "SELL", "price": 2000.0, "quantity": 1.0,
+                             "order_id": "old", "realized_pnl": -50.0, "timestamp": yesterday})
+    db_manager.record_trade({"symbol": "ETHUSDT", "side": "SELL", "price": 2000.0, "quantity": 0.5,
+                             "order_id": "t1", "realized_pnl": -20.0, "timestamp": now})
+
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    assert db_manager.count_trades_since(today) == 1
+    assert db_manager.count_trades_since(yesterday) == 2
+    daily = db_manager.get_daily_realized_pnl(since=yesterday)
+    assert daily[yesterday.date().isoformat()] == -50.0
+    assert db_manager.get_notional_by_symbol(since=yesterday) == {"ETHUSDT": 3000.0}
+
+    # 首次访问从数据库加载，之后成交只更新内存
+    stats = db_manager.trade_stats
+    assert stats.trades_last_hour() == 1
+    db_manager.apply_fill("BTCUSDT", "BUY", 0.1, 50000.0,
+                          trade={"symbol": "BTCUSDT", "side": "BUY", "price": 50000.0, "quantity": 0.1, "order_id": "b1"})
+    db_manager.apply_fill("BTCUSDT", "SELL", 0.1, 40000.0,
+                          trade={"symbol": "BTCUSDT", "side": "SELL", "price": 40000.0, "quantity": 0.1, "order_id": "s1"})
+    # 未写入成交记录的持仓调整不计数；实盘成交只经过 record_trade，同样计数
+    db_manager.apply_fill("BTCUSDT", "BUY", 0.1, 40000.0)
+    db_manager.record_trade({"symbol": "SOLUSDT", "side": "BUY", "price": 100.0, "quantity": 1.0, "order_id": "live"})
+    assert stats.trades_last_hour() == 4
+    assert stats.notional_today("BTCUSDT") == pytest.approx(9000.0)
+    assert stats.notional_today("SOLUSDT") == pytest.approx(100.0)
+    assert stats.realized_pnl_today() == pytest.approx(-1020.0)
+    stats.refresh()
+    assert stats.trades_last_hour() == 4 and stats.trades_today() == 4
+
+    checker = SafetyChecker({"max_daily_trades": 2, "max_daily_loss_pct": 0.05})
+    checker.db = db_manager
+    assert not checker.check_daily_limit()
+    assert not checker.check_loss_threshold({"total_balance": 10000.0})
+    assert checker.check_loss_threshold({"total_balance": 100000.0})
+
+def test_equity_snapshots_downsample(db_manager):
+    import numpy as np
+    from src.database.equity import EquitySnapshotter, lttb
+
+    snapshotter = EquitySnapshotter(db_manager, interval_seconds=60, initial_balance=10000.0)
+    db_manager.apply_fill("BTCUSDT", "BUY", 0.1, 50000.0)
+    db_manager.apply_fill("BTCUSDT", "SELL", 0.05, 60000.0,
+                          trade={"symbol": "BTCUSDT", "side": "SELL", "price": 60000.0, "quantity": 0.05, "order_id": "s1"})
+    state = snapshotter.compute()
+    assert state["realized_pnl"] == pytest.approx(500.0)
+    assert state["cash"] == pytest.approx(10000.0 + 500.0 - 2500.0)
+    assert state["equity"] == pytest.approx(10000.0 + 500.0 + 500.0)
+    assert snapshotter.take_snapshot(now=1_700_000_030)["ts"] == 1_699_999_980
+
+    # 30 天分钟级快照，带一个尖峰
+    base = 1_700_000_000 // 86400 * 86400
+    n = 30 * 1440
+    equity = 10000.0 + np.sin(np.arange(n) / 500.0) * 100
+    peak = n // 2 + 59  # 所在小时的最后一分钟，1h 分辨率保留该值
+    equity[peak] = 20000.0
+    # 只写前 100 分钟和每小时最后一分钟 (后者同时覆盖 1h / 1d 分辨率的桶值)
+    for i in [i for i in range(n) if i < 100 or i % 60 == 59]:
+        db_manager.save_equity_snapshot(
+            {"ts": base + i * 60, "equity": float(equity[i]), "cash": 0.0, "position_value": 0.0,
+             "unrealized_pnl": 0.0, "realized_pnl": 0.0},
+            snapshotter.resolutions,
+        )
+
+    assert snapshotter.pick_resolution(base, base + 30 * 86400, 200) == 3600
+    assert snapshotter.pick_resolution(base, base + 99 * 60, 200) == 60
+    curve = snapshotter.get_curve(start=base, end=base + 30 * 86400, points=200)
+    assert len(curve["ts"]) == 200
+    assert np.all(np.diff(curve["ts"]) > 0)
+    assert curve["equity"].max() == 20000.0
+
+    raw = snapshotter.get_curve(start=base, end=base + 99 * 60, points=200)
+    assert len(raw["ts"]) == 100
+
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[437] = 5.0
+    assert 437 in lttb(x, y, 20)
+
+    perf = snapshotter.get_performance()
+    assert perf["win_rate"] == 100.0
+    assert perf["total_pnl"] == pytest.approx(1000.0)
+
+@pytest.mark.asyncio
+async def test_account_handlers_compute_equity_off_the_loop(monkeypatch):
+    import threading
+    import numpy as np
+    from src.api import account
+
+    loop_thread, calls = threading.current_thread(), []
+
+    class Snapshotter:
+        def compute(self):
+            calls.append(threading.current_thread() is loop_thread)
+            return {"equity": 10000.0, "cash": 10000.0, "realized_pnl": 0.0, "unrealized_pnl": 0.0}
+
+        def get_day_open_equity(self):
+            return None
+
+        def get_curve(self, start, end, points):
+            return {"ts": np.empty(0), "equity": np.empty(0)}
+
+    monkeypatch.setattr(account, "snapshotter", Snapshotter())
+    assert (await account.get_balance()).total_balance == 10000.0
+    assert [p.value for p in await account.get_equity_history()] == [10000.0]
+    assert calls == [False, False]  # 持仓镜像可能读库，不能在事件循环线程上执行
+
+def test_keyset_pagination_and_projection(db_manager):
+    from datetime import datetime, timedelta
+    from src.database.models import AIDecision, DecisionLayer
+
+    ts = datetime(2024, 1, 1)
+    with db_manager.get_session() as session:
+        for i in range(25):
+            # 每 5 条共用同一时间戳，验证 (timestamp, id) 作为游标键
+            session.add(AIDecision(
+                decision_type="BUY_SIGNAL" if i % 2 else "HOLD", layer=DecisionLayer.ANALYSIS,
+                timestamp=ts + timedelta(minutes=i // 5), input_data={"blob": "x" * 2000},
+                output_recommendation={"reasoning": f"r{i}", "action": {"type": "BUY"}, "technical_summary": {"rsi_1h": i}},
+            ))
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = db_manager.get_decisions_page(limit=7, cursor=cursor)
+        seen += [r.id for r in rows]
+        if cursor is None:
+            break
+    assert seen == list(range(25, 0, -1))
+
+    rows, _ = db_manager.get_decisions_page(limit=1)
+    assert "input_data" not in rows[0]._fields
+    assert rows[0].reasoning == "r24" and rows[0].action == "BUY"
+    assert rows[0].technical_summary == {"rsi_1h": 24}
+
+    rows, _ = db_manager.get_decisions_page(limit=50, decision_type="HOLD")
+    assert len(rows) == 13
+    assert db_manager.get_decision(25).input_data == {"blob": "x" * 2000}
+    assert db_manager.get_decision(999) is None
+
+    with pytest.raises(ValueError):
+        db_manager.get_decisions_page(cursor="not-a-cursor")
+
+    for i in range(3):
+        db_manager.record_trade({"symbol": "BTCUSDT", "side": "BUY", "price": 1.0, "quantity": 1.0,
+                                 "order_id": f"o{i}", "timestamp": ts})
+    page, cursor = db_manager.get_trades_page(limit=2)
+    assert [t.order_id for t in page] == ["o2", "o1"]
+    page, cursor = db_manager.get_trades_page(limit=2, cursor=cursor)
+    assert [t.order_id for t in page] == ["o0"] and cursor is None
+
+def test_decision_payloads_are_chunked_and_deduplicated(db_manager):
+    from src.database.models import AIDecision, DecisionBlob
+
+    def context(price):
+        return {
+            "market_snapshot": {"BTC": price},
+            "positions": [{"symbol": "BTCUSDT", "amount": 0.1, "note": "x" * 300}] * 5,
+            "memories": [f"memory {i} " + "m" * 100 for i in range(20)],
+        }
+
+    for i in range(10):
+        db_manager.log_decision({
+            "decision_type": "HOLD", "layer": "EXECUTION", "input_data": context(50000 + i),
+            "output_recommendation": {"reasoning": "r" * 600, "action": {"type": "HOLD"}},
+        })
+
+    with db_manager.get_session() as session:
+        # positions / memories 只各存一份，reasoning 为列表接口保留在行内
+        assert session.query(DecisionBlob).count() == 2
+        raw = session.query(AIDecision).first()
+        assert raw.input_data["memories"] == {"$blob": raw.input_data["memories"]["$blob"]}
+        assert raw.output_recommendation["reasoning"] == "r" * 600
+
+    latest = db_manager.get_decisions(limit=1)[0]
+    assert latest.input_data == context(50009)
+    assert db_manager.get_decision(latest.id).input_data == context(50009)
+    # 缓存的分块不会被调用方修改污染
+    latest.input_data["memories"].append("mutated")
+    latest.input_data["positions"][0]["amount"] = 99
+    assert db_manager.get_decision(latest.id).input_data == context(50009)
+    rows, _ = db_manager.get_decisions_page(limit=1, include_details=True)
+    assert rows[0].output_recommendation["action"] == {"type": "HOLD"}
+
+    # Agent.log_decision 的记录: 摘要键嵌套在 output_recommendation 下，同样保留在行内
+    db_manager.log_decision({
+        "decision_type": "TRADE", "layer": "EXECUTION", "input_data": {},
+        "output_recommendation": {"input_data": context(1), "output_recommendation": {
+            "thought_process": "t" * 600, "reasoning": "n" * 600, "technical_summary": {"rsi": 30},
+            "action": {"type": "TRADE", "params": {"note": "p" * 600}}}},
+    })
+    with db_manager.get_session() as session:
+        raw = session.query(AIDecision).order_by(AIDecision.id.desc()).first()
+        nested = raw.output_recommendation["output_recommendation"]
+        assert nested["reasoning"] == "n" * 600 and nested["action"]["params"]["note"] == "p" * 600
+        assert "$blob" in nested["thought_process"]
+    rows, _ = db_manager.get_decisions_page(limit=2)
+    assert [(r.action, r.reasoning) for r in rows] == [("TRADE", "n" * 600), ("HOLD", "r" * 600)]
+    assert rows[0].technical_summary == {"rsi": 30} and rows[1].technical_summary is None
+
+    # 引用计数增量维护: 删除一部分决策后只回收不再被引用的分块
+    assert db_manager.sweep_decision_blobs() == 0
+    with db_manager.get_session() as session:
+        session.query(AIDecision).filter(AIDecision.decision_type == "TRADE").delete()
+    assert db_manager.sweep_decision_blobs() == 1
+    with db_manager.get_session() as session:
+        session.query(AIDecision).delete()
+    assert db_manager.sweep_decision_blobs() == 2
+    with db_manager.get_session() as session:
+        assert session.query(DecisionBlob).count() == 0
+
+def test_decision_full_text_search(db_manager):
+    from src.database.models import AIDecision
+
+    long_thought = "现货 ETF approval 预期升温，资金持续流入。" + "维持仓位观察。" * 60
+    db_manager.log_decision({"decision_type": "BUY", "layer": "EXECUTION", "confidence": 0.9, "input_data": {},
+                             "output_recommendation": {"output_recommendation": {"thought_process": long_thought}}})
+    db_manager.log_decisions([
+        {"decision_type": "NEWS_EVENT", "layer": "ANALYSIS", "confidence": 0.4,
+         "input_data": {"source": "coindesk", "title": f"SEC delays spot ETF decision #{i}"},
+         "output_recommendation": {"sentiment": -0.4}}
+        for i in range(3)
+    ] + [{"decision_type": "HOLD", "layer": "EXECUTION", "confidence": 0.5, "input_data": {},
+          "output_recommendation": {"reasoning": "Range bound, no catalyst"}}])
+
+    rows, cursor = db_manager.search_decisions("ETF approval")
+    assert [r.decision_type for r in rows] == ["BUY"] and cursor is None
+    assert "[ETF]" in rows[0].snippet or "[approval]" in rows[0].snippet
+    assert db_manager.search_decisions("维持仓位")[0][0].decision_type == "BUY"
+
+    # 排序 + 游标分页 + 类型过滤
+    seen, cursor = [], None
+    while True:
+        rows, cursor = db_manager.search_decisions("ETF", limit=2, cursor=cursor, decision_type="NEWS_EVENT")
+        seen += [r.id for r in rows]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 3
+
+    # 英文前缀 / 两字中文词 / 中英混合
+    assert len(db_manager.search_decisions("SEC #1")[0]) == 1
+    assert len(db_manager.search_decisions("delay")[0]) == 3
+    rows = db_manager.search_decisions("流入 approv")[0]
+    assert len(rows) == 1 and "[流入]" in rows[0].snippet
+    assert db_manager.search_decisions("入资")[0] == []
+    with pytest.raises(ValueError):
+        db_manager.search_decisions("   ")
+
+    # 删除 (归档) 后索引同步
+    with db_manager.get_session() as session:
+        session.query(AIDecision).filter(AIDecision.decision_type == "NEWS_EVENT").delete()
+    assert db_manager.search_decisions("SEC")[0] == []
+
+def test_postgres_statements_compile():
+    """PostgreSQL 专用语句在方言层面可编译 (无需数据库实例)"""
+    from datetime import datetime
+    from types import SimpleNamespace
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateTable, CreateIndex
+    from src.database.models import Base, Kline, Position
+    from src.database.positions import PositionRepository
+    from src.database.search import DecisionSearch
+
+    dialect = postgresql.dialect()
+
+    def sql(stmt):
+        return str(stmt.compile(dialect=dialect))
+
+    ddl = {table.name: sql(CreateTable(table)) for table in Base.metadata.sorted_tables}
+    assert "input_data JSONB" in ddl["ai_decisions"] and "embedding BYTEA" in ddl["memory"]
+    indexes = [sql(CreateIndex(index)) for index in Base.metadata.tables["ai_decisions"].indexes]
+    assert any("USING gin (to_tsvector('simple'" in i for i in indexes)
+
+    pg = SimpleNamespace(engine=SimpleNamespace(dialect=dialect))
+    upsert = sql(DatabaseManager._upsert_stmt(pg, Kline, ["symbol", "interval", "open_time"], ["close"]))
+    assert "ON CONFLICT (symbol, interval, open_time) DO UPDATE SET close = excluded.close" in upsert
+    assert "ON CONFLICT (symbol) DO NOTHING" in sql(DatabaseManager._upsert_stmt(pg, Position, ["symbol"], []))
+    assert sql(PositionRepository._row_query("BTCUSDT", for_update=True)).endswith("FOR UPDATE")
+
+    page = sql(DatabaseManager._decisions_page_query(20, None, "TRADE", False))
+    assert "ai_decisions.output_recommendation ->> " in page
+    assert "ai_decisions.output_recommendation #>> " in page
+    daily = sql(DatabaseManager._daily_pnl_query(datetime(2024, 1, 1), None))
+    assert "GROUP BY date(trades.timestamp)" in daily
+
+    search, params = DecisionSearch(pg)._postgres_query(["etf"], "BUY", (-0.5, 10))
+    assert "plainto_tsquery('simple', :query)" in search and params["after_id"] == 10
+
+def test_postgres_backend_roundtrip():
+    """真实 PostgreSQL 上的读写路径 (设置 TEST_POSTGRES_URL 时运行，会清空相关表)"""
+    from datetime import datetime
+    url = os.getenv("TEST_POSTGRES_URL") or os.getenv("BENCH_POSTGRES_URL")
+    if not url:
+        pytest.skip("set TEST_POSTGRES_URL to run against PostgreSQL")
+    from src.database.models import Base
+    manager = DatabaseManager(db_url=url)
+    Base.metadata.drop_all(bind=manager.engine)
+    manager.create_tables()
+    try:
+        assert manager.shared_writers
+        manager.apply_fill("BTCUSDT", "BUY", 0.2, 50000.0,
+                           trade={"symbol": "BTCUSDT", "side": "BUY", "price": 50000.0, "quantity": 0.2, "order_id": "b1"})
+        pos = manager.apply_fill("BTCUSDT", "SELL", 0.1, 60000.0,
+                                 trade={"symbol": "BTCUSDT", "side": "SELL", "price": 60000.0, "quantity": 0.1, "order_id": "s1"})
+        assert pos.amount == pytest.approx(0.1) and pos.realized_pnl == pytest.approx(1000.0)
+        today = datetime.utcnow().date().isoformat()
+        assert manager.get_daily_realized_pnl() == {today: pytest.approx(1000.0)}
+
+        base = 1_700_000_000_000
+        manager.upsert_klines("BTCUSDT", "1m", [{"open_time": base, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5,
+                                                 "volume": 1.0, "close_time": base + 59_999}])
+        manager.upsert_klines("BTCUSDT", "1m", [{"open_time": base, "open": 1.0, "high": 2.0, "low": 0.5, "close": 9.0,
+                                                 "volume": 1.0, "close_time": base + 59_999}])
+        assert manager.get_klines("BTCUSDT", "1m")["close"].tolist() == [9.0]
+
+        manager.log_decision({"decision_type": "TRADE", "layer": "EXECUTION", "input_data": {"memories": ["m" * 400]},
+                              "output_recommendation": {"output_recommendation": {
+                                  "thought_process": "ETF approval " + "t" * 400, "action": {"type": "TRADE"}}}})
+        rows, _ = manager.get_decisions_page(limit=5)
+        assert rows[0].action == "TRADE"
+        assert manager.get_decision(rows[0].id).input_data == {"memories": ["m" * 400]}
+        hits, _ = manager.search_decisions("ETF approval")
+        assert [h.id for h in hits] == [rows[0].id]
+
+        manager.set_config("system_status", "RUNNING")
+        assert manager.get_config("system_status") == "RUNNING"
+    finally:
+        Base.metadata.drop_all(bind=manager.engine)
+        manager.engine.dispose()
@@ -92,3 +92,484 @@ def test_persistence(memory_manager):
     new_manager = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR)
     assert len(new_manager.short_term_memory) == 1
     assert new_manager.short_term_memory[0]['content'] == "Test persistence"
+
+class BagOfWordsModel:
+    """Deterministic stand-in for SentenceTransformer: hashed word counts."""
+    dim = 64
+
+    def encode(self, texts, convert_to_numpy=True):
+        import numpy as np
+        single = isinstance(texts, str)
+        rows = np.zeros((1 if single else len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate([texts] if single else texts):
+            for word in text.lower().split():
+                rows[i, sum(map(ord, word.strip(".,"))) % self.dim] += 1.0
+        return rows[0] if single else rows
+
+def test_vectorized_retrieval(memory_manager):
+    import numpy as np
+    memory_manager.retriever.model = BagOfWordsModel()
+    memory_manager.add_memory("BTC proximity alert near resistance", "short_term", 50)
+    target = memory_manager.add_memory("hedge when volatility is high", "long_term", 90)
+    memory_manager.add_memory("ETH funding rate flipped negative", "episodic", 40)
+
+    # Query scores every type with one matrix-vector product each
+    results = memory_manager.retrieve_similar("volatility is high", top_k=2)
+    assert results[0]['id'] == target and len(results) == 2
+    assert memory_manager.vectors["long_term"].vectors.dtype == np.float32
+    assert memory_manager.retrieve_similar("volatility is high", top_k=5, memory_type="episodic")[0]['type'] == "episodic"
+
+    # Embeddings are memory-mapped back on restart: no re-encoding before the first query
+    memory_manager.flush()
+    reloaded = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR)
+    assert len(reloaded.vectors["long_term"]) == 1 and not any(reloaded._pending.values())
+    reloaded.retriever.model = BagOfWordsModel()
+    assert reloaded.retrieve_similar("volatility is high", top_k=1)[0]['id'] == target
+
+    # Vectors written under another model tag are discarded
+    from src.memory.embedding_store import EmbeddingStore
+    assert len(EmbeddingStore(TEST_STORAGE_DIR, "other-model").open("long_term")) == 0
+    fresh = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR)
+    assert len(fresh.vectors["long_term"]) == 0 and list(fresh._pending["long_term"]) == [target]
+
+    # Cleanup removes the matrix rows of deleted memories
+    memory_manager.short_term_memory[0]['timestamp'] = time.time() - 2 * 86400
+    memory_manager.cleanup_old_memories()
+    assert len(memory_manager.vectors["short_term"]) == 0
+    assert all(m['type'] != "short_term" for m in memory_manager.retrieve_similar("BTC proximity alert", top_k=5))
+
+def test_ivf_index_incremental_and_persistent(tmp_path):
+    import numpy as np
+    from src.memory.embedding_store import EmbeddingStore
+    from src.memory.vector_index import EmbeddingMatrix
+
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((20, 32))
+    data = (centers[rng.integers(0, 20, 3000)] + 0.3 * rng.standard_normal((3000, 32))).astype(np.float32)
+    ids = [f"m{i}" for i in range(3000)]
+    now = time.time()
+
+    store = EmbeddingStore(str(tmp_path), "test")
+    index = store.open("long_term", {"min_train": 1000, "nprobe": 8})
+    index.add_batch(ids[:500], data[:500], [now] * 500)
+    assert not index.trained  # exact search below min_train
+    index.add_batch(ids[500:], data[500:], [now] * 2500)  # trains, then retrains as it grows
+    assert index.trained and len(index.centroids) == int(np.sqrt(len(index)))
+
+    # Deletes keep list assignment aligned with the swapped matrix rows
+    for memory_id in ids[:300]:
+        index.remove(memory_id)
+    exact = EmbeddingMatrix()
+    exact.add_batch(ids[300:], data[300:], [now] * 2700)
+    queries = data[rng.integers(300, 3000, 50)] + 0.1 * rng.standard_normal((50, 32)).astype(np.float32)
+    hits = 0
+    for q in queries:
+        approx = {i for i, _ in index.search(q, 10, now=now)}
+        assert not approx & set(ids[:300])
+        hits += len(approx & {i for i, _ in exact.search(q, 10, now=now)})
+    assert hits / (50 * 10) > 0.9
+
+    # Centroids and assignment are persisted with the matrix
+    store.save({"long_term": index})
+    reopened = EmbeddingStore(str(tmp_path), "test").open("long_term", {"min_train": 1000, "nprobe": 8})
+    assert reopened.trained and np.array_equal(reopened.centroids, index.centroids)
+    assert reopened.search(queries[0], 5, now=now) == index.search(queries[0], 5, now=now)
+
+def test_journal_replay_tombstones_and_compaction(memory_manager):
+    from src.memory.journal import JOURNAL_FILE
+    journal_path = os.path.join(TEST_STORAGE_DIR, JOURNAL_FILE)
+    snapshot_path = os.path.join(TEST_STORAGE_DIR, "memories.json")
+
+    # Inserts append one journal line each; the snapshot is not rewritten
+    ids = [memory_manager.add_memory(f"event {i}", "long_term", 10) for i in range(5)]
+    assert not os.path.exists(snapshot_path)
+    with open(journal_path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 5
+
+    # Cleanup deletes are tombstones
+    memory_manager.long_term_memory[0]['timestamp'] = time.time() - 31 * 86400
+    memory_manager.cleanup_old_memories()
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "memory": {"id": "torn"')  # crash mid-append
+    replayed = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR)
+    assert [m['id'] for m in replayed.long_term_memory] == ids[1:]
+    with open(journal_path, encoding="utf-8") as f:
+        assert f.read().endswith("\n")  # torn record truncated away
+
+    # Compaction folds the journal into a snapshot and truncates it
+    replayed.compact_min_records = 3
+    replayed.add_memory("after restart", "short_term", 50)
+    assert replayed.journal.records == 0 and os.path.getsize(journal_path) == 0
+    final = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR)
+    assert len(final.long_term_memory) == 4 and final.short_term_memory[0]['content'] == "after restart"
+
+def test_background_embedding_worker_batches(memory_manager):
+    class SlowModel(BagOfWordsModel):
+        calls = 0
+
+        def encode(self, texts, convert_to_numpy=True):
+            time.sleep(0.02)  # inference cost is paid on the worker thread
+            if not isinstance(texts, str):
+                SlowModel.calls += 1
+            return super().encode(texts, convert_to_numpy)
+
+    memory_manager.retriever.model = SlowModel()
+    t0 = time.perf_counter()
+    ids = [memory_manager.add_memory(f"alert {i} volatility spike", "long_term", 50) for i in range(20)]
+    assert time.perf_counter() - t0 < 0.2  # callers never wait for the model
+
+    # A query right away still sees memories the worker has not finished
+    results = memory_manager.retrieve_similar("alert 7 volatility spike", top_k=20)
+    assert {m['id'] for m in results} == set(ids)
+    assert memory_manager.worker.wait(5) and not memory_manager._pending["long_term"]
+    assert SlowModel.calls < 20  # batched
+    assert len(memory_manager.vectors["long_term"]) == 20
+
+def test_lazy_model_and_embedding_cache(memory_manager):
+    class CountingModel(BagOfWordsModel):
+        texts = 0
+
+        def encode(self, texts, convert_to_numpy=True):
+            CountingModel.texts += 1 if isinstance(texts, str) else len(texts)
+            return super().encode(texts, convert_to_numpy)
+
+    # Constructing the manager (and adding memories) does not load the model
+    assert not memory_manager.retriever._model_loaded
+    memory_manager.retriever.model = CountingModel()
+    memory_manager.add_memory("BTC near resistance", "long_term", 50)
+    memory_manager.worker.wait(5)
+
+    # Repeated queries (whitespace-normalized) skip inference
+    before = CountingModel.texts
+    first = memory_manager.retrieve_similar("price near resistance", top_k=1)
+    again = memory_manager.retrieve_similar("  price near   resistance ", top_k=1)
+    assert first == again and CountingModel.texts == before + 1
+    stats = memory_manager.retriever.cache.stats()
+    assert stats["hits"] >= 1 and 0 < stats["hit_rate"] < 1
+
+    # The cache is persisted with flush() and reloaded by the next process
+    memory_manager.flush()
+    reloaded = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR)
+    assert reloaded.retriever.get_embedding("price near resistance") is not None
+    assert not reloaded.retriever._model_loaded
+
+def test_metadata_filtered_retrieval(memory_manager):
+    memory_manager.retriever.model = BagOfWordsModel()
+    sol_recent = memory_manager.add_memory("funding flipped negative", "long_term", 60,
+                                           metadata={"symbol": "SOLUSDT", "tags": ["funding"]})
+    sol_minor = memory_manager.add_memory("funding flipped negative again", "long_term", 10,
+                                          metadata={"symbol": "solusdt", "tags": ["funding"]})
+    sol_old = memory_manager.add_memory("funding flipped negative last year", "episodic", 90,
+                                        metadata={"symbol": "SOLUSDT"})
+    memory_manager._by_id[sol_old]['timestamp'] = time.time() - 40 * 86400
+    memory_manager.metadata_index.add(memory_manager._by_id[sol_old])
+    memory_manager.add_memory("funding flipped negative", "long_term", 90, metadata={"symbol": "BTCUSDT"})
+
+    def ids(**filters):
+        return [m['id'] for m in memory_manager.retrieve_similar("funding negative", top_k=10, **filters)]
+
+    assert set(ids(symbol="SOLUSDT")) == {sol_recent, sol_minor, sol_old}
+    assert ids(symbol="SOLUSDT", max_age_days=30, min_importance=50) == [sol_recent]
+    assert set(ids(tags=["funding"])) == {sol_recent, sol_minor}
+    assert set(ids(min_importance=80)) - {sol_old} and sol_recent not in ids(min_importance=80)
+    assert ids(symbol="ETHUSDT") == []
+
+    # Postings are dropped with the memory
+    memory_manager.long_term_memory = [m for m in memory_manager.long_term_memory if m['id'] != sol_minor]
+    memory_manager.cleanup_old_memories()
+    assert sol_minor not in memory_manager.metadata_index.query(symbol="SOLUSDT")
+
+def test_expiry_heap_evicts_only_due_memories(memory_manager):
+    now = time.time()
+    short = memory_manager.add_memory("stale alert", "short_term", 50, metadata={"symbol": "BTCUSDT"})
+    low = memory_manager.add_memory("minor lesson", "long_term", 10)
+    mid = memory_manager.add_memory("useful lesson", "long_term", 40)
+    keep = memory_manager.add_memory("golden rule", "long_term", 90)
+    episode = memory_manager.add_memory("flash crash", "episodic", 0)
+    assert memory_manager.expiry.next_expiry() == pytest.approx(memory_manager._by_id[short]['timestamp'] + 86400)
+
+    assert memory_manager.evict_expired(now) == 0
+    assert memory_manager.evict_expired(now + 2 * 86400) == 1
+    assert [m['id'] for m in memory_manager.short_term_memory] == []
+    assert memory_manager.metadata_index.query(symbol="BTCUSDT") == set()
+
+    # Importance raised in place: the stale heap entry is pushed back with the new expiry
+    memory_manager._by_id[low]['importance'] = 30
+    assert memory_manager.evict_expired(now + 31 * 86400) == 0
+    assert memory_manager.evict_expired(now + 91 * 86400) == 2
+    assert [m['id'] for m in memory_manager.long_term_memory] == [keep]
+    assert episode in memory_manager._by_id and len(memory_manager.expiry) == 0
+
+    # Evictions are journaled like cleanup deletes
+    memory_manager.flush()
+    replayed = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR)
+    assert set(replayed._by_id) == {keep, episode} and mid not in replayed._by_id
+    replayed.close()
+
+def test_database_backed_memory_store(memory_manager):
+    from src.database.operations import DatabaseManager
+    database = DatabaseManager(db_url=f"sqlite:///{TEST_STORAGE_DIR}/memory.db")
+    database.create_tables()
+    manager = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR, database=database)
+    manager.retriever.model = BagOfWordsModel()
+    alert = manager.add_memory("BTC proximity alert near resistance", "short_term", 50, metadata={"symbol": "BTCUSDT"})
+    rule = manager.add_memory("hedge when volatility is high", "long_term", 90, metadata={"symbol": "ETHUSDT"})
+    manager.worker.wait(5)
+
+    # One row per memory: typed columns plus the embedding BLOB written by the worker
+    rows = database.get_recent_memories(limit=5)
+    assert [r.memory_uid for r in rows] == [rule, alert]
+    assert rows[0].symbol == "ETHUSDT" and rows[0].expiry_date is None and rows[1].expiry_date is not None
+    assert all(r.embedding is not None for r in rows)
+    assert [m['id'] for m in manager.retrieve_recent(2)] == [rule, alert]
+    assert [m['id'] for m in manager.retrieve_recent(5, symbol="btcusdt")] == [alert]
+    assert not os.path.exists(os.path.join(TEST_STORAGE_DIR, "memories.json"))
+    manager.close()
+
+    # Restart: memories and vectors come back from the table without re-embedding
+    reloaded = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR, database=database)
+    assert set(reloaded._by_id) == {alert, rule} and not any(reloaded._pending.values())
+    reloaded.retriever.model = BagOfWordsModel()
+    assert reloaded.retrieve_similar("volatility is high", top_k=1)[0]['id'] == rule
+
+    # Evictions delete the rows
+    assert reloaded.evict_expired(time.time() + 2 * 86400) == 1
+    assert [r.memory_uid for r in database.get_recent_memories()] == [rule]
+    reloaded.close()
+    database.engine.dispose()
+
+def test_hashing_embedder(memory_manager, tmp_path):
+    import importlib.util
+    import numpy as np
+    from src.memory.hashing_embedder import HashingEmbedder, frozen_idf
+    idf = frozen_idf(str(tmp_path / "idf.npz"), dim=512)
+    embedder = HashingEmbedder(dim=512, idf=idf)
+    docs = embedder.encode(["BTC rejected at resistance, short worked",
+                            "funding flipped negative on ETH",
+                            "Bitcoin rejection at the resistance level"])
+    assert docs.shape == (3, 512) and abs(float(docs[0] @ docs[0]) - 1.0) < 1e-5
+    assert docs[2] @ docs[0] > docs[2] @ docs[1]
+
+    # The IDF is frozen: encoding other texts (queries) never shifts a stored vector's space
+    before = embedder.encode("funding negative")
+    embedder.encode(["funding " * 5, "negative funding on every pair"] * 50)
+    assert np.array_equal(embedder.encode("funding negative"), before)
+    # ...and read back, not refitted, after a restart; the tag names the IDF it was built with
+    assert np.array_equal(frozen_idf(str(tmp_path / "idf.npz"), corpus_path="missing.txt", dim=512), idf)
+    assert np.array_equal(HashingEmbedder(dim=512, idf=idf).encode("funding negative"), before)
+    assert embedder.tag != HashingEmbedder(dim=512).tag
+    assert embedder.tag != HashingEmbedder(dim=512, idf=np.ones(512, dtype=np.float32)).tag
+    common, rare = idf[embedder._hash("w the")[0]], idf[embedder._hash("w squeeze")[0]]
+    assert common < rare
+
+    # Without sentence-transformers, "auto" falls back to it instead of disabling retrieval
+    if importlib.util.find_spec("sentence_transformers") is None:
+        assert memory_manager.retriever.embedder == "hashing" and memory_manager.retriever.available
+        target = memory_manager.add_memory("ETH funding flipped negative before the squeeze", "long_term", 60)
+        memory_manager.add_memory("BTC stop loss hit by a wick", "long_term", 60)
+        assert memory_manager.retrieve_similar("negative funding squeeze on ETH", top_k=1)[0]['id'] == target
+        assert memory_manager.retriever.model_tag.startswith("hashing-") and "-idf" in memory_manager.retriever.model_tag
+
+def test_consolidation_merges_near_duplicates(memory_manager):
+    memory_manager.retriever.model = BagOfWordsModel()
+    alerts = [memory_manager.add_memory("BTC proximity alert near resistance", "short_term", importance,
+                                        metadata={"symbol": "BTCUSDT", "tags": [f"cycle{i}"]})
+              for i, importance in enumerate((10, 40, 20))]
+    lesson = memory_manager.add_memory("hedge when volatility is high", "long_term", 90)
+    repeat = memory_manager.add_memory("hedge when volatility is high", "short_term", 30)
+    other = memory_manager.add_memory("ETH funding flipped negative", "short_term", 50)
+    memory_manager.worker.wait(5)
+    first_seen = memory_manager._by_id[alerts[0]]['timestamp']
+
+    stats = memory_manager.consolidate_memories(threshold=0.95)
+    assert stats == {"clusters": 2, "merged": 5, "promoted": 1}
+    assert [m['id'] for m in memory_manager.short_term_memory] == [other]
+    merged = {m['content']: m for m in memory_manager.long_term_memory}
+    alert = merged["BTC proximity alert near resistance"]
+    assert alert['importance'] == 40 and alert['metadata']['consolidated_count'] == 3
+    assert alert['metadata']['first_seen'] == first_seen
+    assert alert['metadata']['tags'] == ["cycle0", "cycle1", "cycle2"]
+    assert merged["hedge when volatility is high"]['metadata']['consolidated_count'] == 2
+    assert lesson not in memory_manager._by_id and repeat not in memory_manager._by_id
+
+    # Retrieval now returns distinct information, and the merge survives a restart
+    results = memory_manager.retrieve_similar("BTC alert near resistance", top_k=3)
+    assert len({m['content'] for m in results}) == len(results)
+    assert memory_manager.metadata_index.query(symbol="BTCUSDT") == {alert['id']}
+    memory_manager.flush()
+    replayed = MemoryManager(config_path=TEST_CONFIG_PATH, storage_dir=TEST_STORAGE_DIR)
+    assert set(replayed._by_id) == set(memory_manager._by_id)
+    assert len(replayed.vectors["long_term"]) == 2 and not replayed._pending["long_term"]
+    replayed.close()
+
+def test_consolidation_keeps_symbols_and_actions_apart(memory_manager):
+    import threading
+    memory_manager.retriever.model = BagOfWordsModel()
+    btc = [memory_manager.add_memory("proximity alert near resistance", "short_term", 10,
+                                     metadata={"symbol": symbol, "action": "WAIT"}) for symbol in ("BTCUSDT", "btcusdt")]
+    eth = memory_manager.add_memory("proximity alert near resistance", "short_term", 10,
+                                    metadata={"symbol": "ETHUSDT", "action": "WAIT"})
+    trade = memory_manager.add_memory("proximity alert near resistance", "short_term", 10,
+                                      metadata={"symbol": "BTCUSDT", "action": "TRADE"})
+    memory_manager.worker.wait(5)
+
+    # Tombstones are written after the manager lock is released
+    lock_free = []
+    delete = memory_manager.journal.delete
+
+    def checked_delete(ids):
+        probe = threading.Thread(target=lambda: lock_free.append(memory_manager._lock.acquire(timeout=1) and memory_manager._lock.release() is None))
+        probe.start()
+        probe.join()
+        delete(ids)
+
+    memory_manager.journal.delete = checked_delete
+    stats = memory_manager.consolidate_memories(threshold=0.95)
+    assert stats["clusters"] == 1 and stats["merged"] == 2 and lock_free == [True]
+    assert {eth, trade} <= set(memory_manager._by_id) and not set(btc) & set(memory_manager._by_id)
+    merged = [m for m in memory_manager.short_term_memory if m['id'] not in (eth, trade)]
+    assert len(merged) == 1 and merged[0]['metadata']['symbol'].upper() == "BTCUSDT"
+
+def test_partitioned_clustering_matches_topics():
+    import numpy as np
+    from src.memory.consolidation import cluster_near_duplicates
+    from src.memory.vector_index import normalize
+    rng = np.random.default_rng(0)
+    centers = normalize(rng.standard_normal((40, 32)).astype(np.float32))
+    topics = rng.integers(0, 40, 400)
+    vectors = normalize(centers[topics] + 0.05 * rng.standard_normal((400, 32)).astype(np.float32))
+    # Small partition size forces the k-means cells and the leader re-clustering passes
+    labels = cluster_near_duplicates(vectors, np.arange(400), threshold=0.8, partition_size=16)
+    assert all(len(set(topics[labels == leader])) == 1 for leader in np.unique(labels))
+    assert len(np.unique(labels)) == len(np.unique(topics))
+
+def test_unsaved_embedding_rows_are_rebuilt(tmp_path):
+    import numpy as np
+    from src.memory.embedding_store import EmbeddingStore
+
+    vectors = np.eye(4, dtype=np.float32)
+    store = EmbeddingStore(str(tmp_path), "test")
+    matrix = store.open("long_term")
+    matrix.add_batch(["a", "b", "c"], vectors[:3], [1.0, 2.0, 3.0])
+    store.save({"long_term": matrix})
+    assert len(EmbeddingStore(str(tmp_path), "test").open("long_term")) == 3
+
+    # remove swaps "c" into row 0, the new row lands where "c" was; no save (crash)
+    matrix.remove("a")
+    matrix.add("d", vectors[3], 4.0)
+    reopened = EmbeddingStore(str(tmp_path), "test").open("long_term")
+    assert len(reopened) == 0  # stale index dropped: every memory is re-embedded
+
+    # after a clean save the file and index agree again
+    store.save({"long_term": matrix})
+    restored = EmbeddingStore(str(tmp_path), "test").open("long_term")
+    assert restored.ids == ["c", "b", "d"]
+    assert restored.search(vectors[2], 1)[0][0] == "c"
+
+def test_ivf_training_off_lock_keeps_lists_consistent():
+    import numpy as np
+    from src.memory.vector_index import EmbeddingMatrix, IVFIndex
+
+    rng = np.random.default_rng(2)
+    data = rng.standard_normal((1500, 16)).astype(np.float32)
+    ids = [f"m{i}" for i in range(1500)]
+    index = IVFIndex(EmbeddingMatrix(), min_train=1000, nprobe=4, auto_train=False)
+    index.add_batch(ids[:1200], data[:1200], [0.0] * 1200)
+    assert index.training_due and not index.trained
+
+    # Inserts and deletes land between the snapshot and the install
+    snapshot = index.begin_training()
+    assert not index.training_due
+    for memory_id in ids[:100]:
+        index.remove(memory_id)
+    index.add_batch(ids[1200:], data[1200:], [0.0] * 300)
+    index.install(*index.fit(snapshot))
+    assert index.trained and index.trained_size == 1400
+
+    def check():
+        n = len(index)
+        rows = np.concatenate([index._lists[l][:index._sizes[l]] for l in range(len(index.centroids))])
+        assert sorted(rows.tolist()) == list(range(n))  # every row in exactly one list
+        for l in range(len(index.centroids)):
+            assert (index._assign[index._lists[l][:index._sizes[l]]] == l).all()
+        np.testing.assert_array_equal(index._assign[:n], index._nearest(index.vectors))
+
+    check()
+    for memory_id in ids[100:400]:
+        index.remove(memory_id)
+    index.add_batch(ids[:50], data[:50], [0.0] * 50)
+    check()
+    # Probing every list is exact search
+    q = data[700]
+    found = index.search(q, 5, now=0.0, nprobe=len(index.centroids))
+    assert [i for i, _ in found] == [i for i, _ in index.matrix.search(q, 5, now=0.0)]
+
+def test_quiet_journal_is_synced_by_the_reaper(memory_manager):
+    journal = memory_manager.journal
+    journal.fsync_interval = 0.1
+    memory_manager.add_memory("event", "long_term", 10)
+    journal.sync()
+    memory_manager.add_memory("last event before a quiet spell", "long_term", 10)  # inside the interval: not synced
+    assert journal.sync_delay() is not None
+    deadline = time.time() + 2
+    while journal.sync_delay() is not None and time.time() < deadline:
+        time.sleep(0.02)
+    assert journal.sync_delay() is None  # no further append needed
+
+def test_retrieve_similar_skips_memories_evicted_mid_query(memory_manager):
+    kept = memory_manager.add_memory("ETH funding rate turned negative", "long_term", 90)
+    doomed = memory_manager.add_memory("BTC funding rate turned negative", "short_term", 10)
+    memory_manager.flush()
+    search = memory_manager.vectors["long_term"].search
+
+    def search_then_evict(*args, **kwargs):
+        # the reaper runs between the short_term and long_term searches
+        memory_manager._remove_memories("short_term", {doomed})
+        return search(*args, **kwargs)
+
+    memory_manager.vectors["long_term"].search = search_then_evict
+    results = memory_manager.retrieve_similar("funding rate turned negative", top_k=2, memory_type=None)
+    assert [m['id'] for m in results] == [kept]
+
+def test_database_mode_trains_and_deletes_off_lock(memory_manager, tmp_path, monkeypatch):
+    import threading
+    import yaml
+    from src.database.operations import DatabaseManager
+    from src.memory.vector_index import IVFIndex
+    with open(TEST_CONFIG_PATH, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config['memory']['retrieval']['ann'].update(enabled=True, types=["long_term"], min_train=3)
+    config_path = tmp_path / "memory_config.yaml"
+    config_path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    database = DatabaseManager(db_url=f"sqlite:///{TEST_STORAGE_DIR}/memory.db")
+    database.create_tables()
+
+    manager = MemoryManager(config_path=str(config_path), storage_dir=TEST_STORAGE_DIR, database=database)
+    manager.retriever.model = BagOfWordsModel()
+    for i in range(4):
+        manager.add_memory(f"support level {i} held on volume", "long_term", 90)
+    manager.add_memory("short lived alert", "short_term", 10)
+    manager.close()
+
+    # Startup loads the stored vectors; the index is trained by the background thread
+    fit, trained_on = IVFIndex.fit, []
+    monkeypatch.setattr(IVFIndex, "fit", lambda self, v: trained_on.append(threading.current_thread().name) or fit(self, v))
+    reloaded = MemoryManager(config_path=str(config_path), storage_dir=TEST_STORAGE_DIR, database=database)
+    reloaded._trainer.join(5)
+    assert trained_on == ["memory-ivf-train"] and reloaded.vectors["long_term"].trained
+
+    # Row deletes run after the manager lock is released
+    lock_free = []
+    delete = reloaded.database.delete
+
+    def checked_delete(ids):
+        probe = threading.Thread(target=lambda: lock_free.append(reloaded._lock.acquire(timeout=1) and reloaded._lock.release() is None))
+        probe.start()
+        probe.join()
+        delete(ids)
+
+    reloaded.database.delete = checked_delete
+    assert reloaded.evict_expired(time.time() + 2 * 86400) == 1
+    assert lock_free == [True] and len(database.get_recent_memories()) == 4
+    reloaded.close()
+    database.engine.dispose()
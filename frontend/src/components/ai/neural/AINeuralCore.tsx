@@ -44,7 +44,8 @@ export const AINeuralCore: React.FC = () => {
         // [NEW] 1. Load History on Mount
         const loadHistory = async () => {
             try {
-                const res = await api.get('/api/ai/decisions?limit=10');
+                // The list endpoint returns summaries only; the history view needs the full output
+                const res = await api.get('/api/ai/decisions?limit=10&include_details=true');
                 if (Array.isArray(res.data)) {
                     // Force cast or map to Session
                     const historySessions: Session[] = res.data.map((d: any) => {